@@ -42,6 +42,12 @@ def parse_args():
                    help="input file, can be XCCDF or Source DataStream")
     p.add_argument("-o", "--output", action="store", required=True,
                    help="output directory")
+    p.add_argument("--manifest", action="store",
+                   help="JSON file with digests of inputs of generated guides. "
+                   "Guides whose inputs didn't change since the last build "
+                   "are not generated again.")
+    p.add_argument("--timings", action="store_true",
+                   help="report how long it took to generate each guide")
 
     return p.parse_args()
 
@@ -79,15 +85,31 @@ def main():
         print(index_path)
         sys.exit(0)
 
+    manifest = None
+    digests = dict()
+    guide_filter = None
+    if args.manifest:
+        manifest = ssg.build_guides.GuideManifest(args.manifest)
+        guide_inputs = ssg.build_guides.GuideInputs(input_tree)
+
+        def is_up_to_date(task):
+            digest = guide_inputs.get_digest(task.benchmark_id, task.profile_id)
+            digests[task.guide_path] = digest
+            return manifest.is_up_to_date(task.guide_path, digest)
+        guide_filter = is_up_to_date
+
     index_links, index_options, index_initial_src, queue = \
         ssg.build_guides.fill_queue(benchmarks, benchmark_profile_pairs,
-                                    input_path, path_base, output_dir)
+                                    input_path, path_base, output_dir,
+                                    guide_filter)
+    queued_guide_paths = [task.guide_path for task in queue.queue]
 
+    timings = dict()
     workers = []
     for worker_id in range(args.jobs):
         worker = threading.Thread(
             name="Guide generate worker #%i" % (worker_id),
-            target=lambda queue=queue: ssg.build_guides.builder(queue)
+            target=lambda queue=queue: ssg.build_guides.builder(queue, timings)
         )
         workers.append(worker)
         worker.daemon = True
@@ -99,6 +121,17 @@ def main():
     if queue.unfinished_tasks > 0:
         raise RuntimeError("Some of the guides were not exported successfully")
 
+    if manifest is not None:
+        for guide_path in queued_guide_paths:
+            manifest.record(guide_path, digests[guide_path])
+        manifest.save()
+
+    if args.timings:
+        for guide_path in sorted(timings, key=timings.get, reverse=True):
+            print("%7.2f s  %s" % (timings[guide_path], guide_path))
+        print("Generated %d guides, %d guides were up to date."
+              % (len(queued_guide_paths), len(index_links) - len(queued_guide_paths)))
+
     index_source = ssg.build_guides.build_index(benchmarks, input_basename,
                                                 index_links, index_options,
                                                 index_initial_src)
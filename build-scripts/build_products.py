@@ -0,0 +1,185 @@
+#!/usr/bin/python3
+
+from __future__ import print_function
+
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+
+import ssg.build_sce
+import ssg.build_yaml
+import ssg.environment
+import ssg.jinja
+import ssg.products
+import ssg.templates
+import ssg.utils
+from ssg.build_cpe import ProductCPEs
+
+import compile_all
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    p = argparse.ArgumentParser(
+        description="Compile products and build their templated content in one process tree. "
+        "Sources shared by the products are read and compiled only once, "
+        "then every product is built in a forked worker process.")
+    p.add_argument(
+        "--build-config-yaml", required=True,
+        help="YAML file with information about the build configuration. "
+        "e.g.: ~/scap-security-guide/build/build_config.yml. "
+        "Products are built in subdirectories of its directory."
+    )
+    p.add_argument(
+        "--controls-dir",
+        default=os.path.join(PROJECT_ROOT, "controls"),
+        help="Directory that contains control files with policy controls. "
+        "e.g.: ~/scap-security-guide/controls",
+    )
+    p.add_argument(
+        "--templates-dir",
+        default=os.path.join(PROJECT_ROOT, "shared", "templates"),
+        help="Path to directory which contains content templates. "
+        "e.g.: ~/scap-security-guide/shared/templates"
+    )
+    p.add_argument(
+        "-j", "--jobs", type=int, default=ssg.utils.get_cpu_count(),
+        help="How many products should be built in parallel."
+    )
+    p.add_argument(
+        "products", metavar="PRODUCT", nargs="+",
+        help="IDs of products to build, e.g. rhel9"
+    )
+    return p.parse_args()
+
+
+def get_product_yaml_path(product):
+    return os.path.join(PROJECT_ROOT, "products", product, "product.yml")
+
+
+def get_stig_references(product):
+    references = sorted(glob.glob(os.path.join(
+        PROJECT_ROOT, "shared", "references",
+        "disa-stig-{product}-*-xccdf-manual.xml".format(product=product))))
+    if references:
+        return references[0]
+    return None
+
+
+def _is_sce_enabled(env_yaml):
+    # The value of the SSG_SCE_ENABLED CMake option
+    return str(env_yaml.get("sce_enabled", "")).upper() in ("ON", "TRUE", "YES", "Y", "1")
+
+
+def build_sce_metadata(env_yaml, product, compiled_product_yaml, product_dir, templates_dir):
+    """
+    Build SCE checks of the product and their metadata, as build_sce.py does
+    in the CMake build. If SCE content is disabled, only an empty metadata
+    file is written, so no SCE content is generated from it.
+
+    Returns the path of the metadata file.
+    """
+    sce_dir = os.path.join(product_dir, "checks", "sce")
+    ssg.utils.mkdir_p(sce_dir)
+    sce_metadata = os.path.join(sce_dir, "metadata.json")
+    if not _is_sce_enabled(env_yaml):
+        open(sce_metadata, "w").close()
+        return sce_metadata
+    empty = "/sce/empty/placeholder"
+    template_builder = ssg.templates.Builder(
+        env_yaml, empty, templates_dir, empty, empty, empty, None)
+    sce_dirs = [
+        os.path.join(PROJECT_ROOT, "shared", "checks", "sce"),
+        os.path.join(PROJECT_ROOT, "products", product, "checks", "sce")]
+    ssg.build_sce.checks(
+        env_yaml, compiled_product_yaml, sce_dirs, template_builder, sce_dir)
+    return sce_metadata
+
+
+def collect_shared_sources(build_config_yaml, products, templates_dir):
+    """
+    Return paths of all Jinja sources that the products use,
+    i.e. rules and values from all their content directories
+    and implementations of templates.
+    """
+    content_dirs = set()
+    loader = None
+    for product in products:
+        product_yaml_path = get_product_yaml_path(product)
+        env_yaml = ssg.environment.open_environment(build_config_yaml, product_yaml_path)
+        product_yaml = ssg.products.Product(product_yaml_path)
+        content_dirs.update(compile_all.get_all_content_directories(env_yaml, product_yaml))
+        if loader is None:
+            loader = ssg.build_yaml.BuildLoader(None, env_yaml, ProductCPEs())
+
+    value_files, rule_files = loader.collect_entity_files(sorted(content_dirs))
+    template_files = glob.glob(os.path.join(templates_dir, "*", "*.template"))
+    return value_files + rule_files + sorted(template_files)
+
+
+def build_product(build_config_yaml, controls_dir, templates_dir, product):
+    build_root = os.path.dirname(os.path.abspath(build_config_yaml))
+    product_dir = os.path.join(build_root, product)
+    ssg.utils.mkdir_p(os.path.join(product_dir, "profiles"))
+
+    compiled_product_yaml = os.path.join(product_dir, "product.yml")
+    ssg.products.Product(get_product_yaml_path(product)).write(compiled_product_yaml)
+
+    env_yaml = ssg.environment.open_environment(build_config_yaml, compiled_product_yaml)
+    sce_metadata = build_sce_metadata(
+        env_yaml, product, compiled_product_yaml, product_dir, templates_dir)
+    compile_all.compile_all(
+        build_config_yaml, compiled_product_yaml, product_dir, controls_dir,
+        sce_metadata, get_stig_references(product))
+
+    builder = ssg.templates.Builder(
+        env_yaml, os.path.join(product_dir, "rules"), templates_dir,
+        os.path.join(product_dir, "fixes_from_templates"),
+        os.path.join(product_dir, "checks_from_templates"),
+        os.path.join(product_dir, "platforms"), os.path.join(product_dir, "cpe_items"))
+    builder.build()
+    return product
+
+
+def _build_product_in_worker(task):
+    try:
+        return build_product(*task), None
+    except Exception as exc:
+        return task[-1], "{0}: {1}".format(type(exc).__name__, exc)
+
+
+def main():
+    args = parse_args()
+
+    # Everything loaded before the workers fork is shared by all products.
+    ssg.jinja.precompile_macros()
+    ssg.jinja.precompile_templates(
+        collect_shared_sources(args.build_config_yaml, args.products, args.templates_dir))
+
+    tasks = [
+        (args.build_config_yaml, args.controls_dir, args.templates_dir, product)
+        for product in args.products]
+    # Every product gets a fresh worker, so state of a product build,
+    # e.g. the logging configuration of compile_all, doesn't leak into the next one.
+    pool = multiprocessing.Pool(min(args.jobs, len(tasks)), maxtasksperchild=1)
+    failed = False
+    try:
+        for product, error in pool.imap_unordered(_build_product_in_worker, tasks):
+            if error:
+                failed = True
+                print("Failed to build {0}: {1}".format(product, error), file=sys.stderr)
+            else:
+                print("Built {0}".format(product))
+    finally:
+        pool.terminate()
+        pool.join()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,9 @@ import sys
 
 import ssg.build_guides
 import ssg.build_profile_remediations
+import ssg.constants
 import ssg.utils
+import ssg.xccdf
 import ssg.xml
 
 
@@ -48,8 +50,18 @@ def parse_args():
                    help="input file, can be XCCDF or Source DataStream")
     p.add_argument("-o", "--output", action="store", required=True,
                    help="output directory")
+    p.add_argument("--in-process", action="store_true",
+                   help="experimental: generate remediations of all profiles "
+                   "from the parsed input instead of running 'oscap xccdf generate fix' "
+                   "for each of them, the output hasn't been verified against oscap yet; "
+                   "supported templates: %s"
+                   % ", ".join(ssg.build_profile_remediations.IN_PROCESS_TEMPLATES))
 
-    return p.parse_args()
+    args = p.parse_args()
+    if args.in_process and \
+       args.template not in ssg.build_profile_remediations.IN_PROCESS_TEMPLATES:
+        p.error("Template '%s' can't be generated in-process." % args.template)
+    return args
 
 
 def main():
@@ -96,6 +108,17 @@ def main():
         extension, output_dir, template
     )
 
+    if args.in_process:
+        benchmark_elements = []
+        ssg.xccdf.scrape_benchmarks(
+            input_tree.getroot(), ssg.constants.XCCDF12_NS, benchmark_elements)
+        benchmark_remediations = dict(
+            (benchmark.get("id"),
+             ssg.build_profile_remediations.BenchmarkRemediations(benchmark))
+            for _, benchmark in benchmark_elements)
+        ssg.build_profile_remediations.build_in_process(queue, benchmark_remediations)
+        return
+
     workers = []
     for worker_id in range(args.jobs):
         worker = threading.Thread(
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 
 import argparse
+import ssg.build_remediations
 import ssg.playbook_builder
 import os
 
@@ -63,6 +64,13 @@ def parse_args():
              "a shortened Rule ID, eg. 'package_sendmail_removed'. "
              "If not specified, Playbooks are built for every rule."
     )
+    p.add_argument(
+        "--parsed-ansible-remediations",
+        help="JSON file with task lists of the Ansible remediations "
+        "written by collect_remediations.py. If given, snippets that haven't "
+        "changed since are not parsed again. "
+        "e.g.: ~/scap-security-guide/build/fedora/ansible_remediations.json"
+    )
     return p.parse_args()
 
 
@@ -93,9 +101,13 @@ def main():
         resolved_profiles_dir = os.path.join(
             args.ssg_root, "build", args.product, "profiles"
         )
+    parsed_ansible_remediations = None
+    if args.parsed_ansible_remediations:
+        parsed_ansible_remediations = ssg.build_remediations.ParsedAnsibleRemediations.load(
+            args.parsed_ansible_remediations)
     playbook_builder = ssg.playbook_builder.PlaybookBuilder(
         product_yaml, input_dir, output_dir, resolved_rules_dir, resolved_profiles_dir,
-        args.build_config_yaml
+        args.build_config_yaml, parsed_ansible_remediations
     )
     playbook_builder.build(args.profile, args.rule)
 
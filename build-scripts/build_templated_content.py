@@ -5,6 +5,7 @@ from __future__ import print_function
 import os
 import argparse
 
+import ssg.dependencies
 import ssg.environment
 import ssg.templates
 
@@ -51,6 +52,22 @@ def parse_args():
         help="Path to which remediations will be generated. "
         "e.g.: ~/scap-security-guide/build/rhel7/fixes_from_templates"
     )
+    p.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="How many worker processes should build templated content of rules in parallel."
+    )
+    p.add_argument(
+        "--dependencies-file",
+        help="JSON file with dependencies of the templated content of rules. "
+        "If given, only content of rules whose sources, macros or substitutions changed "
+        "since the previous build is rebuilt, content of rules that don't exist anymore "
+        "is removed, and the file is updated. "
+        "e.g.: ~/scap-security-guide/build/rhel7/templated_content_dependencies.json"
+    )
+    p.add_argument(
+        "--show-timings", action="store_true",
+        help="Print how long did preprocessing and rendering of each template take."
+    )
     args = p.parse_args()
     return args
 
@@ -60,7 +77,14 @@ if __name__ == "__main__":
 
     env_yaml = ssg.environment.open_environment(
         args.build_config_yaml, args.product_yaml)
+    dependency_manifest = None
+    if args.dependencies_file:
+        dependency_manifest = ssg.dependencies.DependencyManifest(args.dependencies_file)
     builder = ssg.templates.Builder(
         env_yaml, args.resolved_rules_dir, args.templates_dir,
-        args.remediations_dir, args.checks_dir, args.platforms_dir, args.cpe_items_dir)
-    builder.build()
+        args.remediations_dir, args.checks_dir, args.platforms_dir, args.cpe_items_dir,
+        dependency_manifest)
+    builder.build(args.jobs)
+    if args.show_timings:
+        for line in builder.get_timing_report():
+            print(line)
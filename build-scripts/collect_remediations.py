@@ -4,6 +4,8 @@ import sys
 import os
 import os.path
 import argparse
+import multiprocessing
+import timeit
 
 import ssg.build_remediations as remediation
 import ssg.build_yaml
@@ -53,6 +55,19 @@ def parse_args():
     p.add_argument(
         "--cpe-items-dir", required=True,
         help="directory from which we collect compiled CPE items")
+    p.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of worker processes that collect remediations of rules "
+        "in parallel.")
+    p.add_argument(
+        "--show-timings", action="store_true",
+        help="Print how many remediations of each language were collected "
+        "and how long did it take.")
+    p.add_argument(
+        "--parsed-ansible-remediations",
+        help="JSON file where task lists of the collected Ansible remediations "
+        "will be stored, so build_rule_playbooks.py doesn't have to parse "
+        "them again. e.g.: ~/scap-security-guide/build/rhel7/ansible_remediations.json")
 
     return p.parse_args()
 
@@ -88,7 +103,8 @@ def find_remediation(
 
 
 def process_remediation(
-        rule, fix_path, lang, output_dirs, expected_file_name, env_yaml, cpe_platforms):
+        rule, fix_path, lang, output_dirs, expected_file_name, env_yaml, cpe_platforms,
+        parsed_ansible_remediations=None):
     remediation_cls = remediation.REMEDIATION_TO_CLASS[lang]
     remediation_obj = remediation_cls(fix_path)
     remediation_obj.associate_rule(rule)
@@ -96,29 +112,147 @@ def process_remediation(
     if fix:
         output_file_path = os.path.join(output_dirs[lang], expected_file_name)
         remediation.write_fix_to_file(fix, output_file_path)
+        if lang == "ansible" and parsed_ansible_remediations is not None:
+            parsed_ansible_remediations.add(
+                rule.id_, output_file_path, fix.config, remediation_obj.body)
 
 
 def collect_remediations(
         rule, langs, fixes_from_templates_dir, product, output_dirs,
-        env_yaml, cpe_platforms):
+        env_yaml, cpe_platforms, parsed_ansible_remediations=None):
+    """
+    Find and process remediations of the rule in all given languages.
+    Task lists of Ansible remediations are added to parsed_ansible_remediations,
+    if given.
+    Returns a dict that maps languages to tuples (count, time) of the number
+    of remediations found and the time spent on finding and processing them.
+    """
+    timings = dict()
     rule_dir = os.path.dirname(rule.definition_location)
     for lang in langs:
-        ext = remediation.REMEDIATION_TO_EXT_MAP[lang]
-        expected_file_name = rule.id_ + ext
-        fix_path = find_remediation(
-            fixes_from_templates_dir, rule_dir, lang, product,
-            expected_file_name)
-        if fix_path is None:
-            # neither static nor templated remediation found
-            continue
+        start = timeit.default_timer()
+        found = _collect_remediation(
+            rule, rule_dir, lang, fixes_from_templates_dir, product, output_dirs,
+            env_yaml, cpe_platforms, parsed_ansible_remediations)
+        timings[lang] = (int(found), timeit.default_timer() - start)
+    return timings
+
+
+def _collect_remediation(
+        rule, rule_dir, lang, fixes_from_templates_dir, product, output_dirs,
+        env_yaml, cpe_platforms, parsed_ansible_remediations):
+    """
+    Process the remediation of the rule in the language, if it has any,
+    and return whether it has been found.
+    """
+    ext = remediation.REMEDIATION_TO_EXT_MAP[lang]
+    expected_file_name = rule.id_ + ext
+    fix_path = find_remediation(
+        fixes_from_templates_dir, rule_dir, lang, product,
+        expected_file_name)
+    if fix_path is None:
+        # neither static nor templated remediation found
+        return False
+    try:
+        process_remediation(
+            rule, fix_path, lang, output_dirs, expected_file_name, env_yaml, cpe_platforms,
+            parsed_ansible_remediations)
+    except Exception as exc:
+        msg = (
+            "Failed to dispatch {lang} remediation for {rule_id}: {error}"
+            .format(lang=lang, rule_id=rule.id_, error=str(exc)))
+        raise RuntimeError(msg)
+    return True
+
+
+def collect_rule_file_remediations(rule_path, args, env_yaml, output_dirs, cpe_platforms):
+    """
+    Load the resolved rule and collect its remediations.
+    Returns a tuple (timings, parsed_ansible_remediations), see collect_remediations.
+    The latter is None unless args ask for parsed Ansible remediations.
+    """
+    product = ssg.utils.required_key(env_yaml, "product")
+    parsed_ansible_remediations = None
+    if args.parsed_ansible_remediations:
+        parsed_ansible_remediations = remediation.ParsedAnsibleRemediations()
+    try:
+        rule = ssg.build_yaml.Rule.from_yaml(rule_path, env_yaml)
+    except ssg.build_yaml.DocumentationNotComplete:
+        # Happens on non-debug build when a rule is
+        # "documentation-incomplete"
+        return dict(), parsed_ansible_remediations
+    timings = collect_remediations(
+        rule, args.remediation_type, args.fixes_from_templates_dir,
+        product, output_dirs, env_yaml, cpe_platforms, parsed_ansible_remediations)
+    return timings, parsed_ansible_remediations
+
+
+def _init_collecting_worker(args, env_yaml, output_dirs, cpe_platforms):
+    # Compile the macros once per worker, not for its first rule of each language.
+    ssg.jinja.load_macros(env_yaml.copy())
+    _collect_in_worker.context = (args, env_yaml, output_dirs, cpe_platforms)
+
+
+def _collect_in_worker(rule_path):
+    return collect_rule_file_remediations(rule_path, *_collect_in_worker.context)
+
+
+_collect_in_worker.context = None
+
+
+def collect_all_remediations(rule_paths, args, env_yaml, output_dirs, cpe_platforms):
+    """
+    Collect remediations of all the resolved rules.
+    If args.jobs is greater than one, rules are processed by a pool of worker
+    processes. Every remediation is written to its own file, so the output
+    doesn't depend on the order in which the workers finish.
+
+    Returns a tuple (total_timings, parsed_ansible_remediations) of a dict
+    that maps languages to lists [count, time] summed over all rules,
+    and of parsed Ansible remediations of all rules, if args ask for them.
+    """
+    if args.jobs > 1 and len(rule_paths) > 1:
+        pool = multiprocessing.Pool(
+            args.jobs, _init_collecting_worker,
+            (args, env_yaml, output_dirs, cpe_platforms))
         try:
-            process_remediation(
-                rule, fix_path, lang, output_dirs, expected_file_name, env_yaml, cpe_platforms)
-        except Exception as exc:
-            msg = (
-                "Failed to dispatch {lang} remediation for {rule_id}: {error}"
-                .format(lang=lang, rule_id=rule.id_, error=str(exc)))
-            raise RuntimeError(msg)
+            all_results = list(pool.imap_unordered(
+                _collect_in_worker, rule_paths, chunksize=16))
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        all_results = [
+            collect_rule_file_remediations(
+                rule_path, args, env_yaml, output_dirs, cpe_platforms)
+            for rule_path in rule_paths]
+
+    total_timings = dict((lang, [0, 0.0]) for lang in args.remediation_type)
+    parsed_ansible_remediations = None
+    if args.parsed_ansible_remediations:
+        parsed_ansible_remediations = remediation.ParsedAnsibleRemediations()
+    for timings, rule_parsed_ansible_remediations in all_results:
+        for lang, (count, time) in timings.items():
+            total_timings[lang][0] += count
+            total_timings[lang][1] += time
+        if rule_parsed_ansible_remediations is not None:
+            parsed_ansible_remediations.remediations.update(
+                rule_parsed_ansible_remediations.remediations)
+    return total_timings, parsed_ansible_remediations
+
+
+def get_timing_report(total_timings):
+    """
+    Return lines describing how many remediations of each language were
+    collected, and how long did it take in total over all processes.
+    Languages that took most of the time are listed first.
+    """
+    lines = []
+    for lang in sorted(total_timings, key=lambda lang: (-total_timings[lang][1], lang)):
+        count, time = total_timings[lang]
+        lines.append("{lang}: collected {count}x in {time:.3f}s".format(
+            lang=lang, count=count, time=time))
+    return lines
 
 
 def main():
@@ -127,7 +261,6 @@ def main():
     env_yaml = ssg.environment.open_environment(
         args.build_config_yaml, args.product_yaml)
 
-    product = ssg.utils.required_key(env_yaml, "product")
     output_dirs = prepare_output_dirs(args.output_dir, args.remediation_type)
     product_cpes = ProductCPEs()
     product_cpes.load_cpes_from_directory_tree(args.cpe_items_dir, env_yaml)
@@ -142,17 +275,16 @@ def main():
             continue
         cpe_platforms[platform.name] = platform
 
-    for rule_file in os.listdir(args.resolved_rules_dir):
-        rule_path = os.path.join(args.resolved_rules_dir, rule_file)
-        try:
-            rule = ssg.build_yaml.Rule.from_yaml(rule_path, env_yaml)
-        except ssg.build_yaml.DocumentationNotComplete:
-            # Happens on non-debug build when a rule is
-            # "documentation-incomplete"
-            continue
-        collect_remediations(
-            rule, args.remediation_type, args.fixes_from_templates_dir,
-            product, output_dirs, env_yaml, cpe_platforms)
+    rule_paths = [
+        os.path.join(args.resolved_rules_dir, rule_file)
+        for rule_file in sorted(os.listdir(args.resolved_rules_dir))]
+    total_timings, parsed_ansible_remediations = collect_all_remediations(
+        rule_paths, args, env_yaml, output_dirs, cpe_platforms)
+    if parsed_ansible_remediations is not None:
+        parsed_ansible_remediations.save(args.parsed_ansible_remediations)
+    if args.show_timings:
+        for line in get_timing_report(total_timings):
+            print(line)
     sys.exit(0)
 
 
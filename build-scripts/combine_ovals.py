@@ -1,10 +1,13 @@
 #!/usr/bin/python3
 
+from __future__ import print_function
+
 import argparse
 import sys
 
 import ssg.build_ovals
 import ssg.constants
+import ssg.rule_manifest
 import ssg.utils
 import ssg.xml
 import ssg.environment
@@ -32,6 +35,13 @@ def parse_args():
         help="Include OVAL checks from rule directories in the benchmark "
         "directory tree which is specified by product.yml "
         "in the `benchmark_root` key.")
+    p.add_argument(
+        "--rules-manifest",
+        help="Manifest of rules written by compile_all.py. Titles and prodtypes "
+        "of rules are read from it instead of loading rule.yml files again.")
+    p.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="How many worker processes should render OVAL checks in parallel.")
     p.add_argument(
         "ovaldirs", metavar="OVAL_DIR", nargs="+",
         help="Shared directory(ies) from which we will collect OVAL "
@@ -56,40 +66,43 @@ def main():
         ssg.utils.required_key(env_yaml, "target_oval_version_str"),
         ssg.utils.required_key(env_yaml, "ssg_version"))
 
+    rules_manifest = None
+    if args.rules_manifest:
+        rules_manifest = ssg.rule_manifest.RulesManifest.load(args.rules_manifest, env_yaml)
+
     oval_builder = ssg.build_ovals.OVALBuilder(
         env_yaml,
         args.product_yaml,
         args.ovaldirs,
-        args.build_ovals_dir)
-    body = oval_builder.build_shorthand(args.include_benchmark)
-
-    # parse new file(string) as an ssg.xml.ElementTree, so we can reorder elements
-    # appropriately
-    corrected_tree = ssg.xml.ElementTree.fromstring(
-        ("%s%s%s" % (header, body, footer)).encode("utf-8"))
-    tree = ssg.build_ovals.finalize_affected_platforms(corrected_tree, env_yaml)
+        args.build_ovals_dir,
+        args.jobs,
+        rules_manifest)
     definitions = ssg.xml.ElementTree.Element("{%s}definitions" % oval_ns)
     tests = ssg.xml.ElementTree.Element("{%s}tests" % oval_ns)
     objects = ssg.xml.ElementTree.Element("{%s}objects" % oval_ns)
     states = ssg.xml.ElementTree.Element("{%s}states" % oval_ns)
     variables = ssg.xml.ElementTree.Element("{%s}variables" % oval_ns)
 
-    for childnode in tree.findall("./{%s}def-group/*" % oval_ns):
-        if childnode.tag is ssg.xml.ElementTree.Comment:
-            continue
-        elif childnode.tag.endswith("definition"):
-            ssg.build_ovals.append(definitions, childnode)
-        elif childnode.tag.endswith("_test"):
-            ssg.build_ovals.append(tests, childnode)
-        elif childnode.tag.endswith("_object"):
-            ssg.build_ovals.append(objects, childnode)
-        elif childnode.tag.endswith("_state"):
-            ssg.build_ovals.append(states, childnode)
-        elif childnode.tag.endswith("_variable"):
-            ssg.build_ovals.append(variables, childnode)
-        else:
-            sys.stderr.write("Warning: Unknown element '%s'\n"
-                             % (childnode.tag))
+    # Every check has already been parsed by the builder, so route children
+    # of the parsed trees directly instead of concatenating and parsing the checks again
+    for oval_tree in oval_builder.build_oval_trees(args.include_benchmark):
+        tree = ssg.build_ovals.finalize_affected_platforms(oval_tree, env_yaml)
+        for childnode in tree.findall("./{%s}def-group/*" % oval_ns):
+            if childnode.tag is ssg.xml.ElementTree.Comment:
+                continue
+            elif childnode.tag.endswith("definition"):
+                ssg.build_ovals.append(definitions, childnode)
+            elif childnode.tag.endswith("_test"):
+                ssg.build_ovals.append(tests, childnode)
+            elif childnode.tag.endswith("_object"):
+                ssg.build_ovals.append(objects, childnode)
+            elif childnode.tag.endswith("_state"):
+                ssg.build_ovals.append(states, childnode)
+            elif childnode.tag.endswith("_variable"):
+                ssg.build_ovals.append(variables, childnode)
+            else:
+                sys.stderr.write("Warning: Unknown element '%s'\n"
+                                 % (childnode.tag))
 
     root = ssg.xml.ElementTree.fromstring(("%s%s" % (header, footer)).encode("utf-8"))
     root.append(definitions)
@@ -102,6 +115,12 @@ def main():
 
     ssg.xml.ElementTree.ElementTree(root).write(args.output)
 
+    merged_duplicates_report = ssg.build_ovals.get_merged_duplicates_report()
+    if merged_duplicates_report:
+        print("Merged duplicate OVAL entities of %s:" % env_yaml["product"])
+        for line in merged_duplicates_report:
+            print("  %s" % line)
+
     sys.exit(0)
 
 
@@ -12,6 +12,8 @@ import ssg.utils
 import ssg.controls
 import ssg.products
 import ssg.environment
+import ssg.rule_manifest
+import ssg.yaml
 from ssg.build_cpe import ProductCPEs
 
 def create_parser():
@@ -43,6 +45,10 @@ def create_parser():
     parser.add_argument(
         "--stig-references", help="DISA STIG Reference XCCDF file"
     )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="How many worker processes should load rules and values in parallel."
+    )
     return parser
 
 
@@ -110,21 +116,21 @@ def load_resolve_and_validate_profiles(env_yaml, profile_files, loader, controls
 
 def save_everything(base_dir, loader, profiles):
     loader.save_all_entities(base_dir)
+    loader.rules_manifest.save(
+        os.path.join(base_dir, ssg.rule_manifest.RULES_MANIFEST_FILENAME))
     for p in profiles:
         dump_compiled_profile(base_dir, p)
 
 
-def main():
-    parser = create_parser()
-    args = parser.parse_args()
-
-    env_yaml = get_env_yaml(args.build_config_yaml, args.product_yaml)
-    product_yaml = ssg.products.Product(args.product_yaml)
+def compile_all(build_config_yaml, product_yaml_path, resolved_base, controls_dir=None,
+                sce_metadata=None, stig_references=None, jobs=1):
+    env_yaml = get_env_yaml(build_config_yaml, product_yaml_path)
+    product_yaml = ssg.products.Product(product_yaml_path)
     product_cpes = ProductCPEs()
     product_cpes.load_product_cpes(env_yaml)
     product_cpes.load_content_cpes(env_yaml)
 
-    build_root = os.path.dirname(args.build_config_yaml)
+    build_root = os.path.dirname(build_config_yaml)
 
     logfile = "{build_root}/{product}/control_profiles.log".format(
             build_root=build_root,
@@ -132,12 +138,27 @@ def main():
     logging.basicConfig(filename=logfile, level=logging.INFO)
 
     loader = ssg.build_yaml.BuildLoader(
-        None, env_yaml, product_cpes, args.sce_metadata, args.stig_references)
+        None, env_yaml, product_cpes, sce_metadata, stig_references, jobs)
     load_benchmark_source_data_from_directory_tree(loader, env_yaml, product_yaml)
 
-    profiles_by_id = get_all_resolved_profiles_by_id(env_yaml, product_yaml, loader, product_cpes, args.controls_dir)
+    profiles_by_id = get_all_resolved_profiles_by_id(
+        env_yaml, product_yaml, loader, product_cpes, controls_dir)
+
+    save_everything(resolved_base, loader, profiles_by_id.values())
+
+    yaml_cache = ssg.yaml.get_expanded_yaml_cache(env_yaml)
+    if yaml_cache is not None:
+        logging.info(
+            "Expanded YAML cache: %d hits, %d misses", yaml_cache.hits, yaml_cache.misses)
+
+
+def main():
+    parser = create_parser()
+    args = parser.parse_args()
 
-    save_everything(args.resolved_base, loader, profiles_by_id.values())
+    compile_all(
+        args.build_config_yaml, args.product_yaml, args.resolved_base, args.controls_dir,
+        args.sce_metadata, args.stig_references, args.jobs)
 
 
 if __name__ == "__main__":
@@ -223,7 +223,12 @@ def main():
         ret.extend(benchmark.show_all_profile_stats(args))
 
     if args.format == "json":
-        print(json.dumps(ret, indent=4))
+        if args.output:
+            mkdir_p(args.output)
+            with open(os.path.join(args.output, "statistics.json"), "w") as f:
+                json.dump(ret, f, indent=4)
+        else:
+            print(json.dumps(ret, indent=4))
     if args.format == "html":
         from json2html import json2html
         filtered_output = []
@@ -1,14 +1,23 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import hashlib
+import json
 import os
 import sys
+import time
 from collections import namedtuple
 
 from .shims import subprocess_check_output, Queue
 from .xccdf import get_profile_choices_for_input, get_profile_short_id
-from .xccdf import PROFILE_ID_SKIPLIST
-from .constants import OSCAP_DS_STRING, OSCAP_PATH
+from .xccdf import PROFILE_ID_SKIPLIST, scrape_benchmarks
+from .xml import ElementTree
+from .constants import OSCAP_DS_STRING, OSCAP_PATH, XCCDF12_NS, PREFIX_TO_NS
+from .constants import ocil_namespace, oval_namespace
+
+
+# Bump when the way guide inputs are digested changes.
+GUIDE_MANIFEST_VERSION = 1
 
 
 def get_path_args(args):
@@ -52,11 +61,13 @@ def generate_for_input_content(input_content, benchmark_id, profile_id):
     return subprocess_check_output(args).decode("utf-8")
 
 
-def builder(queue):
+def builder(queue, timings=None):
     """
     Fetch from a queue of tasks, process tasks until the queue is empty.
     Each task is processed with generate_for_input_content, and the
     guide is written as output.
+    If timings dict is given, it maps guide paths to seconds it took
+    to generate them.
 
     Raises: when an error occurred when processing a task.
     """
@@ -65,6 +76,7 @@ def builder(queue):
             benchmark_id, profile_id, input_path, guide_path = \
                 queue.get(False)
 
+            start_time = time.time()
             guide_html = generate_for_input_content(
                 input_path, benchmark_id, profile_id
             )
@@ -72,6 +84,8 @@ def builder(queue):
             with open(guide_path, "wb") as guide_file:
                 guide_file.write(guide_html.encode("utf-8"))
 
+            if timings is not None:
+                timings[guide_path] = time.time() - start_time
             queue.task_done()
         except Queue.Empty:
             break
@@ -85,6 +99,154 @@ def builder(queue):
             raise error
 
 
+def _get_digest(*elements):
+    digest = hashlib.sha256()
+    for element in elements:
+        digest.update(ElementTree.tostring(element))
+    return digest.hexdigest()
+
+
+def _get_frame_digest(element, nested_tags):
+    """
+    Return a digest of the element without its children that have
+    one of the nested_tags.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(sorted(element.attrib.items())).encode("utf-8"))
+    for child in element:
+        if child.tag not in nested_tags:
+            digest.update(ElementTree.tostring(child))
+    return digest.hexdigest()
+
+
+class GuideInputs(object):
+    """
+    Digests of contents of the input file that the guide of a profile
+    is generated from.
+
+    Each Rule, Value, Group and Benchmark is digested only once,
+    the digest of a guide then combines digests of the profile, of rules
+    the profile selects, of values these rules use, of the rest of
+    the benchmark, and of the CPE dictionary, OVAL and OCIL components
+    stored next to the benchmark that the guide shows checks from.
+    """
+    def __init__(self, input_tree):
+        nested_tags = set(
+            "{%s}%s" % (XCCDF12_NS, tag)
+            for tag in ["Profile", "Group", "Rule", "Value"])
+        common_tags = set([
+            "{%s}cpe-list" % PREFIX_TO_NS["cpe-dict"],
+            "{%s}oval_definitions" % oval_namespace,
+            "{%s}ocil" % ocil_namespace])
+        input_root = input_tree.getroot()
+        self.common_digest = _get_digest(*[
+            element for element in input_root.iter()
+            if element.tag in common_tags])
+        self.benchmarks = dict()
+        benchmarks = []
+        # Collect benchmarks in the same way as get_benchmark_id_title_map does.
+        scrape_benchmarks(input_root, XCCDF12_NS, benchmarks)
+        for _, benchmark in benchmarks:
+            if benchmark.get("id") is None:
+                continue
+            self.benchmarks[benchmark.get("id")] = \
+                self._index_benchmark(benchmark, nested_tags)
+
+    def _index_benchmark(self, benchmark, nested_tags):
+        index = dict(profiles=dict(), rules=dict(), values=dict())
+        frame_digests = [_get_frame_digest(benchmark, nested_tags)]
+        for group in benchmark.iter("{%s}Group" % XCCDF12_NS):
+            frame_digests.append(_get_frame_digest(group, nested_tags))
+        index["frame"] = frame_digests
+        for profile in benchmark.iter("{%s}Profile" % XCCDF12_NS):
+            index["profiles"][profile.get("id")] = profile
+        for value in benchmark.iter("{%s}Value" % XCCDF12_NS):
+            index["values"][value.get("id")] = _get_digest(value)
+        for rule in benchmark.iter("{%s}Rule" % XCCDF12_NS):
+            value_ids = set()
+            for element in rule.iter():
+                if element.get("value-id") is not None:
+                    value_ids.add(element.get("value-id"))
+                if element.tag == "{%s}sub" % XCCDF12_NS:
+                    value_ids.add(element.get("idref"))
+            index["rules"][rule.get("id")] = dict(
+                digest=_get_digest(rule),
+                selected=rule.get("selected", "true") == "true",
+                value_ids=sorted(value_ids))
+        return index
+
+    def _get_profile_chain(self, index, profile_id):
+        profiles = []
+        while profile_id and profile_id in index["profiles"]:
+            profile = index["profiles"][profile_id]
+            profiles.append(profile)
+            profile_id = profile.get("extends")
+        return profiles
+
+    def get_digest(self, benchmark_id, profile_id):
+        """
+        Return a digest of inputs of the guide of the given profile,
+        or None if the benchmark hasn't been indexed, e.g. because it isn't
+        an XCCDF 1.2 benchmark. Such guides are always generated.
+        """
+        index = self.benchmarks.get(benchmark_id)
+        if index is None:
+            return None
+        profiles = self._get_profile_chain(index, profile_id)
+        selections = dict()
+        for profile in reversed(profiles):
+            for select in profile.findall("{%s}select" % XCCDF12_NS):
+                selections[select.get("idref")] = select.get("selected") == "true"
+
+        digest = hashlib.sha256()
+        for part in [GUIDE_MANIFEST_VERSION, OSCAP_PATH, benchmark_id, profile_id,
+                     self.common_digest, _get_digest(*profiles)] + index["frame"]:
+            digest.update(str(part).encode("utf-8"))
+        value_ids = set()
+        for rule_id in sorted(index["rules"]):
+            rule = index["rules"][rule_id]
+            if not selections.get(rule_id, rule["selected"]):
+                continue
+            digest.update(rule["digest"].encode("utf-8"))
+            value_ids.update(rule["value_ids"])
+        for value_id in sorted(value_ids):
+            digest.update(index["values"].get(value_id, "").encode("utf-8"))
+        return digest.hexdigest()
+
+
+class GuideManifest(object):
+    """
+    Digests of inputs of generated guides stored in a JSON file,
+    see GuideInputs.
+    """
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.guides = dict()
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                contents = json.load(f)
+            if contents.get("version") == GUIDE_MANIFEST_VERSION:
+                self.guides = contents["guides"]
+
+    def is_up_to_date(self, guide_path, digest):
+        if digest is None:
+            return False
+        return self.guides.get(guide_path) == digest and os.path.exists(guide_path)
+
+    def record(self, guide_path, digest):
+        if digest is None:
+            self.guides.pop(guide_path, None)
+            return
+        self.guides[guide_path] = digest
+
+    def save(self):
+        contents = dict(version=GUIDE_MANIFEST_VERSION, guides=self.guides)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(contents, f, indent=1, sort_keys=True)
+        os.rename(temp_path, self.manifest_path)
+
+
 def _benchmark_profile_pair_sort_key(benchmark_id, profile_id, profile_title):
     # The "base" benchmarks come first
     if (benchmark_id.endswith("_RHEL-7") or
@@ -161,11 +323,13 @@ def get_output_guide_paths(benchmarks, benchmark_profile_pairs, path_base,
 
 
 def fill_queue(benchmarks, benchmark_profile_pairs, input_path, path_base,
-               output_dir):
+               output_dir, is_up_to_date=None):
     """
     For each benchmark and profile in the benchmark, create a queue of
     tasks for later processing. A task is a named tuple (benchmark_id,
     profile_id, input_path, guide_path).
+    If is_up_to_date function is given, tasks for which it returns True
+    are left out of the queue, their guides are still listed in the index.
 
     Returns: queue of tasks.
     """
@@ -203,7 +367,9 @@ def fill_queue(benchmarks, benchmark_profile_pairs, input_path, path_base,
         if index_initial_src is None:
             index_initial_src = guide_filename
 
-        queue.put(task(benchmark_id, profile_id, input_path, guide_path))
+        guide_task = task(benchmark_id, profile_id, input_path, guide_path)
+        if is_up_to_date is None or not is_up_to_date(guide_task):
+            queue.put(guide_task)
 
     return index_links, index_options, index_initial_src, queue
 
@@ -5,8 +5,11 @@ import os
 import os.path
 import sys
 import re
-from copy import deepcopy
 import collections
+import hashlib
+import multiprocessing
+
+import jinja2
 
 from .build_yaml import Rule, DocumentationNotComplete
 from .constants import oval_namespace as oval_ns
@@ -14,7 +17,7 @@ from .constants import oval_footer
 from .constants import oval_header
 from .constants import MULTI_PLATFORM_LIST
 from .id_translate import IDTranslator
-from .jinja import process_file_with_macros
+from .jinja import process_file_with_macros, MacroError
 from .rule_yaml import parse_prodtype
 from .rules import get_rule_dir_id, get_rule_dir_ovals, find_rule_dirs_in_paths
 from . import utils, products
@@ -22,31 +25,47 @@ from .utils import mkdir_p
 from .xml import ElementTree, oval_generated_header
 
 
-def _create_subtree(shorthand_tree, category):
+def _create_subtree(shorthand_trees, category):
     parent_tag = "{%s}%ss" % (oval_ns, category)
     parent = ElementTree.Element(parent_tag)
-    for node in shorthand_tree.findall(".//{%s}def-group/*" % oval_ns):
-        if node.tag is ElementTree.Comment:
-            continue
-        elif node.tag.endswith(category):
-            append(parent, node)
+    for shorthand_tree in shorthand_trees:
+        for node in shorthand_tree.findall(".//{%s}def-group/*" % oval_ns):
+            if node.tag is ElementTree.Comment:
+                continue
+            elif node.tag.endswith(category):
+                append(parent, node)
     return parent
 
 
-def expand_shorthand(shorthand_path, oval_path, env_yaml):
+def load_shorthand(shorthand_path, env_yaml):
+    """
+    Expand macros in the OVAL shorthand file and return the parsed tree.
+    """
     shorthand_file_content = process_file_with_macros(shorthand_path, env_yaml)
     wrapped_shorthand = (oval_header + shorthand_file_content + oval_footer)
-    shorthand_tree = ElementTree.fromstring(wrapped_shorthand.encode("utf-8"))
+    return ElementTree.fromstring(wrapped_shorthand.encode("utf-8"))
+
+
+def create_oval_document(shorthand_trees):
+    """
+    Combine the shorthand trees, see load_shorthand, into a single
+    OVAL document with translated IDs. The trees must not use the same
+    IDs for different entities.
+    """
     header = oval_generated_header("test", "5.11", "1.0")
     skeleton = header + oval_footer
     root = ElementTree.fromstring(skeleton.encode("utf-8"))
     for category in ["definition", "test", "object", "state", "variable"]:
-        subtree = _create_subtree(shorthand_tree, category)
+        subtree = _create_subtree(shorthand_trees, category)
         if list(subtree):
             root.append(subtree)
     id_translator = IDTranslator("test")
-    root_translated = id_translator.translate(root)
+    return id_translator.translate(root)
+
 
+def expand_shorthand(shorthand_path, oval_path, env_yaml):
+    shorthand_tree = load_shorthand(shorthand_path, env_yaml)
+    root_translated = create_oval_document([shorthand_tree])
     ElementTree.ElementTree(root_translated).write(oval_path)
 
 
@@ -117,45 +136,37 @@ def finalize_affected_platforms(xml_tree, env_yaml):
     return xml_tree
 
 
+# Attributes that don't change the semantics of OVAL entities, see
+# https://github.com/ComplianceAsCode/content/pull/1343#issuecomment-234541909
+# and https://github.com/ComplianceAsCode/content/pull/1343#issuecomment-234545296
+OVAL_ENTITY_IGNORED_ATTRIBUTES = frozenset(
+    ["comment", "version", "state_operator", "deprecated"])
+
+
+def _update_canonical_digest(digest, elem):
+    attributes = sorted(
+        (key, value) for key, value in elem.items()
+        if key not in OVAL_ENTITY_IGNORED_ATTRIBUTES)
+    # The number of children makes the pre-order serialization unambiguous
+    digest.update(repr(
+        (str(elem.tag), elem.text, elem.tail, attributes, len(elem))).encode("utf-8"))
+    for child in elem:
+        _update_canonical_digest(digest, child)
+
+
+def oval_entity_canonical_hash(elem):
+    """Return a digest of the OVAL entity represented by the XML element.
+       Entities that differ only in the ignored attributes or in the namespace
+       map have the same digest."""
+    digest = hashlib.sha256()
+    _update_canonical_digest(digest, elem)
+    return digest.hexdigest()
+
+
 def oval_entities_are_identical(firstelem, secondelem):
     """Check if OVAL entities represented by XML elements are identical
-       Return: True if identical, False otherwise
-       Based on: http://stackoverflow.com/a/24349916"""
-
-    # Per https://github.com/ComplianceAsCode/content/pull/1343#issuecomment-234541909
-    # and https://github.com/ComplianceAsCode/content/pull/1343#issuecomment-234545296
-    # ignore the differences in 'comment', 'version', 'state_operator', and
-    # 'deprecated' attributes. Also ignore different nsmap, since all these
-    # don't affect the semantics of the OVAL entities
-
-    # Operate on copies of the elements (since we will modify
-    # some attributes). Deepcopy will also reset the namespace map
-    # on copied elements for us
-    firstcopy = deepcopy(firstelem)
-    secondcopy = deepcopy(secondelem)
-
-    # Ignore 'comment', 'version', 'state_operator', and 'deprecated'
-    # attributes since they don't change the semantics of an element
-    for copy in [firstcopy, secondcopy]:
-        for key in copy.keys():
-            if key in ["comment", "version", "state_operator",
-                       "deprecated"]:
-                del copy.attrib[key]
-
-    # Compare the equality of the copies
-    if firstcopy.tag != secondcopy.tag:
-        return False
-    if firstcopy.text != secondcopy.text:
-        return False
-    if firstcopy.tail != secondcopy.tail:
-        return False
-    if firstcopy.attrib != secondcopy.attrib:
-        return False
-    if len(firstcopy) != len(secondcopy):
-        return False
-
-    return all(oval_entities_are_identical(
-        fchild, schild) for fchild, schild in zip(firstcopy, secondcopy))
+       Return: True if identical, False otherwise"""
+    return oval_entity_canonical_hash(firstelem) == oval_entity_canonical_hash(secondelem)
 
 
 def oval_entity_is_extvar(elem):
@@ -166,8 +177,14 @@ def oval_entity_is_extvar(elem):
     return elem.tag == '{%s}external_variable' % oval_ns
 
 
+# Maps parent elements to dicts of their children indexed by ID,
+# values are pairs of the child and its canonical hash.
+# The hash is computed when a duplicate ID is appended for the first time.
 element_child_cache = collections.defaultdict(dict)
 
+# Counts of duplicate children that have been merged, indexed by parent element tags.
+merged_duplicates = collections.Counter()
+
 
 def append(element, newchild):
     """Append new child ONLY if it's not a duplicate"""
@@ -175,53 +192,68 @@ def append(element, newchild):
     global element_child_cache
 
     newid = newchild.get("id")
-    existing = element_child_cache[element].get(newid, None)
-
-    if existing is not None:
-        # ID is identical and OVAL entities are identical
-        if oval_entities_are_identical(existing, newchild):
-            # Moreover the entity is OVAL <external_variable>
-            if oval_entity_is_extvar(newchild):
-                # If OVAL entity is identical to some already included
-                # in the benchmark and represents an OVAL <external_variable>
-                # it's safe to ignore this ID (since external variables are
-                # in multiple checks for clarity reasons)
-                pass
-            # Some other OVAL entity
-            else:
-                # If OVAL entity is identical, but not external_variable, the
-                # implementation should be rewritten each entity to be present
-                # just once
-                sys.stderr.write("ERROR: OVAL ID '%s' is used multiple times "
-                                 "and should represent the same elements.\n"
-                                 % (newid))
-                sys.stderr.write("Rewrite the OVAL checks. Place the identical "
-                                 "IDs into their own definition and extend "
-                                 "this definition by it.\n")
-                sys.exit(1)
-        # ID is identical, but OVAL entities are semantically difference =>
-        # report and error and exit with failure
-        # Fixes: https://github.com/ComplianceAsCode/content/issues/1275
+    entry = element_child_cache[element].get(newid, None)
+
+    if entry is None:
+        element.append(newchild)
+        element_child_cache[element][newid] = [newchild, None]
+        return
+
+    existing, existing_hash = entry
+    if existing_hash is None:
+        existing_hash = oval_entity_canonical_hash(existing)
+        entry[1] = existing_hash
+
+    # ID is identical and OVAL entities are identical
+    if existing_hash == oval_entity_canonical_hash(newchild):
+        # Moreover the entity is OVAL <external_variable>
+        if oval_entity_is_extvar(newchild):
+            # If OVAL entity is identical to some already included
+            # in the benchmark and represents an OVAL <external_variable>
+            # it's safe to ignore this ID (since external variables are
+            # in multiple checks for clarity reasons)
+            merged_duplicates[element.tag] += 1
+        # Some other OVAL entity
         else:
-            if not oval_entity_is_extvar(existing) and \
-              not oval_entity_is_extvar(newchild):
-                # This is an error scenario - since by skipping second
-                # implementation and using the first one for both references,
-                # we might evaluate wrong requirement for the second entity
-                # => report an error and exit with failure in that case
-                # See
-                #   https://github.com/ComplianceAsCode/content/issues/1275
-                # for a reproducer and what could happen in this case
-                sys.stderr.write("ERROR: it's not possible to use the " +
-                                 "same ID: %s " % newid + "for two " +
-                                 "semantically different OVAL entities:\n")
-                sys.stderr.write("First entity  %s\n" % ElementTree.tostring(existing))
-                sys.stderr.write("Second entity %s\n" % ElementTree.tostring(newchild))
-                sys.stderr.write("Use different ID for the second entity!!!\n")
-                sys.exit(1)
+            # If OVAL entity is identical, but not external_variable, the
+            # implementation should be rewritten each entity to be present
+            # just once
+            sys.stderr.write("ERROR: OVAL ID '%s' is used multiple times "
+                             "and should represent the same elements.\n"
+                             % (newid))
+            sys.stderr.write("Rewrite the OVAL checks. Place the identical "
+                             "IDs into their own definition and extend "
+                             "this definition by it.\n")
+            sys.exit(1)
+    # ID is identical, but OVAL entities are semantically difference =>
+    # report and error and exit with failure
+    # Fixes: https://github.com/ComplianceAsCode/content/issues/1275
     else:
-        element.append(newchild)
-        element_child_cache[element][newid] = newchild
+        if not oval_entity_is_extvar(existing) and \
+          not oval_entity_is_extvar(newchild):
+            # This is an error scenario - since by skipping second
+            # implementation and using the first one for both references,
+            # we might evaluate wrong requirement for the second entity
+            # => report an error and exit with failure in that case
+            # See
+            #   https://github.com/ComplianceAsCode/content/issues/1275
+            # for a reproducer and what could happen in this case
+            sys.stderr.write("ERROR: it's not possible to use the " +
+                             "same ID: %s " % newid + "for two " +
+                             "semantically different OVAL entities:\n")
+            sys.stderr.write("First entity  %s\n" % ElementTree.tostring(existing))
+            sys.stderr.write("Second entity %s\n" % ElementTree.tostring(newchild))
+            sys.stderr.write("Use different ID for the second entity!!!\n")
+            sys.exit(1)
+        merged_duplicates[element.tag] += 1
+
+
+def get_merged_duplicates_report():
+    """Return lines describing how many duplicate children
+       of each parent element have been merged by append"""
+    return [
+        "%s: %d" % (re.sub(r"^{.*}", "", tag), count)
+        for tag, count in sorted(merged_duplicates.items())]
 
 
 def check_oval_version(oval_version):
@@ -252,11 +284,17 @@ def _check_is_loaded(loaded_dict, filename, version):
     return False
 
 
-def _create_oval_tree_from_string(xml_content):
+def _create_oval_tree_from_string(xml_content, report_errors=True):
+    """
+    Parse the OVAL check. If report_errors is False, a parse error
+    is raised instead of being reported on stderr and exiting.
+    """
     try:
         argument = oval_header + xml_content + oval_footer
         oval_file_tree = ElementTree.fromstring(argument)
     except ElementTree.ParseError as error:
+        if not report_errors:
+            raise
         line, column = error.position
         lines = argument.splitlines()
         before = '\n'.join(lines[:line])
@@ -290,15 +328,51 @@ def _check_rule_id(oval_file_tree, rule_id):
     return False
 
 
+def _get_check(xml_content, oval_file_tree, keep_xml_content):
+    if keep_xml_content:
+        return xml_content
+    return oval_file_tree
+
+
 def _list_full_paths(directory):
     full_paths = [os.path.join(directory, x) for x in os.listdir(directory)]
     return sorted(full_paths)
 
 
+def _init_oval_rendering_worker(oval_builder):
+    _render_directory_in_worker.oval_builder = oval_builder
+
+
+def _render_directory_in_worker(task):
+    """
+    Render and validate OVAL checks of a directory in a worker process
+    of the OVALBuilder. If the directory itself makes the build exit,
+    which would kill the worker, the exit code is sent back to the main
+    process instead. Invalid checks are reported by _render_directory.
+
+    Returns a tuple (rendered_checks, exit_code).
+    """
+    directory, from_benchmark, keep_xml_content = task
+    try:
+        oval_builder = _render_directory_in_worker.oval_builder
+        return oval_builder._render_directory(
+            directory, from_benchmark, keep_xml_content), None
+    except SystemExit as exc:
+        return None, exc.code
+
+
+_render_directory_in_worker.oval_builder = None
+
+# Errors of a check that failed to render or parse in a worker process.
+# The check is processed again by the main process, which reports them.
+RENDERING_ERRORS = (
+    jinja2.TemplateError, MacroError, ElementTree.ParseError, EnvironmentError)
+
+
 class OVALBuilder:
     def __init__(
             self, env_yaml, product_yaml_path, shared_directories,
-            build_ovals_dir):
+            build_ovals_dir, jobs=1, rules_manifest=None):
         self.env_yaml = env_yaml
         self.product_yaml = products.Product(product_yaml_path)
         self.shared_directories = shared_directories
@@ -307,18 +381,39 @@ class OVALBuilder:
         self.oval_version = utils.required_key(
             env_yaml, "target_oval_version_str")
         self.product = utils.required_key(env_yaml, "product")
+        self.jobs = jobs
+        self.rules_manifest = rules_manifest
 
     def build_shorthand(self, include_benchmark):
+        document_body = "".join(
+            self._get_all_checks(include_benchmark, keep_xml_content=True))
+        return document_body
+
+    def build_oval_trees(self, include_benchmark):
+        """
+        Return the list of OVAL checks parsed into trees of
+        <oval_definitions> documents, in the same order as build_shorthand
+        would concatenate them. The trees are the ones parsed when
+        the checks were validated, so no check is parsed twice.
+        """
+        return self._get_all_checks(include_benchmark, keep_xml_content=False)
+
+    def _get_all_checks(self, include_benchmark, keep_xml_content):
+        """
+        Return the list of rendered XML strings of the OVAL checks if
+        keep_xml_content is True, otherwise the list of their parsed trees.
+        Only one of the two is kept for each check, so all checks don't
+        stay in memory in both forms.
+        """
         if self.build_ovals_dir:
             mkdir_p(self.build_ovals_dir)
         all_checks = []
         if include_benchmark:
-            all_checks += self._get_checks_from_benchmark()
-        all_checks += self._get_checks_from_shared_directories()
-        document_body = "".join(all_checks)
-        return document_body
+            all_checks += self._get_checks_from_benchmark(keep_xml_content)
+        all_checks += self._get_checks_from_shared_directories(keep_xml_content)
+        return all_checks
 
-    def _get_checks_from_benchmark(self):
+    def _get_checks_from_benchmark(self, keep_xml_content):
         product_dir = self.product_yaml["product_dir"]
         relative_guide_dir = utils.required_key(self.env_yaml, "benchmark_root")
         guide_dir = os.path.abspath(
@@ -330,23 +425,113 @@ class OVALBuilder:
             abspath = os.path.abspath(os.path.join(product_dir, rd))
             dirs_to_scan.append(abspath)
         rule_dirs = list(find_rule_dirs_in_paths(dirs_to_scan))
-        oval_checks = self._process_directories(rule_dirs, True)
+        oval_checks = self._process_directories(rule_dirs, True, keep_xml_content)
         return oval_checks
 
-    def _get_checks_from_shared_directories(self):
+    def _get_checks_from_shared_directories(self, keep_xml_content):
         # earlier directory has higher priority
         reversed_dirs = self.shared_directories[::-1]
-        oval_checks = self._process_directories(reversed_dirs, False)
+        oval_checks = self._process_directories(reversed_dirs, False, keep_xml_content)
         return oval_checks
 
-    def _process_directories(self, directories, from_benchmark):
+    def _process_directories(self, directories, from_benchmark, keep_xml_content):
+        directories = [d for d in directories if os.path.exists(d)]
+        if self.jobs > 1 and len(directories) > 1:
+            return self._process_directories_in_parallel(
+                directories, from_benchmark, keep_xml_content)
         oval_checks = []
         for directory in directories:
-            if not os.path.exists(directory):
-                continue
-            oval_checks += self._process_directory(directory, from_benchmark)
+            oval_checks += self._process_directory(
+                directory, from_benchmark, keep_xml_content)
         return oval_checks
 
+    def _process_directories_in_parallel(self, directories, from_benchmark, keep_xml_content):
+        """
+        Render and validate checks of the directories in a pool of worker
+        processes. The workers can't see checks loaded from other directories
+        of the pool, so their results are accepted in the order of the directories,
+        which keeps the priorities of the sequential processing.
+        Checks that failed to render in a worker are rendered again
+        by the main process only if they are accepted, so errors of checks
+        shadowed by earlier directories are ignored as in the sequential processing.
+        """
+        oval_checks = []
+        tasks = [(directory, from_benchmark, keep_xml_content) for directory in directories]
+        pool = multiprocessing.Pool(self.jobs, _init_oval_rendering_worker, (self,))
+        try:
+            results = pool.imap(_render_directory_in_worker, tasks, chunksize=8)
+            for directory, (rendered_checks, exit_code) in zip(directories, results):
+                if exit_code is not None:
+                    sys.exit(exit_code)
+                for file_path, oval_key, xml_content, oval_file_tree in rendered_checks:
+                    if _check_is_loaded(self.already_loaded, oval_key, self.oval_version):
+                        continue
+                    if oval_file_tree is None:
+                        # Exits or raises the error of the check.
+                        context = self._get_context(directory, from_benchmark)
+                        oval_check = self._process_oval_file(
+                            file_path, from_benchmark, context, keep_xml_content)
+                        if oval_check is not None:
+                            oval_checks.append(oval_check)
+                        continue
+                    if from_benchmark:
+                        self._benchmark_specific_actions(
+                            file_path, xml_content, oval_file_tree)
+                    self.already_loaded[oval_key] = self.oval_version
+                    oval_checks.append(
+                        _get_check(xml_content, oval_file_tree, keep_xml_content))
+        finally:
+            pool.terminate()
+            pool.join()
+        return oval_checks
+
+    def _render_directory(self, directory, from_benchmark, keep_xml_content):
+        """
+        Return a list of tuples (file_path, oval_key, xml_content, oval_file_tree)
+        of checks in the directory that apply to the product,
+        with at most one check per key.
+        Checks that can't be rendered or parsed are returned with
+        xml_content and oval_file_tree set to None, and nothing is reported.
+        The caller has to process them again if it accepts them.
+        """
+        try:
+            context = self._get_context(directory, from_benchmark)
+        except DocumentationNotComplete:
+            return []
+        rendered_checks = []
+        rendered_keys = set()
+        for file_path in self._get_list_of_oval_files(directory, from_benchmark):
+            if not file_path.endswith(".xml"):
+                continue
+            oval_key = self._create_key(file_path, from_benchmark)
+            if oval_key in rendered_keys or _check_is_loaded(
+                    self.already_loaded, oval_key, self.oval_version):
+                continue
+            try:
+                xml_content, oval_file_tree = self._render_oval_file_quietly(
+                    file_path, context, from_benchmark)
+            except RENDERING_ERRORS:
+                rendered_checks.append((file_path, oval_key, None, None))
+                continue
+            if oval_file_tree is None:
+                continue
+            rendered_keys.add(oval_key)
+            if not (from_benchmark or keep_xml_content):
+                # Don't send the string back to the main process,
+                # it only needs the tree.
+                xml_content = None
+            rendered_checks.append((file_path, oval_key, xml_content, oval_file_tree))
+        return rendered_checks
+
+    def _render_oval_file_quietly(self, file_path, context, from_benchmark):
+        """
+        Return a tuple (xml_content, oval_file_tree) of the OVAL file,
+        see _parse_applicable_oval. Errors are raised without being reported,
+        see RENDERING_ERRORS.
+        """
+        xml_content = self._read_oval_file(file_path, context, from_benchmark)
+        return xml_content, self._parse_applicable_oval(xml_content, report_errors=False)
+
     def _get_list_of_oval_files(self, directory, from_benchmark):
         if from_benchmark:
             oval_files = get_rule_dir_ovals(directory, self.product)
@@ -354,24 +539,24 @@ class OVALBuilder:
             oval_files = _list_full_paths(directory)
         return oval_files
 
-    def _process_directory(self, directory, from_benchmark):
+    def _process_directory(self, directory, from_benchmark, keep_xml_content):
         try:
             context = self._get_context(directory, from_benchmark)
         except DocumentationNotComplete:
             return []
         oval_files = self._get_list_of_oval_files(directory, from_benchmark)
         oval_checks = self._get_directory_oval_checks(
-            context, oval_files, from_benchmark)
+            context, oval_files, from_benchmark, keep_xml_content)
         return oval_checks
 
-    def _get_directory_oval_checks(self, context, oval_files, from_benchmark):
+    def _get_directory_oval_checks(self, context, oval_files, from_benchmark, keep_xml_content):
         oval_checks = []
         for file_path in oval_files:
-            xml_content = self._process_oval_file(
-                file_path, from_benchmark, context)
-            if xml_content is None:
+            oval_check = self._process_oval_file(
+                file_path, from_benchmark, context, keep_xml_content)
+            if oval_check is None:
                 continue
-            oval_checks.append(xml_content)
+            oval_checks.append(oval_check)
         return oval_checks
 
     def _read_oval_file(self, file_path, context, from_benchmark):
@@ -391,30 +576,39 @@ class OVALBuilder:
             oval_key = os.path.basename(file_path)
         return oval_key
 
-    def _process_oval_file(self, file_path, from_benchmark, context):
+    def _process_oval_file(self, file_path, from_benchmark, context, keep_xml_content):
+        """
+        Return the check of the OVAL file, see _get_all_checks,
+        or None if the file shouldn't be included.
+        """
         if not file_path.endswith(".xml"):
             return None
         oval_key = self._create_key(file_path, from_benchmark)
         if _check_is_loaded(self.already_loaded, oval_key, self.oval_version):
             return None
         xml_content = self._read_oval_file(file_path, context, from_benchmark)
-        if not self._manage_oval_file_xml_content(
-                file_path, xml_content, from_benchmark):
+        oval_file_tree = self._manage_oval_file_xml_content(
+            file_path, xml_content, from_benchmark)
+        if oval_file_tree is None:
             return None
         self.already_loaded[oval_key] = self.oval_version
-        return xml_content
+        return _get_check(xml_content, oval_file_tree, keep_xml_content)
 
     def _manage_oval_file_xml_content(
             self, file_path, xml_content, from_benchmark):
-        if not _check_is_applicable_for_product(xml_content, self.product):
-            return False
-        oval_file_tree = _create_oval_tree_from_string(xml_content)
-        if not _check_oval_version_from_oval(oval_file_tree, self.oval_version):
-            return False
-        if from_benchmark:
+        oval_file_tree = self._parse_applicable_oval(xml_content)
+        if oval_file_tree is not None and from_benchmark:
             self._benchmark_specific_actions(
                 file_path, xml_content, oval_file_tree)
-        return True
+        return oval_file_tree
+
+    def _parse_applicable_oval(self, xml_content, report_errors=True):
+        if not _check_is_applicable_for_product(xml_content, self.product):
+            return None
+        oval_file_tree = _create_oval_tree_from_string(xml_content, report_errors)
+        if not _check_oval_version_from_oval(oval_file_tree, self.oval_version):
+            return None
+        return oval_file_tree
 
     def _benchmark_specific_actions(
             self, file_path, xml_content, oval_file_tree):
@@ -430,12 +624,20 @@ class OVALBuilder:
     def _get_context(self, directory, from_benchmark):
         if from_benchmark:
             rule_path = os.path.join(directory, "rule.yml")
-            rule = Rule.from_yaml(rule_path, self.env_yaml)
+            rule = self._load_rule(rule_path)
             context = self._create_local_env_yaml_for_rule(rule)
         else:
             context = self.env_yaml
         return context
 
+    def _load_rule(self, rule_path):
+        rule = None
+        if self.rules_manifest is not None:
+            rule = self.rules_manifest.get_rule(rule_path)
+        if rule is None:
+            rule = Rule.from_yaml(rule_path, self.env_yaml)
+        return rule
+
     def _create_local_env_yaml_for_rule(self, rule):
         local_env_yaml = dict()
         local_env_yaml.update(self.env_yaml)
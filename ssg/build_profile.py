@@ -23,6 +23,14 @@ from .constants import OSCAP_PROFILE
 from .yaml import DocumentationNotComplete
 console_width = 80
 
+# Features of rules that profile statistics are composed of
+RULE_FEATURES = [
+    'oval', 'sce', 'check',
+    'bash_fix', 'ansible_fix', 'ignition_fix', 'kubernetes_fix', 'puppet_fix', 'anaconda_fix',
+    'fix', 'cce',
+    'stig_id', 'cis_ref', 'hipaa_ref', 'anssi_ref', 'ospp_ref', 'cui_ref',
+]
+
 
 def make_name_to_profile_mapping(profile_files, env_yaml, product_cpes):
     name_to_profile = {}
@@ -40,57 +48,6 @@ def make_name_to_profile_mapping(profile_files, env_yaml, product_cpes):
     return name_to_profile
 
 
-class RuleStats(object):
-    """
-    Class representing the content of a rule for statistics generation
-    purposes.
-    """
-    def __init__(self, rid=None, roval=None, rsce=None,
-                 rbash_fix=None, ransible_fix=None,
-                 rignition_fix=None, rkubernetes_fix=None,
-                 rpuppet_fix=None, ranaconda_fix=None, rcce=None,
-                 stig_id=None, cis_ref=None, hipaa_ref=None,
-                 anssi_ref=None, ospp_ref=None, cui_ref=None):
-        self.dict = {
-            'id': rid,
-            'oval': roval,
-            'sce': rsce,
-            'check': None,
-            'bash_fix': rbash_fix,
-            'ansible_fix': ransible_fix,
-            'ignition_fix': rignition_fix,
-            'kubernetes_fix': rkubernetes_fix,
-            'puppet_fix': rpuppet_fix,
-            'anaconda_fix': ranaconda_fix,
-            'fix': None,
-            'cce': rcce,
-            'stig_id': stig_id,
-            'cis_ref': cis_ref,
-            'hipaa_ref': hipaa_ref,
-            'anssi_ref': anssi_ref,
-            'ospp_ref': ospp_ref,
-            'cui_ref': cui_ref,
-        }
-
-        if roval is not None:
-            self.dict['check'] = roval
-        elif rsce is not None:
-            self.dict['check'] = rsce
-
-        if rbash_fix is not None:
-            self.dict['fix'] = rbash_fix
-        elif ransible_fix is not None:
-            self.dict['fix'] = ransible_fix
-        elif rignition_fix is not None:
-            self.dict['fix'] = rignition_fix
-        elif rkubernetes_fix is not None:
-            self.dict['fix'] = rkubernetes_fix
-        elif rpuppet_fix is not None:
-            self.dict['fix'] = rpuppet_fix
-        elif ranaconda_fix is not None:
-            self.dict['fix'] = ranaconda_fix
-
-
 class XCCDFBenchmark(object):
     """
     Class for processing an XCCDF benchmark to generate
@@ -144,6 +101,59 @@ class XCCDFBenchmark(object):
                       stig_var.attrib['select'] == '$disa-stigs-os-unix-linux-uri'):
                     self.stig_ns = generic_stig_ns
 
+        self.rule_features = self._get_rule_features()
+
+    def _get_rule_features(self):
+        """
+        Return a dict that maps each rule feature, e.g. 'oval' or 'bash_fix',
+        to the set of IDs of rules that have it.
+
+        All rules are examined in one pass over their child elements,
+        so statistics of any number of profiles can be computed from the result.
+        """
+        check_features = {oval_ns: 'oval', sce_ns: 'sce'}
+        fix_features = {
+            bash_rem_system: 'bash_fix',
+            ansible_rem_system: 'ansible_fix',
+            ignition_rem_system: 'ignition_fix',
+            kubernetes_rem_system: 'kubernetes_fix',
+            puppet_rem_system: 'puppet_fix',
+            anaconda_rem_system: 'anaconda_fix',
+        }
+        ident_features = {cce_uri: 'cce'}
+        reference_features = {}
+        for href, feature in [
+                (self.stig_ns, 'stig_id'), (self.cis_ns, 'cis_ref'),
+                (hipaa_ns, 'hipaa_ref'), (anssi_ns, 'anssi_ref'),
+                (ospp_ns, 'ospp_ref'), (cui_ns, 'cui_ref')]:
+            reference_features.setdefault(href, []).append(feature)
+        # Checks, fixes and idents are told apart by their system attribute
+        features_by_tag = {
+            "{%s}check" % self.xccdf_ns: check_features,
+            "{%s}fix" % self.xccdf_ns: fix_features,
+            "{%s}ident" % self.xccdf_ns: ident_features,
+        }
+        reference_tag = "{%s}reference" % self.xccdf_ns
+
+        rule_features = dict((feature, set()) for feature in RULE_FEATURES)
+        for rule_id, rule in self.indexed_rules.items():
+            for child in rule:
+                if child.tag == reference_tag:
+                    for feature in reference_features.get(child.get("href"), []):
+                        rule_features[feature].add(rule_id)
+                    continue
+                features = features_by_tag.get(child.tag)
+                if features is None:
+                    continue
+                feature = features.get(child.get("system"))
+                if feature is not None:
+                    rule_features[feature].add(rule_id)
+
+        rule_features['check'] = rule_features['oval'] | rule_features['sce']
+        rule_features['fix'] = set().union(
+            *[rule_features[feature] for feature in fix_features.values()])
+        return rule_features
+
 
     def get_profile_stats(self, profile):
         """Obtain statistics for the profile"""
@@ -196,15 +206,14 @@ class XCCDFBenchmark(object):
             'ansible_parity': [],
         }
 
-        rule_stats = []
         ssg_version_elem = self.tree.find("./{%s}version[@update=\"%s\"]" %
                                           (self.xccdf_ns, ssg_version_uri))
 
-        rules = []
+        rule_ids = []
 
         if profile == "all":
             # "all" is a virtual profile that selects all rules
-            rules = self.indexed_rules.values()
+            rule_ids = list(self.indexed_rules.keys())
         else:
             xccdf_profile = self.tree.find("./{%s}Profile[@id=\"%s\"]" %
                                            (self.xccdf_ns, profile))
@@ -226,187 +235,63 @@ class XCCDFBenchmark(object):
 
             for select in selects:
                 rule_id = select.get('idref')
-                xccdf_rule = self.indexed_rules.get(rule_id)
-                if xccdf_rule is not None:
-                    # it could also be a Group
-                    rules.append(xccdf_rule)
-
-        for rule in rules:
-            if rule is not None:
-                oval = rule.find("./{%s}check[@system=\"%s\"]" %
-                                 (self.xccdf_ns, oval_ns))
-                sce = rule.find("./{%s}check[@system=\"%s\"]" %
-                                (self.xccdf_ns, sce_ns))
-                bash_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                     (self.xccdf_ns, bash_rem_system))
-                ansible_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                        (self.xccdf_ns, ansible_rem_system))
-                ignition_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                         (self.xccdf_ns, ignition_rem_system))
-                kubernetes_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                           (self.xccdf_ns, kubernetes_rem_system))
-                puppet_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                       (self.xccdf_ns, puppet_rem_system))
-                anaconda_fix = rule.find("./{%s}fix[@system=\"%s\"]" %
-                                         (self.xccdf_ns, anaconda_rem_system))
-                cce = rule.find("./{%s}ident[@system=\"%s\"]" %
-                                (self.xccdf_ns, cce_uri))
-                stig_id = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                    (self.xccdf_ns, self.stig_ns))
-                cis_ref = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                    (self.xccdf_ns, self.cis_ns))
-                hipaa_ref = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                      (self.xccdf_ns, hipaa_ns))
-                anssi_ref = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                      (self.xccdf_ns, anssi_ns))
-                ospp_ref = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                     (self.xccdf_ns, ospp_ns))
-                cui_ref = rule.find("./{%s}reference[@href=\"%s\"]" %
-                                    (self.xccdf_ns, cui_ns))
-
-                rule_stats.append(
-                    RuleStats(rule.get("id"), oval, sce,
-                              bash_fix, ansible_fix, ignition_fix,
-                              kubernetes_fix, puppet_fix, anaconda_fix,
-                              cce, stig_id, cis_ref, hipaa_ref, anssi_ref,
-                              ospp_ref, cui_ref)
-                )
-
-        if not rule_stats:
+                # it could also be a Group
+                if rule_id in self.indexed_rules:
+                    rule_ids.append(rule_id)
+
+        if not rule_ids:
             print('Unable to retrieve statistics for %s profile' % profile)
             sys.exit(1)
 
-        rule_stats.sort(key=lambda r: r.dict['id'])
+        rule_ids.sort()
 
-        for rule in rule_stats:
-            profile_stats['rules'].append(rule.dict['id'])
+        def having(feature):
+            rules_having_feature = self.rule_features[feature]
+            return [rule_id for rule_id in rule_ids if rule_id in rules_having_feature]
 
+        def missing(feature):
+            rules_having_feature = self.rule_features[feature]
+            return [rule_id for rule_id in rule_ids if rule_id not in rules_having_feature]
+
+        def percentage(implemented):
+            return float(len(implemented)) / profile_stats['rules_count'] * 100
+
+        profile_stats['rules'] = rule_ids
         profile_stats['profile_id'] = profile.replace(OSCAP_PROFILE, "")
         if ssg_version_elem is not None:
             profile_stats['ssg_version'] = \
                 'SCAP Security Guide %s' % ssg_version_elem.text
-        profile_stats['rules_count'] = len(rule_stats)
-        profile_stats['implemented_ovals'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['oval'] is not None]
-        profile_stats['implemented_ovals_pct'] = \
-            float(len(profile_stats['implemented_ovals'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_ovals'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['oval'] is None]
-
-        profile_stats['implemented_sces'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['sce'] is not None]
-        profile_stats['implemented_sces_pct'] = \
-            float(len(profile_stats['implemented_sces'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_sces'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['sce'] is None]
-
-        profile_stats['implemented_checks'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['check'] is not None]
-        profile_stats['implemented_checks_pct'] = \
-            float(len(profile_stats['implemented_checks'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_checks'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['check'] is None]
-
-        profile_stats['implemented_bash_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['bash_fix'] is not None]
-        profile_stats['implemented_bash_fixes_pct'] = \
-            float(len(profile_stats['implemented_bash_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_bash_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['bash_fix'] is None]
-
-        profile_stats['implemented_ansible_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['ansible_fix'] is not None]
-        profile_stats['implemented_ansible_fixes_pct'] = \
-            float(len(profile_stats['implemented_ansible_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_ansible_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['ansible_fix'] is None]
-
-        profile_stats['implemented_ignition_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['ignition_fix'] is not None]
-        profile_stats['implemented_ignition_fixes_pct'] = \
-            float(len(profile_stats['implemented_ignition_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_ignition_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['ignition_fix'] is None]
-
-        profile_stats['implemented_kubernetes_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['kubernetes_fix'] is not None]
-        profile_stats['implemented_kubernetes_fixes_pct'] = \
-            float(len(profile_stats['implemented_kubernetes_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_kubernetes_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['kubernetes_fix'] is None]
-
-        profile_stats['implemented_puppet_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['puppet_fix'] is not None]
-        profile_stats['implemented_puppet_fixes_pct'] = \
-            float(len(profile_stats['implemented_puppet_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_puppet_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['puppet_fix'] is None]
-
-        profile_stats['implemented_anaconda_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['anaconda_fix'] is not None]
-
-        profile_stats['implemented_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['fix'] is not None]
-        profile_stats['implemented_fixes_pct'] = \
-            float(len(profile_stats['implemented_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['fix'] is None]
-
-        profile_stats['missing_stig_ids'] = []
-        if 'stig' in profile_stats['profile_id']:
-            profile_stats['missing_stig_ids'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['stig_id'] is None]
-
-        profile_stats['missing_cis_refs'] = []
-        if 'cis' in profile_stats['profile_id']:
-            profile_stats['missing_cis_refs'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['cis_ref'] is None]
-
-        profile_stats['missing_hipaa_refs'] = []
-        if 'hipaa' in profile_stats['profile_id']:
-            profile_stats['missing_hipaa_refs'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['hipaa_ref'] is None]
-
-        profile_stats['missing_anssi_refs'] = []
-        if 'anssi' in profile_stats['profile_id']:
-            profile_stats['missing_anssi_refs'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['anssi_ref'] is None]
-
-        profile_stats['missing_ospp_refs'] = []
-        if 'ospp' in profile_stats['profile_id']:
-            profile_stats['missing_ospp_refs'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['ospp_ref'] is None]
-
-        profile_stats['missing_cui_refs'] = []
-        if 'cui' in profile_stats['profile_id']:
-            profile_stats['missing_cui_refs'] = \
-                [x.dict['id'] for x in rule_stats if x.dict['cui_ref'] is None]
-
-        profile_stats['implemented_anaconda_fixes_pct'] = \
-            float(len(profile_stats['implemented_anaconda_fixes'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_anaconda_fixes'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['anaconda_fix'] is None]
-
-        profile_stats['assigned_cces'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['cce'] is not None]
-        profile_stats['assigned_cces_pct'] = \
-            float(len(profile_stats['assigned_cces'])) / \
-            profile_stats['rules_count'] * 100
-        profile_stats['missing_cces'] = \
-            [x.dict['id'] for x in rule_stats if x.dict['cce'] is None]
-
+        profile_stats['rules_count'] = len(rule_ids)
+
+        for feature, stats_name in [
+                ('oval', 'ovals'), ('sce', 'sces'), ('check', 'checks'),
+                ('bash_fix', 'bash_fixes'), ('ansible_fix', 'ansible_fixes'),
+                ('ignition_fix', 'ignition_fixes'),
+                ('kubernetes_fix', 'kubernetes_fixes'),
+                ('puppet_fix', 'puppet_fixes'), ('anaconda_fix', 'anaconda_fixes'),
+                ('fix', 'fixes')]:
+            implemented = having(feature)
+            profile_stats['implemented_%s' % stats_name] = implemented
+            profile_stats['implemented_%s_pct' % stats_name] = percentage(implemented)
+            profile_stats['missing_%s' % stats_name] = missing(feature)
+
+        # References are expected only in profiles that are based on them
+        for feature, stats_name, profile_part in [
+                ('stig_id', 'stig_ids', 'stig'), ('cis_ref', 'cis_refs', 'cis'),
+                ('hipaa_ref', 'hipaa_refs', 'hipaa'), ('anssi_ref', 'anssi_refs', 'anssi'),
+                ('ospp_ref', 'ospp_refs', 'ospp'), ('cui_ref', 'cui_refs', 'cui')]:
+            profile_stats['missing_%s' % stats_name] = []
+            if profile_part in profile_stats['profile_id']:
+                profile_stats['missing_%s' % stats_name] = missing(feature)
+
+        profile_stats['assigned_cces'] = having('cce')
+        profile_stats['assigned_cces_pct'] = percentage(profile_stats['assigned_cces'])
+        profile_stats['missing_cces'] = missing('cce')
+
+        missing_bash_fixes = set(profile_stats["missing_bash_fixes"])
         profile_stats['ansible_parity'] = \
-            [rule_id for rule_id in profile_stats["missing_ansible_fixes"] if rule_id not in profile_stats["missing_bash_fixes"]]
+            [rule_id for rule_id in profile_stats["missing_ansible_fixes"]
+             if rule_id not in missing_bash_fixes]
         profile_stats['ansible_parity_pct'] = 0
         if len(profile_stats['implemented_bash_fixes']):
             profile_stats['ansible_parity_pct'] = \
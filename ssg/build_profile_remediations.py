@@ -2,8 +2,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import os
+import re
 import sys
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 from .ansible import (
     add_minimum_version,
@@ -14,7 +15,64 @@ from .ansible import (
 from .shims import subprocess_check_output, Queue
 from .build_guides import _is_skipped_profile
 from .xccdf import get_profile_short_id
-from .constants import OSCAP_PATH, OSCAP_DS_STRING, ansible_system
+from .constants import (
+    OSCAP_PATH, OSCAP_DS_STRING, XCCDF12_NS, ansible_system, bash_system)
+
+
+# Fix systems supported by BenchmarkRemediations
+IN_PROCESS_TEMPLATES = [bash_system, ansible_system]
+
+# The pattern 'oscap xccdf generate fix' uses to turn XCCDF Values
+# into variables of an Ansible Playbook, see also expand_xccdf_subs
+# in ssg.build_remediations.
+ANSIBLE_VARIABLE_PATTERN = re.compile(
+    r"- name: XCCDF Value [^ ]+ # promote to variable\n  set_fact:\n"
+    r"    ([^:]+): (.+)\n  tags:\n    - always\n")
+
+SCRIPT_HEADER = (
+    "{shebang}"
+    "###############################################################################\n"
+    "#\n"
+    "# {remediation_type} for {profile_title}\n"
+    "#\n"
+    "# Profile Description:\n"
+    "# {profile_description}\n"
+    "#\n"
+    "# Profile ID:  {profile_id}\n"
+    "# Benchmark ID:  {benchmark_id}\n"
+    "# Benchmark Version:  {benchmark_version}\n"
+    "# XCCDF Version:  {xccdf_version}\n"
+    "#\n"
+    "# This file can be generated by OpenSCAP using:\n"
+    "# $ oscap xccdf generate fix --profile {profile_id} --fix-type {fix_type} xccdf-file.xml\n"
+    "#\n"
+    "# This {remediation_type} is generated from an OpenSCAP profile "
+    "without preliminary evaluation.\n"
+    "# It attempts to fix every selected rule, even if the system is already compliant.\n"
+    "#\n"
+    "# How to apply this {remediation_type}:\n"
+    "{how_to_apply}"
+    "#\n"
+    "###############################################################################\n\n"
+)
+
+SCRIPT_KINDS = {
+    bash_system: dict(
+        shebang="#!/usr/bin/env bash\n",
+        remediation_type="Bash Remediation Script",
+        fix_type="bash",
+        how_to_apply="# $ sudo ./remediation-script.sh\n",
+    ),
+    ansible_system: dict(
+        shebang="---\n",
+        remediation_type="Ansible Playbook",
+        fix_type="ansible",
+        how_to_apply=(
+            "# $ ansible-playbook -i \"localhost,\" -c local playbook.yml\n"
+            "# $ ansible-playbook -i \"192.168.1.155,\" playbook.yml\n"
+            "# $ ansible-playbook -i inventory.ini playbook.yml\n"),
+    ),
+}
 
 
 def generate_for_input_content(input_content, benchmark_id, profile_id,
@@ -38,6 +96,186 @@ def generate_for_input_content(input_content, benchmark_id, profile_id,
     return subprocess_check_output(args).decode("utf-8")
 
 
+def _comment_multiline_text(text):
+    return text.strip().replace("\n", "\n# ")
+
+
+def _get_plaintext(parent, tag):
+    element = parent.find("{%s}%s" % (XCCDF12_NS, tag))
+    if element is None:
+        return ""
+    return "".join(element.itertext())
+
+
+class BenchmarkRemediations(object):
+    """
+    Generates remediation scripts of profiles of a benchmark in the form
+    'oscap xccdf generate fix' generates them.
+
+    The benchmark is indexed once, so remediations of all its profiles
+    can be generated without parsing the input file again for each of them.
+    Only fix systems listed in IN_PROCESS_TEMPLATES are supported.
+    """
+    def __init__(self, benchmark):
+        self.benchmark_id = benchmark.get("id")
+        self.benchmark_version = benchmark.findtext("{%s}version" % XCCDF12_NS)
+        self.xccdf_version = "1.2"
+        self.profiles = dict()
+        for profile in benchmark.findall("{%s}Profile" % XCCDF12_NS):
+            self.profiles[profile.get("id")] = profile
+        self.values = dict()
+        for value in benchmark.iter("{%s}Value" % XCCDF12_NS):
+            choices = OrderedDict()
+            for choice in value.findall("{%s}value" % XCCDF12_NS):
+                choices.setdefault(choice.get("selector", ""), choice.text or "")
+            self.values[value.get("id")] = choices
+        # Rules in document order, each with IDs of groups it is nested in
+        self.rules = []
+        self.selected_by_default = dict()
+        self.fixes = dict()
+        self._index_items(benchmark, [])
+
+    def _index_items(self, parent, group_ids):
+        for item in parent:
+            if item.tag == "{%s}Group" % XCCDF12_NS:
+                self.selected_by_default[item.get("id")] = item.get("selected", "true") == "true"
+                self._index_items(item, group_ids + [item.get("id")])
+            elif item.tag == "{%s}Rule" % XCCDF12_NS:
+                rule_id = item.get("id")
+                self.selected_by_default[rule_id] = item.get("selected", "true") == "true"
+                self.rules.append((rule_id, group_ids))
+                fixes = dict()
+                for fix in item.findall("{%s}fix" % XCCDF12_NS):
+                    fixes.setdefault(fix.get("system"), fix)
+                self.fixes[rule_id] = fixes
+
+    def _resolve_profile(self, profile_id):
+        """
+        Return a tuple (selections, values) of the profile, taking profiles
+        it extends into account. Selections map IDs of items to their
+        selected state, values map IDs of XCCDF Values to values
+        the profile sets.
+        """
+        profiles = []
+        while profile_id is not None:
+            if profile_id not in self.profiles:
+                raise ValueError(
+                    "Profile '%s' doesn't exist in the benchmark '%s'."
+                    % (profile_id, self.benchmark_id))
+            profiles.append(self.profiles[profile_id])
+            profile_id = self.profiles[profile_id].get("extends")
+
+        selections = dict()
+        values = dict()
+        for profile in reversed(profiles):
+            for element in profile:
+                if element.tag == "{%s}select" % XCCDF12_NS:
+                    selections[element.get("idref")] = element.get("selected") == "true"
+                elif element.tag == "{%s}refine-value" % XCCDF12_NS:
+                    value_id = element.get("idref")
+                    selector = element.get("selector")
+                    if selector is not None and selector in self.values.get(value_id, {}):
+                        values[value_id] = self.values[value_id][selector]
+                elif element.tag == "{%s}set-value" % XCCDF12_NS:
+                    values[element.get("idref")] = element.text or ""
+        return selections, values
+
+    def _get_selected_rules(self, selections):
+        def is_selected(item_id):
+            return selections.get(item_id, self.selected_by_default[item_id])
+
+        return [
+            rule_id for rule_id, group_ids in self.rules
+            if is_selected(rule_id) and all(is_selected(g) for g in group_ids)]
+
+    def _get_value(self, value_id, profile_values):
+        if value_id in profile_values:
+            return profile_values[value_id]
+        choices = self.values.get(value_id)
+        if not choices:
+            raise ValueError(
+                "Fix refers to the Value '%s' that doesn't exist in the benchmark '%s'."
+                % (value_id, self.benchmark_id))
+        if "" in choices:
+            return choices[""]
+        # Without a default value, use the first one in the document
+        return next(iter(choices.values()))
+
+    def _get_fix_text(self, fix, profile_values):
+        parts = [fix.text or ""]
+        for child in fix:
+            if child.tag == "{%s}sub" % XCCDF12_NS:
+                parts.append(self._get_value(child.get("idref"), profile_values))
+            parts.append(child.tail or "")
+        return "".join(parts)
+
+    def _get_script_header(self, profile_id, template):
+        profile = self.profiles[profile_id]
+        return SCRIPT_HEADER.format(
+            profile_title=_comment_multiline_text(_get_plaintext(profile, "title")),
+            profile_description=_comment_multiline_text(
+                _get_plaintext(profile, "description")),
+            profile_id=profile_id,
+            benchmark_id=self.benchmark_id,
+            benchmark_version=self.benchmark_version,
+            xccdf_version=self.xccdf_version,
+            **SCRIPT_KINDS[template])
+
+    def _generate_bash(self, rule_ids, profile_values):
+        output = []
+        total = len(rule_ids)
+        for current, rule_id in enumerate(rule_ids, 1):
+            output.append(
+                "###############################################################################\n"
+                "# BEGIN fix (%i / %i) for '%s'\n"
+                "###############################################################################\n"
+                "(>&2 echo \"Remediating rule %i/%i: '%s'\")\n"
+                % (current, total, rule_id, current, total, rule_id))
+            fix = self.fixes[rule_id].get(bash_system)
+            if fix is None:
+                output.append("(>&2 echo \"FIX FOR THIS RULE '%s' IS MISSING\")\n" % rule_id)
+            else:
+                output.append(self._get_fix_text(fix, profile_values))
+            output.append("\n# END fix for '%s'\n\n" % rule_id)
+        return "".join(output)
+
+    def _generate_ansible(self, profile_id, rule_ids, profile_values):
+        variables = []
+        tasks = []
+        for rule_id in rule_ids:
+            fix = self.fixes[rule_id].get(ansible_system)
+            if fix is None:
+                continue
+            fix_text = self._get_fix_text(fix, profile_values)
+            tasks_start = 0
+            for match in ANSIBLE_VARIABLE_PATTERN.finditer(fix_text):
+                variable = "    %s: %s\n" % (match.group(1), match.group(2))
+                if variable not in variables:
+                    variables.append(variable)
+                tasks_start = match.end()
+            fix_tasks = fix_text[tasks_start:]
+            tasks.append("".join(
+                "    " + line if line.strip() else line
+                for line in fix_tasks.splitlines(True)) + "\n")
+        return "".join(
+            ["\n- name: Ansible Playbook for %s\n  hosts: all\n" % profile_id,
+             "  vars:\n"] + variables + ["  tasks:\n"] + tasks)
+
+    def generate(self, profile_id, template):
+        """
+        Return remediation of the given type for the given profile.
+        """
+        if template not in IN_PROCESS_TEMPLATES:
+            raise ValueError(
+                "Generating '%s' fixes in-process is not supported." % template)
+        selections, profile_values = self._resolve_profile(profile_id)
+        rule_ids = self._get_selected_rules(selections)
+        header = self._get_script_header(profile_id, template)
+        if template == ansible_system:
+            return header + self._generate_ansible(profile_id, rule_ids, profile_values)
+        return header + self._generate_bash(rule_ids, profile_values)
+
+
 def _get_filename(path_base, extension, profile_id, benchmark_id, benchmarks,
                   template):
     """
@@ -117,6 +355,17 @@ def fill_queue(benchmarks, benchmark_profile_pairs, input_path, path_base,
     return queue
 
 
+def _write_remediation(src, path, extension, template):
+    if extension == "yml" and \
+       template == "urn:xccdf:fix:script:ansible":
+        src = add_minimum_version(src)
+        src = remove_too_many_blank_lines(src)
+        src = remove_trailing_whitespace(src)
+        src = strip_eof(src)
+    with open(path, "wb") as _file:
+        _file.write(src.encode("utf-8"))
+
+
 def builder(queue):
     """
     While there are tasks in the queue, process them with
@@ -134,15 +383,7 @@ def builder(queue):
             src = generate_for_input_content(
                 input_path, benchmark_id, profile_id, template
             )
-
-            if extension == "yml" and \
-               template == "urn:xccdf:fix:script:ansible":
-                src = add_minimum_version(src)
-                src = remove_too_many_blank_lines(src)
-                src = remove_trailing_whitespace(src)
-                src = strip_eof(src)
-            with open(path, "wb") as _file:
-                _file.write(src.encode("utf-8"))
+            _write_remediation(src, path, extension, template)
 
             queue.task_done()
         except Queue.Empty:
@@ -156,3 +397,16 @@ def builder(queue):
             with queue.mutex:
                 queue.queue.clear()
             raise error
+
+
+def build_in_process(queue, benchmark_remediations):
+    """
+    Process all tasks in the queue with BenchmarkRemediations
+    of their benchmarks, which are given by the benchmark_remediations dict,
+    and write their output to the correct location.
+    """
+    while not queue.empty():
+        (benchmark_id, profile_id, _, extension, path, template) = queue.get(False)
+        src = benchmark_remediations[benchmark_id].generate(profile_id, template)
+        _write_remediation(src, path, extension, template)
+        queue.task_done()
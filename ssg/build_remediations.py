@@ -4,6 +4,7 @@ from __future__ import print_function
 import sys
 import os
 import os.path
+import json
 import re
 from collections import defaultdict, namedtuple, OrderedDict
 
@@ -13,6 +14,7 @@ from . import rules
 from . import utils
 
 from . import constants
+from .dependencies import get_file_digest
 from .jinja import process_file_with_macros as jinja_process_file
 
 from .xml import ElementTree
@@ -37,6 +39,9 @@ REMEDIATION_ELM_KEYS = ['complexity', 'disruption', 'reboot', 'strategy']
 
 RemediationObject = namedtuple('remediation', ['contents', 'config'])
 
+# Bump when the format of the parsed Ansible remediations file changes.
+PARSED_ANSIBLE_REMEDIATIONS_VERSION = 1
+
 
 def is_supported_filename(remediation_type, filename):
     """
@@ -643,3 +648,81 @@ def load_compiled_remediations(fixes_dir):
             remediation = parse_from_file_without_jinja(file_path)
             all_remediations[rule_id][language] = remediation
     return all_remediations
+
+
+class ParsedAnsibleRemediations(object):
+    """
+    Task lists of compiled Ansible remediations stored in a JSON file,
+    so later build stages don't have to parse the YAML of every
+    remediation again.
+
+    Entries are indexed by rule IDs. Each entry holds the metadata and
+    the parsed tasks of the remediation, and a digest of the compiled
+    remediation file. Entries of files that have changed since the entry
+    has been added are ignored, so the stages can always fall back
+    to parsing the file.
+    """
+    def __init__(self):
+        self.remediations = dict()
+
+    def add(self, rule_id, file_path, config, tasks):
+        """
+        Add the metadata and tasks of the remediation written to the file.
+        Tasks that JSON can't represent exactly, e.g. dates or mappings
+        with non-string keys, are not added.
+        """
+        entry = dict(
+            source=get_file_digest(file_path), config=dict(config), tasks=tasks)
+        try:
+            serialized = json.dumps(entry, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        if json.loads(serialized, object_pairs_hook=OrderedDict) != entry:
+            return
+        self.remediations[rule_id] = entry
+
+    def get(self, rule_id, file_path):
+        """
+        Return the RemediationObject of the rule with the parsed task list
+        as contents, or None if there is no up-to-date entry for the file.
+        """
+        entry = self.remediations.get(rule_id)
+        if entry is None:
+            return None
+        try:
+            if get_file_digest(file_path) != entry["source"]:
+                return None
+        except (IOError, OSError):
+            return None
+        config = defaultdict(lambda: None)
+        config.update(entry["config"])
+        return RemediationObject(contents=entry["tasks"], config=config)
+
+    def save(self, path):
+        contents = dict(
+            version=PARSED_ANSIBLE_REMEDIATIONS_VERSION,
+            remediations=self.remediations)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(contents, f, separators=(",", ":"))
+        os.rename(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Return the remediations stored in the file, or None if the file
+        doesn't exist or has a different format.
+        """
+        if sys.version_info[0] < 3:
+            # JSON strings are loaded as unicode objects,
+            # which the YAML dumper would tag in the playbooks.
+            return None
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            contents = json.load(f, object_pairs_hook=OrderedDict)
+        if contents.get("version") != PARSED_ANSIBLE_REMEDIATIONS_VERSION:
+            return None
+        parsed = cls()
+        parsed.remediations = contents["remediations"]
+        return parsed
@@ -9,7 +9,8 @@ from .constants import (
     OSCAP_RULE, OSCAP_VALUE, oval_namespace, XCCDF12_NS, cce_uri, ocil_cs,
     ocil_namespace, OVAL_TO_XCCDF_DATATYPE_CONSTRAINTS
 )
-from .parse_oval import resolve_definition, find_extending_defs, get_container_groups
+from .parse_oval import (
+    OVALReferenceGraph, resolve_definition, CONTAINER_GROUPS, _strip_ns_from_tag)
 from .xml import parse_file, map_elements_to_their_ids
 
 
@@ -120,33 +121,45 @@ class OVALFileLinker(FileLinker):
     def __init__(self, translator, xccdftree, checks, output_file_name):
         super(OVALFileLinker, self).__init__(
             translator, xccdftree, checks, output_file_name)
-        self.oval_groups = None
+        self.oval_index = None
+        self.xccdf_index = None
+        self.check_variables = None
+
+    @property
+    def oval_groups(self):
+        return self.oval_index.oval_groups
 
     def _get_checkid_string(self):
         return "{%s}definition" % self.CHECK_NAMESPACE
 
     def link(self):
-        self.oval_groups = get_container_groups(self.fname)
         self.tree = parse_file(self.fname)
+        self.oval_index = OVALLinkingIndex(self.tree)
+        self.xccdf_index = XCCDFLinkingIndex(self.xccdftree)
         try:
             self._link_oval_tree()
 
             # Verify if CCE identifiers present in the XCCDF follow the required form
             # (either CCE-XXXX-X, or CCE-XXXXX-X). Drop from XCCDF those who don't follow it
-            verify_correct_form_of_referenced_cce_identifiers(self.xccdftree)
+            verify_correct_form_of_referenced_cce_identifiers(
+                self.xccdftree, self.xccdf_index)
         except SSGError as exc:
             raise SSGError(
                 "Error processing {0}: {1}"
                 .format(self.fname, str(exc)))
+        # The translation rewrites references in the OVAL tree,
+        # so variables of checks have to be resolved before it.
+        self.check_variables = self._get_check_variables()
         self.tree = self.translator.translate(self.tree, store_defname=True)
 
     def _link_oval_tree(self):
-        xccdf_to_cce_id_mapping = create_xccdf_id_to_cce_id_mapping(self.xccdftree)
+        xccdf_to_cce_id_mapping = create_xccdf_id_to_cce_id_mapping(
+            self.xccdftree, self.xccdf_index)
 
-        indexed_oval_defs = map_elements_to_their_ids(
-            self.tree, ".//{0}".format(self._get_checkid_string()))
+        indexed_oval_defs = self.oval_index.definitions
 
-        defs_miss = get_oval_checks_extending_non_existing_checks(self.tree, indexed_oval_defs)
+        defs_miss = get_oval_checks_extending_non_existing_checks(
+            self.tree, indexed_oval_defs, self.oval_index)
         if defs_miss:
             msg = ["Following extending definitions are missing:"]
             for missing, broken in transpose_dict_with_sets(defs_miss).items():
@@ -162,7 +175,8 @@ class OVALFileLinker(FileLinker):
         self._ensure_by_xccdf_referenced_oval_def_is_defined_in_oval_file(
             indexed_oval_defs)
 
-        check_and_correct_xccdf_to_oval_data_export_matching_constraints(self.xccdftree, self.tree)
+        check_and_correct_xccdf_to_oval_data_export_matching_constraints(
+            self.xccdftree, self.tree, self.xccdf_index, self.oval_index)
 
     def _add_cce_id_refs_to_oval_checks(self, idmappingdict):
         """
@@ -176,20 +190,15 @@ class OVALFileLinker(FileLinker):
         where "CCE-ID" is the CCE identifier for that particular rule
         retrieved from the XCCDF file
         """
-        ovalrules = self.tree.findall(".//{0}".format(self._get_checkid_string()))
-        for rule in ovalrules:
-            ovalid = rule.get("id")
-            assert ovalid is not None, \
-                "An OVAL rule doesn't have an ID"
-
-            if ovalid not in idmappingdict:
+        for ovalid, xccdfcceid in idmappingdict.items():
+            rule = self.oval_index.definitions.get(ovalid)
+            if rule is None:
                 continue
 
             ovaldesc = rule.find(".//{%s}description" % self.CHECK_NAMESPACE)
             assert ovaldesc is not None, \
                 "OVAL rule '{0}' doesn't have a description, which is mandatory".format(ovalid)
 
-            xccdfcceid = idmappingdict[ovalid]
             if is_cce_format_valid(xccdfcceid) and is_cce_value_valid(xccdfcceid):
                 # Then append the <reference source="CCE" ref_id="CCE-ID" /> element right
                 # after <description> element of specific OVAL check
@@ -204,32 +213,59 @@ class OVALFileLinker(FileLinker):
         while queue:
             def_id = queue.pop()
             processed_def_ids.add(def_id)
-            definition_tree = self.oval_groups["definitions"].get(def_id)
-            if definition_tree is None:
+            if def_id not in self.oval_groups["definitions"]:
                 print("WARNING: Definition '%s' was not found, can't figure "
                       "out what depends on it." % (def_id), file=sys.stderr)
                 continue
-            extensions = find_extending_defs(self.oval_groups, definition_tree)
+            extensions = set(self.oval_index.extended_definitions[def_id])
             if not extensions:
                 continue
             queue |= extensions - processed_def_ids
         return processed_def_ids
 
+    def _get_definition_variables(self, def_id, resolved_variables, reference_graph):
+        if def_id not in resolved_variables:
+            resolved_variables[def_id] = resolve_definition(
+                self.oval_groups, self.oval_groups["definitions"][def_id],
+                reference_graph)
+        return resolved_variables[def_id]
+
+    def _get_check_variables(self):
+        """
+        Return a dict that maps names of OVAL definitions referenced by
+        related checks to names of external variables the definitions
+        and definitions they extend use.
+        """
+        check_variables = dict()
+        resolved_variables = dict()
+        reference_graph = OVALReferenceGraph(self.oval_groups)
+        for check in self.checks_related_to_us:
+            checkcontentref = get_content_ref_if_exists_and_not_remote(check)
+            if checkcontentref is None:
+                continue
+            check_name = checkcontentref.get("name")
+            if check_name is None or check_name in check_variables:
+                continue
+            if check_name not in self.oval_groups["definitions"]:
+                continue
+            all_vars = set()
+            for def_id in self.get_nested_definitions(check_name):
+                if def_id not in self.oval_groups["definitions"]:
+                    print("WARNING: Definition '%s' was not found, can't figure "
+                          "out which variables it needs." % (def_id), file=sys.stderr)
+                    continue
+                all_vars |= self._get_definition_variables(
+                    def_id, resolved_variables, reference_graph)
+            check_variables[check_name] = all_vars
+        return check_variables
+
     def add_missing_check_exports(self, check, checkcontentref):
         check_name = checkcontentref.get("name")
         if check_name is None:
             return
-        oval_def = self.oval_groups["definitions"].get(check_name)
-        if oval_def is None:
+        all_vars = self.check_variables.get(check_name)
+        if all_vars is None:
             return
-        all_vars = set()
-        for def_id in self.get_nested_definitions(check_name):
-            extended_def = self.oval_groups["definitions"].get(def_id)
-            if extended_def is None:
-                print("WARNING: Definition '%s' was not found, can't figure "
-                      "out which variables it needs." % (def_id), file=sys.stderr)
-                continue
-            all_vars |= resolve_definition(self.oval_groups, extended_def)
         for varname in sorted(all_vars):
             export = ET.Element("{%s}check-export" % XCCDF12_NS)
             export.attrib["export-name"] = varname
@@ -244,14 +280,14 @@ class OVALFileLinker(FileLinker):
         # * That OVAL definition doesn't constitute a remote OVAL
         #   (@href of <check-content-ref> doesn't start with 'http'
 
-        for xccdfid, rule in rules_with_ids_generator(self.xccdftree):
+        for xccdfid, rule in self.xccdf_index.rules:
             # Search OVAL ID in OVAL document
             ovalid = indexed_oval_defs.get(xccdfid)
             if ovalid is not None:
                 # The OVAL check was found, we can continue
                 continue
 
-            for check in rule.findall(".//{%s}check" % (XCCDF12_NS)):
+            for check in self.xccdf_index.rule_checks[xccdfid]:
                 if check.get("system") != oval_cs:
                     continue
 
@@ -277,6 +313,75 @@ class OCILFileLinker(FileLinker):
         self.tree = self.translator.translate(self.tree, store_defname=True)
 
 
+class XCCDFLinkingIndex(object):
+    """
+    Rules, their checks and CCE identifiers, and Values of an XCCDF tree
+    collected in a single traversal of the tree.
+
+    Rules are stored as (XCCDF ID, rule element) tuples in document order,
+    see rules_with_ids_generator, checks and CCE ident elements are indexed
+    by the XCCDF ID of their rule and Values by their ID.
+    """
+    def __init__(self, xccdftree):
+        self.rules = []
+        self.rule_checks = dict()
+        self.rule_cces = dict()
+        self.values = dict()
+
+        rule_tag = "{%s}Rule" % XCCDF12_NS
+        value_tag = "{%s}Value" % XCCDF12_NS
+        elements = [xccdftree]
+        while elements:
+            element = elements.pop()
+            if element.tag == rule_tag:
+                self._add_rule(element)
+            elif element.tag == value_tag:
+                self.values[element.get("id")] = element
+            else:
+                elements.extend(reversed(list(element)))
+
+    def _add_rule(self, rule):
+        xccdfid = rule.get("id").replace(OSCAP_RULE, "")
+        self.rules.append((xccdfid, rule))
+        self.rule_checks[xccdfid] = list(rule.iter("{%s}check" % XCCDF12_NS))
+        identcce = _find_identcce(rule)
+        if identcce is not None:
+            self.rule_cces[xccdfid] = identcce
+
+
+class OVALLinkingIndex(object):
+    """
+    Contents of an OVAL tree collected in a single traversal of the tree.
+
+    Provides the container groups of the tree, see
+    ssg.parse_oval.get_container_groups, definitions by their ID,
+    IDs of definitions extended by each definition in document order
+    and external variables.
+    """
+    def __init__(self, ovaltree):
+        self.oval_groups = dict()
+        self.extended_definitions = dict()
+        self.external_variables = []
+
+        extend_tag = "{%s}extend_definition" % oval_ns
+        external_variable_tag = "{%s}external_variable" % oval_ns
+        for container in ovaltree:
+            group_name = _strip_ns_from_tag(container.tag)
+            if group_name not in CONTAINER_GROUPS:
+                continue
+            group = dict()
+            for element in container:
+                group[element.attrib["id"]] = element
+                if group_name == "definitions":
+                    self.extended_definitions[element.attrib["id"]] = [
+                        extension.get("definition_ref")
+                        for extension in element.iter(extend_tag)]
+                elif element.tag == external_variable_tag:
+                    self.external_variables.append(element)
+            self.oval_groups[group_name] = group
+        self.definitions = self.oval_groups.get("definitions", dict())
+
+
 def _find_identcce(rule, namespace=XCCDF12_NS):
     for ident in rule.findall("./{%s}ident" % namespace):
         if ident.get("system") == cce_uri:
@@ -293,7 +398,7 @@ def rules_with_ids_generator(xccdftree):
         yield xccdfid, rule
 
 
-def create_xccdf_id_to_cce_id_mapping(xccdftree):
+def create_xccdf_id_to_cce_id_mapping(xccdftree, xccdf_index=None):
     #
     # Create dictionary having form of
     #
@@ -301,10 +406,12 @@ def create_xccdf_id_to_cce_id_mapping(xccdftree):
     #
     # for each XCCDF rule having <ident system='http://cce.mitre.org'>CCE-ID</ident>
     # element set in the XCCDF document
+    if xccdf_index is None:
+        xccdf_index = XCCDFLinkingIndex(xccdftree)
     xccdftocce_idmapping = {}
 
-    for xccdfid, rule in rules_with_ids_generator(xccdftree):
-        identcce = _find_identcce(rule)
+    for xccdfid, _ in xccdf_index.rules:
+        identcce = xccdf_index.rule_cces.get(xccdfid)
         if identcce is None:
             continue
 
@@ -313,13 +420,16 @@ def create_xccdf_id_to_cce_id_mapping(xccdftree):
     return xccdftocce_idmapping
 
 
-def get_nonexisting_check_definition_extends(definition, indexed_oval_defs):
+def get_nonexisting_check_definition_extends(
+        definition, indexed_oval_defs, extended_definition_refs=None):
     # TODO: handle multiple levels of referrals.
     # OVAL checks that go beyond one level of extend_definition won't be properly identified
-    for extdefinition in definition.findall(".//{%s}extend_definition" % oval_ns):
+    if extended_definition_refs is None:
+        extended_definition_refs = [
+            extdefinition.get("definition_ref") for extdefinition in
+            definition.findall(".//{%s}extend_definition" % oval_ns)]
+    for extdefinitionref in extended_definition_refs:
         # Verify each extend_definition in the definition
-        extdefinitionref = extdefinition.get("definition_ref")
-
         # Search the OVAL tree for a definition with the referred ID
         referreddefinition = indexed_oval_defs.get(extdefinitionref)
 
@@ -329,13 +439,17 @@ def get_nonexisting_check_definition_extends(definition, indexed_oval_defs):
     return None
 
 
-def get_oval_checks_extending_non_existing_checks(ovaltree, indexed_oval_defs):
+def get_oval_checks_extending_non_existing_checks(ovaltree, indexed_oval_defs, oval_index=None):
     # Incomplete OVAL checks are as useful as non existing checks
     # Here we check if all extend_definition refs from a definition exists in local OVAL file
     definitions = ovaltree.find(".//{%s}definitions" % oval_ns)
     definitions_misses = collections.defaultdict(set)
     for definition in definitions:
-        nonexisting_ref = get_nonexisting_check_definition_extends(definition, indexed_oval_defs)
+        extended_definition_refs = None
+        if oval_index is not None:
+            extended_definition_refs = oval_index.extended_definitions[definition.get("id")]
+        nonexisting_ref = get_nonexisting_check_definition_extends(
+            definition, indexed_oval_defs, extended_definition_refs)
         if nonexisting_ref is not None:
             definitions_misses[definition].add(nonexisting_ref)
 
@@ -354,7 +468,8 @@ def transpose_dict_with_sets(dict_in):
     return result
 
 
-def check_and_correct_xccdf_to_oval_data_export_matching_constraints(xccdftree, ovaltree):
+def check_and_correct_xccdf_to_oval_data_export_matching_constraints(
+        xccdftree, ovaltree, xccdf_index=None, oval_index=None):
     """
     Verify if <xccdf:Value> 'type' to corresponding OVAL variable
     'datatype' export matching constraint:
@@ -375,13 +490,17 @@ def check_and_correct_xccdf_to_oval_data_export_matching_constraints(xccdftree,
 
     http://csrc.nist.gov/publications/nistpubs/800-126-rev2/SP800-126r2.pdf#page=30&zoom=auto,69,313
     """
-    indexed_xccdf_values = map_elements_to_their_ids(
-        xccdftree, ".//{%s}Value" % (XCCDF12_NS))
+    if xccdf_index is not None:
+        indexed_xccdf_values = xccdf_index.values
+    else:
+        indexed_xccdf_values = map_elements_to_their_ids(
+            xccdftree, ".//{%s}Value" % (XCCDF12_NS))
 
     # Loop through all <external_variables> in the OVAL document
-    ovalextvars = ovaltree.findall(".//{%s}external_variable" % oval_ns)
-    if ovalextvars is None:
-        return
+    if oval_index is not None:
+        ovalextvars = oval_index.external_variables
+    else:
+        ovalextvars = ovaltree.findall(".//{%s}external_variable" % oval_ns)
 
     for ovalextvar in ovalextvars:
         # Verify the found external variable has both 'id' and 'datatype' set
@@ -430,7 +549,7 @@ def check_and_correct_xccdf_to_oval_data_export_matching_constraints(xccdftree,
             xccdfvar.attrib['type'] = reqxccdftype
 
 
-def verify_correct_form_of_referenced_cce_identifiers(xccdftree):
+def verify_correct_form_of_referenced_cce_identifiers(xccdftree, xccdf_index=None):
     """
     In SSG benchmarks, the CCEs till unassigned have the form of e.g. "RHEL7-CCE-TBD"
     (or any other format possibly not matching the above two requirements)
@@ -438,9 +557,10 @@ def verify_correct_form_of_referenced_cce_identifiers(xccdftree):
     If this is the case for specific SSG product, drop such CCE identifiers from the XCCDF
     since they are in invalid format!
     """
-    xccdfrules = xccdftree.findall(".//{%s}Rule" % XCCDF12_NS)
-    for rule in xccdfrules:
-        identcce = _find_identcce(rule)
+    if xccdf_index is None:
+        xccdf_index = XCCDFLinkingIndex(xccdftree)
+    for xccdfid, rule in xccdf_index.rules:
+        identcce = xccdf_index.rule_cces.get(xccdfid)
         if identcce is None:
             continue
         cceid = identcce.text
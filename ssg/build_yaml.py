@@ -4,6 +4,7 @@ from __future__ import print_function
 from copy import deepcopy
 import datetime
 import json
+import multiprocessing
 import os
 import os.path
 import re
@@ -35,6 +36,7 @@ from .constants import (XCCDF12_NS,
                         )
 from .rules import get_rule_dir_yaml, is_rule_dir
 from .rule_yaml import parse_prodtype
+from .rule_manifest import RulesManifest
 
 from .cce import is_cce_format_valid, is_cce_value_valid
 from .yaml import DocumentationNotComplete, open_and_macro_expand
@@ -726,33 +728,39 @@ class Rule(XCCDFEntity, Templatable):
         if rule.platform is not None:
             rule.platforms.add(rule.platform)
 
+        rule.load_cpe_platform_names(env_yaml, product_cpes)
+        # Only load policy specific content if rule doesn't have it defined yet
+        if not rule.policy_specific_content:
+            rule.load_policy_specific_content(yaml_file, env_yaml)
+
+        rule.load_sce_metadata(env_yaml, sce_metadata)
+
+        rule.validate_prodtype(yaml_file)
+        rule.validate_identifiers(yaml_file)
+        rule.validate_references(yaml_file)
+        return rule
+
+    def load_cpe_platform_names(self, env_yaml, product_cpes):
         # Convert the platform names to CPE names
         # But only do it if an env_yaml was specified (otherwise there would be no product CPEs
         # to lookup), and the rule's prodtype matches the product being built
         # also if the rule already has cpe_platform_names specified (compiled rule)
         # do not evaluate platforms again
         if env_yaml and (
-            env_yaml["product"] in parse_prodtype(rule.prodtype)
-            or rule.prodtype == "all") and (
-                product_cpes and not rule.cpe_platform_names):
+            env_yaml["product"] in parse_prodtype(self.prodtype)
+            or self.prodtype == "all") and (
+                product_cpes and not self.cpe_platform_names):
             # parse platform definition and get CPEAL platform
-            for platform in rule.platforms:
+            for platform in self.platforms:
                 cpe_platform = Platform.from_text(platform, product_cpes)
                 cpe_platform = add_platform_if_not_defined(cpe_platform, product_cpes)
-                rule.cpe_platform_names.add(cpe_platform.id_)
-        # Only load policy specific content if rule doesn't have it defined yet
-        if not rule.policy_specific_content:
-            rule.load_policy_specific_content(yaml_file, env_yaml)
-
-        if sce_metadata and rule.id_ in sce_metadata:
-            rule.sce_metadata = sce_metadata[rule.id_]
-            rule.sce_metadata["relative_path"] = os.path.join(
-                env_yaml["product"], "checks/sce", rule.sce_metadata['filename'])
+                self.cpe_platform_names.add(cpe_platform.id_)
 
-        rule.validate_prodtype(yaml_file)
-        rule.validate_identifiers(yaml_file)
-        rule.validate_references(yaml_file)
-        return rule
+    def load_sce_metadata(self, env_yaml, sce_metadata):
+        if sce_metadata and self.id_ in sce_metadata:
+            self.sce_metadata = sce_metadata[self.id_]
+            self.sce_metadata["relative_path"] = os.path.join(
+                env_yaml["product"], "checks/sce", self.sce_metadata['filename'])
 
     def _verify_stigid_format(self, product):
         stig_id = self.references.get("stigid", None)
@@ -1275,6 +1283,22 @@ class DirectoryLoader(object):
             self.all_rules.update(loader.all_rules)
             self.all_groups.update(loader.all_groups)
 
+    def collect_entity_files(self, directories):
+        """
+        Walk all the directory trees and return lists of all value files
+        and rule files that the loader could load from them.
+        """
+        value_files = []
+        rule_files = []
+        pending_directories = list(directories)
+        while pending_directories:
+            loader = self._get_new_loader()
+            loader._collect_items_to_load(pending_directories.pop(0))
+            value_files.extend(loader.value_files)
+            rule_files.extend(loader.rule_files)
+            pending_directories.extend(loader.subdirectories)
+        return value_files, rule_files
+
     def _get_new_loader(self):
         raise NotImplementedError()
 
@@ -1319,10 +1343,37 @@ class DirectoryLoader(object):
             entity.dump_yaml(dest_filename)
 
 
+def _init_entity_loading_worker(env_yaml):
+    _load_entity_in_worker.env_yaml = env_yaml
+
+
+def _load_entity_in_worker(task):
+    """
+    Load a value or a rule in a worker process of the BuildLoader.
+    Product CPEs and SCE metadata are shared state of the main process,
+    so they are assigned to the rule only after it is sent back.
+
+    Returns a tuple (yaml_file, entity, exception).
+    """
+    kind, yaml_file = task
+    env_yaml = _load_entity_in_worker.env_yaml
+    try:
+        if kind == "value":
+            entity = Value.from_yaml(yaml_file, env_yaml)
+        else:
+            entity = Rule.from_yaml(yaml_file, env_yaml)
+    except Exception as exc:
+        return yaml_file, None, exc
+    return yaml_file, entity, None
+
+
+_load_entity_in_worker.env_yaml = None
+
+
 class BuildLoader(DirectoryLoader):
     def __init__(
             self, profiles_dir, env_yaml, product_cpes,
-            sce_metadata_path=None, stig_reference_path=None):
+            sce_metadata_path=None, stig_reference_path=None, jobs=1):
         super(BuildLoader, self).__init__(profiles_dir, env_yaml, product_cpes)
 
         self.sce_metadata = None
@@ -1332,20 +1383,77 @@ class BuildLoader(DirectoryLoader):
         if stig_reference_path:
             self.stig_references = ssg.build_stig.map_versions_to_rule_ids(stig_reference_path)
 
+        self.jobs = jobs
+        self.preloaded_entities = None
+        self.rules_manifest = RulesManifest(env_yaml)
+
+    def process_directory_trees(self, directories):
+        if self.jobs > 1:
+            self.preloaded_entities = self._preload_entities(directories)
+        try:
+            return super(BuildLoader, self).process_directory_trees(directories)
+        finally:
+            self.preloaded_entities = None
+
+    def _preload_entities(self, directories):
+        """
+        Load all values and rules found in the directory trees
+        in a pool of worker processes.
+        The group hierarchy is then assembled sequentially
+        from the preloaded entities, so the result doesn't depend on
+        the order in which the workers finish.
+        """
+        value_files, rule_files = self.collect_entity_files(directories)
+        tasks = [("value", f) for f in value_files] + [("rule", f) for f in rule_files]
+
+        preloaded_entities = dict()
+        pool = multiprocessing.Pool(
+            self.jobs, _init_entity_loading_worker, (self.env_yaml,))
+        try:
+            results = pool.imap_unordered(_load_entity_in_worker, tasks, chunksize=16)
+            for yaml_file, entity, exc in results:
+                preloaded_entities[yaml_file] = (entity, exc)
+        finally:
+            pool.terminate()
+            pool.join()
+        return preloaded_entities
+
+    def _get_preloaded_entity(self, yaml_file):
+        entity, exc = self.preloaded_entities.pop(yaml_file)
+        if exc is not None:
+            raise exc
+        return entity
+
+    def _load_value(self, value_yaml):
+        if self.preloaded_entities is None:
+            return Value.from_yaml(value_yaml, self.env_yaml)
+        return self._get_preloaded_entity(value_yaml)
+
+    def _load_rule(self, rule_yaml):
+        if self.preloaded_entities is None:
+            return Rule.from_yaml(
+                rule_yaml, self.env_yaml, self.product_cpes, self.sce_metadata)
+        rule = self._get_preloaded_entity(rule_yaml)
+        rule.load_cpe_platform_names(self.env_yaml, self.product_cpes)
+        rule.load_sce_metadata(self.env_yaml, self.sce_metadata)
+        return rule
+
     def _process_values(self):
         for value_yaml in self.value_files:
-            value = Value.from_yaml(value_yaml, self.env_yaml)
+            value = self._load_value(value_yaml)
             self.all_values[value.id_] = value
             self.loaded_group.add_value(value)
 
     def _process_rules(self):
         for rule_yaml in self.rule_files:
             try:
-                rule = Rule.from_yaml(
-                    rule_yaml, self.env_yaml, self.product_cpes, self.sce_metadata)
+                rule = self._load_rule(rule_yaml)
             except DocumentationNotComplete:
                 # Happens on non-debug build when a rule is "documentation-incomplete"
                 continue
+            # Later build stages process rule directories of all rules,
+            # not just of the ones that apply to the product.
+            self.rules_manifest.add_rule(rule)
             prodtypes = parse_prodtype(rule.prodtype)
             if "all" not in prodtypes and self.product not in prodtypes:
                 continue
@@ -1364,6 +1472,8 @@ class BuildLoader(DirectoryLoader):
         loader.sce_metadata = self.sce_metadata
         # Do it this way so we only have to parse the STIG references once.
         loader.stig_references = self.stig_references
+        loader.rules_manifest = self.rules_manifest
+        loader.preloaded_entities = self.preloaded_entities
         return loader
 
     def export_group_to_file(self, filename):
@@ -0,0 +1,165 @@
+"""
+Tracking of dependencies of build artifacts, which enables incremental rebuilds.
+
+For every artifact, the manifest records digests of source files it has been
+built from, the digest of project macros and names of substitutions
+the build has consumed together with a digest of their values.
+An artifact is stale if any of these has changed, or if any of its
+output files is missing. Outputs of artifacts that are no longer built
+are removed together with their records.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import contextlib
+import hashlib
+import json
+import os
+
+from .jinja import (get_macros_digest, get_values_digest,
+                    record_processed_files, record_resolved_names)
+
+
+# Bump when the format of the manifest changes.
+MANIFEST_VERSION = 1
+
+
+def get_file_digest(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+class DependencyManifest(object):
+    """
+    Stores dependencies of artifacts in a JSON file.
+
+    Typical use:
+
+    >>> manifest = DependencyManifest("deps.json")
+    >>> if not manifest.is_up_to_date(key, env_yaml):
+    ...     with manifest.recording() as consumed:
+    ...         build_the_artifact()
+    ...     manifest.record(key, outputs, consumed, env_yaml)
+    >>> manifest.save()
+    """
+    def __init__(self, manifest_path):
+        self.manifest_path = manifest_path
+        self.artifacts = dict()
+        self._file_digests = dict()
+        self._macros_digest = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                contents = json.load(f)
+            if contents.get("version") == MANIFEST_VERSION:
+                self.artifacts = contents["artifacts"]
+
+    def _get_file_digest(self, filepath):
+        if filepath not in self._file_digests:
+            try:
+                self._file_digests[filepath] = get_file_digest(filepath)
+            except (IOError, OSError):
+                self._file_digests[filepath] = None
+        return self._file_digests[filepath]
+
+    def _get_macros_digest(self):
+        if self._macros_digest is None:
+            self._macros_digest = get_macros_digest()
+        return self._macros_digest
+
+    def is_up_to_date(self, key, substitutions_dict):
+        """
+        Return True if the artifact has been built before, all its outputs
+        exist and none of the dependencies has changed since then.
+        """
+        artifact = self.artifacts.get(key)
+        if artifact is None:
+            return False
+        if artifact["macros"] != self._get_macros_digest():
+            return False
+        for output in artifact["outputs"]:
+            if not os.path.exists(output):
+                return False
+        for source, digest in artifact["sources"].items():
+            if self._get_file_digest(source) != digest:
+                return False
+        env_digest = get_values_digest(artifact["env_names"], substitutions_dict)
+        return env_digest == artifact["env"]
+
+    @staticmethod
+    @contextlib.contextmanager
+    def recording():
+        """
+        Collect the sources and substitutions consumed by Jinja
+        while the context manager is active.
+        The result is a dict with "sources" and "env_names" sets,
+        which can be extended with dependencies that Jinja didn't see.
+        """
+        consumed = dict()
+        with record_processed_files() as sources:
+            with record_resolved_names() as names:
+                yield consumed
+        consumed.setdefault("sources", set()).update(sources)
+        consumed.setdefault("env_names", set()).update(names)
+
+    def get_record(self, outputs, consumed, substitutions_dict):
+        """
+        Create a record of an artifact that consists of the given outputs,
+        and that has been built using what has been consumed.
+        """
+        env_names = sorted(consumed.get("env_names", set()))
+        return dict(
+            outputs=sorted(outputs),
+            sources={
+                source: self._get_file_digest(source)
+                for source in sorted(consumed.get("sources", set()))},
+            macros=self._get_macros_digest(),
+            env_names=env_names,
+            env=get_values_digest(env_names, substitutions_dict),
+        )
+
+    def _remove_outputs(self, outputs, kept_outputs):
+        for output in outputs:
+            if output not in kept_outputs and os.path.exists(output):
+                os.remove(output)
+
+    def _get_all_outputs(self):
+        return set(
+            output for artifact in self.artifacts.values()
+            for output in artifact["outputs"])
+
+    def add_record(self, key, record):
+        """
+        Store the record of the artifact. Outputs that the previous build
+        of the artifact has created, and that aren't outputs
+        of the artifact anymore, are removed.
+        """
+        previous = self.artifacts.get(key)
+        self.artifacts[key] = record
+        if previous is not None:
+            self._remove_outputs(previous["outputs"], self._get_all_outputs())
+
+    def remove_other_artifacts(self, keys):
+        """
+        Remove records of artifacts whose keys aren't among the given keys,
+        e.g. of rules that have been deleted or renamed, together with
+        their outputs.
+        """
+        keys = set(keys)
+        removed = [key for key in self.artifacts if key not in keys]
+        removed_outputs = []
+        for key in removed:
+            removed_outputs.extend(self.artifacts.pop(key)["outputs"])
+        self._remove_outputs(removed_outputs, self._get_all_outputs())
+
+    def record(self, key, outputs, consumed, substitutions_dict):
+        self.add_record(key, self.get_record(outputs, consumed, substitutions_dict))
+
+    def save(self):
+        contents = dict(version=MANIFEST_VERSION, artifacts=self.artifacts)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(contents, f, indent=1, sort_keys=True)
+        os.rename(temp_path, self.manifest_path)
@@ -1,8 +1,14 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import collections
+import contextlib
 import os.path
+import hashlib
 import jinja2
+import jinja2.meta
+import jinja2.nodes
+import jinja2.runtime
 
 try:
     from urllib.parse import quote
@@ -71,6 +77,47 @@ class AbsolutePathFileSystemLoader(jinja2.BaseLoader):
         return contents, template, uptodate
 
 
+class _NameRecordingContext(jinja2.runtime.Context):
+    """
+    Template context that reports every name resolved through it
+    to all active recorders, see record_resolved_names.
+    """
+    recorders = []
+
+    def resolve_or_missing(self, key):
+        for recorder in _NameRecordingContext.recorders:
+            recorder.add(key)
+        return super(_NameRecordingContext, self).resolve_or_missing(key)
+
+
+@contextlib.contextmanager
+def record_resolved_names():
+    """
+    Collect names of all variables and macros that templates and macros
+    look up in their context while the context manager is active.
+    """
+    names = set()
+    _NameRecordingContext.recorders.append(names)
+    try:
+        yield names
+    finally:
+        _NameRecordingContext.recorders.pop()
+
+
+@contextlib.contextmanager
+def record_processed_files():
+    """
+    Collect absolute paths of all files processed by process_file
+    while the context manager is active.
+    """
+    filepaths = set()
+    process_file.recorders.append(filepaths)
+    try:
+        yield filepaths
+    finally:
+        process_file.recorders.pop()
+
+
 def _get_jinja_environment(substitutions_dict):
     if _get_jinja_environment.env is None:
         bytecode_cache = None
@@ -88,8 +135,12 @@ def _get_jinja_environment(substitutions_dict):
             comment_start_string="{{#",
             comment_end_string="#}}",
             loader=AbsolutePathFileSystemLoader(),
-            bytecode_cache=bytecode_cache
+            bytecode_cache=bytecode_cache,
+            # Build scripts render thousands of files,
+            # keep all compiled templates around.
+            cache_size=-1
         )
+        _get_jinja_environment.env.context_class = _NameRecordingContext
         _get_jinja_environment.env.filters['banner_anchor_wrap'] = banner_anchor_wrap
         _get_jinja_environment.env.filters['banner_regexify'] = banner_regexify
         _get_jinja_environment.env.filters['escape_id'] = escape_id
@@ -108,15 +159,18 @@ def raise_exception(message):
     raise MacroError(message)
 
 
-def update_substitutions_dict(filename, substitutions_dict):
+def update_substitutions_dict(filename, substitutions_dict, context=None):
     """
     Treat the given filename as a jinja2 file containing macro definitions,
     and export definitions that don't start with _ into the substitutions_dict,
     a name->macro dictionary. During macro compilation, symbols already
     existing in substitutions_dict may be used by those definitions.
+    If context is given, macros are compiled with the context instead.
     """
-    template = _get_jinja_environment(substitutions_dict).get_template(filename)
-    all_symbols = template.make_module(substitutions_dict).__dict__
+    if context is None:
+        context = substitutions_dict
+    template = _get_jinja_environment(context).get_template(filename)
+    all_symbols = template.make_module(context).__dict__
     for name, symbol in all_symbols.items():
         if name.startswith("_"):
             continue
@@ -130,10 +184,28 @@ def process_file(filepath, substitutions_dict):
     load the project macros; use process_file_with_macros(...) for that.
     """
     filepath = os.path.abspath(filepath)
+    for recorder in process_file.recorders:
+        recorder.add(filepath)
     template = _get_jinja_environment(substitutions_dict).get_template(filepath)
     return template.render(substitutions_dict)
 
 
+process_file.recorders = []
+
+
+def precompile_templates(filepaths, substitutions_dict=None):
+    """
+    Compile the jinja files at the given paths, so their subsequent
+    processing in this process, or in processes forked from it,
+    doesn't have to parse and compile them again.
+    """
+    if substitutions_dict is None:
+        substitutions_dict = dict()
+    environment = _get_jinja_environment(substitutions_dict)
+    for filepath in filepaths:
+        environment.get_template(os.path.abspath(filepath))
+
+
 def add_python_functions(substitutions_dict):
     substitutions_dict['prodtype_to_name'] = prodtype_to_name
     substitutions_dict['name_to_platform'] = name_to_platform
@@ -143,19 +215,173 @@ def add_python_functions(substitutions_dict):
     substitutions_dict['expand_yaml_path'] = expand_yaml_path
 
 
+# Marks a key that is absent from the substitutions dict.
+_MISSING_KEY = object()
+
+# How many compiled macro modules are kept, see _load_macro_file_cached.
+# Modules that don't read per-rule names, e.g. rule_title, are used
+# for every rule, so they stay in the cache; modules compiled for
+# a particular rule are dropped when they aren't used anymore.
+MACRO_CACHE_SIZE = 64
+
+
+def freeze(value):
+    """
+    Turn a substitutions dict value into a hashable object that can be used
+    as part of a macro cache key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(
+            ((str(k), freeze(v)) for k, v in value.items()),
+            key=lambda item: item[0]))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted((freeze(v) for v in value), key=repr))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def get_values_digest(names, substitutions_dict):
+    """
+    Return a digest of the given names and their values in the substitutions_dict.
+    Values of macros and other callables are not taken into account,
+    as they are defined by the code and by the macro files.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(names):
+        value = substitutions_dict.get(name)
+        if callable(value):
+            value = "<callable>"
+        digest.update(repr((name, freeze(value))).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _get_macro_file_info(filename, substitutions_dict):
+    """
+    Return a tuple (digest, exported_names, read_names) describing the macro file.
+
+    The digest is the SHA-256 of the file contents, exported_names are names
+    defined at the top level of the file and read_names are all names the file
+    takes from the context it is compiled in.
+    The result is cached as long as the file modification time doesn't change.
+    """
+    mtime = os.path.getmtime(filename)
+    cached = _get_macro_file_info.cache.get(filename)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(filename, "rb") as f:
+        contents = f.read()
+    digest = hashlib.sha256(contents).hexdigest()
+    ast = _get_jinja_environment(substitutions_dict).parse(contents.decode("utf-8"))
+    exported_names = set()
+    for node in ast.body:
+        if isinstance(node, jinja2.nodes.Macro):
+            exported_names.add(node.name)
+        elif isinstance(node, jinja2.nodes.Assign):
+            exported_names.update(
+                name.name for name in node.find_all(jinja2.nodes.Name)
+                if name.ctx == "store")
+    read_names = jinja2.meta.find_undeclared_variables(ast)
+    info = (digest, frozenset(exported_names), frozenset(read_names))
+    _get_macro_file_info.cache[filename] = (mtime, info)
+    return info
+
+
+_get_macro_file_info.cache = dict()
+
+
+def _get_macro_files():
+    return [
+        os.path.join(JINJA_MACROS_DIRECTORY, filename)
+        for filename in sorted(os.listdir(JINJA_MACROS_DIRECTORY))
+        if filename.endswith(".jinja")]
+
+
+def get_macros_digest():
+    """
+    Return a digest of contents of all project macro files.
+    """
+    digest = hashlib.sha256()
+    for macros_file in _get_macro_files():
+        file_digest = _get_macro_file_info(macros_file, dict())[0]
+        digest.update(os.path.basename(macros_file).encode("utf-8"))
+        digest.update(file_digest.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def precompile_macros():
+    """
+    Analyze and compile all project macro files,
+    see also precompile_templates.
+    """
+    macro_files = _get_macro_files()
+    for macros_file in macro_files:
+        _get_macro_file_info(macros_file, dict())
+    precompile_templates(macro_files)
+
+
+def _load_macro_file_cached(filename, substitutions_dict, providers):
+    """
+    Compile the macro file and export its public symbols into
+    the substitutions_dict, reusing the compiled symbols if the file
+    was already compiled with the same inputs.
+
+    The cache key consists of the file contents digest, values of the
+    substitutions the file reads, and cache keys of files that provide
+    macros the file reads. The providers dict maps names to cache keys
+    of macro files that exported them so far.
+    Only MACRO_CACHE_SIZE recently used modules are kept.
+    """
+    digest, exported_names, read_names = _get_macro_file_info(filename, substitutions_dict)
+    substitutions_key = []
+    dependencies_key = set()
+    for name in sorted(read_names):
+        if name in providers:
+            dependencies_key.add(providers[name])
+        else:
+            value = substitutions_dict.get(name, _MISSING_KEY)
+            substitutions_key.append((name, freeze(value)))
+    key = (filename, digest, tuple(substitutions_key), tuple(sorted(dependencies_key)))
+
+    cache = _load_macro_file_cached.cache
+    symbols = cache.pop(key, None)
+    if symbols is None:
+        symbols = dict()
+        update_substitutions_dict(filename, symbols, substitutions_dict)
+        while len(cache) >= MACRO_CACHE_SIZE:
+            cache.popitem(last=False)
+    cache[key] = symbols
+    substitutions_dict.update(symbols)
+    for name in exported_names:
+        providers[name] = key
+
+
+_load_macro_file_cached.cache = collections.OrderedDict()
+
+
 def load_macros(substitutions_dict=None):
     """
     Augment the substitutions_dict dict with project Jinja macros in /shared/.
+
+    Compiled macro modules are cached for the lifetime of the process,
+    so only the first call with a given set of relevant substitutions
+    pays for the macro compilation.
     """
     if substitutions_dict is None:
         substitutions_dict = dict()
 
     add_python_functions(substitutions_dict)
+    providers = dict()
+    filename = None
     try:
-        for filename in sorted(os.listdir(JINJA_MACROS_DIRECTORY)):
-            if filename.endswith(".jinja"):
-                macros_file = os.path.join(JINJA_MACROS_DIRECTORY, filename)
-                update_substitutions_dict(macros_file, substitutions_dict)
+        for macros_file in _get_macro_files():
+            filename = os.path.basename(macros_file)
+            _load_macro_file_cached(macros_file, substitutions_dict, providers)
     except Exception as exc:
         msg = ("Error extracting macro definitions from '{1}': {0}"
                .format(str(exc), filename))
@@ -164,6 +390,15 @@ def load_macros(substitutions_dict=None):
     return substitutions_dict
 
 
+def clear_macros_cache():
+    """
+    Drop all compiled macro modules, so the next load_macros call
+    compiles the macro files again.
+    """
+    _get_macro_file_info.cache.clear()
+    _load_macro_file_cached.cache.clear()
+
+
 def process_file_with_macros(filepath, substitutions_dict):
     """
     Process the file with jinja macros at the given path with the specified
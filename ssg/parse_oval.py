@@ -21,9 +21,75 @@ CONTAINER_GROUPS = set((
 ))
 
 
-class ElementFinder(object):
+class OVALReferenceGraph(object):
+    """
+    Follows references between elements of OVAL container groups,
+    e.g. from criteria to tests, from tests to objects and states and from
+    objects and states to variables, to find elements of a given kind.
+
+    Elements found through each referenced element are memoized, so elements
+    referenced from many places, e.g. shared tests or variables, are searched
+    only once no matter how many definitions are resolved.
+    """
     def __init__(self, oval_groups):
         self.oval_groups = oval_groups
+        self._found_through_references = dict()
+
+    def find(self, start_element, target_element_name, sought_attrib):
+        """
+        Return the set of values of the sought attribute of all elements
+        with the given name that are in the subtree of the start element,
+        or that can be reached from it through references.
+        """
+        result = set()
+        elements = [start_element]
+        while elements:
+            element = elements.pop()
+            if element.tag.endswith(target_element_name):
+                result.add(element.attrib[sought_attrib])
+                continue
+            reference = self._get_reference(element)
+            if reference is not None:
+                result.update(self._find_through_reference(
+                    reference, target_element_name, sought_attrib))
+            elements.extend(element)
+        return result
+
+    def _find_through_reference(self, reference, target_element_name, sought_attrib):
+        key = (reference, target_element_name, sought_attrib)
+        found = self._found_through_references.get(key)
+        if found is None:
+            reference_target, entity_id = reference
+            found = frozenset(self.find(
+                self.oval_groups[reference_target][entity_id],
+                target_element_name, sought_attrib))
+            self._found_through_references[key] = found
+        return found
+
+    def _get_reference(self, element):
+        reference_target = _get_referenced_group_of_tag(element.tag)
+        if reference_target is not None:
+            return reference_target, element.text
+
+        if not element.attrib:
+            return None
+        _attr_group = _search_element_for_reference_attributes(element)
+        if _attr_group is not None:
+            ref_attribute_name, entity_id = _attr_group
+            reference_target = REFERENCE_TO_GROUP[ref_attribute_name]
+            assert entity_id in self.oval_groups[reference_target], \
+                ('Missing definition: "%s" in "%s" "%s"' %
+                 (entity_id, reference_target, element))
+            return reference_target, entity_id
+        return None
+
+
+class ElementFinder(object):
+    def __init__(self, oval_groups, reference_graph=None):
+        self.oval_groups = oval_groups
+        if reference_graph is None:
+            reference_graph = OVALReferenceGraph(oval_groups)
+        self.reference_graph = reference_graph
         self.target = None
         self.attrib = None
         self.result = set()
@@ -31,37 +97,8 @@ class ElementFinder(object):
     def find_element(self, start_element, target_element_name, sought_attrib):
         self.target = target_element_name
         self.attrib = sought_attrib
-        self.result = set()
-        self._recurse(start_element)
-
-    def _recurse(self, element):
-        if element.tag.endswith(self.target):
-            self.result.add(element.attrib[self.attrib])
-            return
-
-        self._examine_element(element)
-        for child in element:
-            self._recurse(child)
-
-    def _examine_element(self, element):
-        name = _strip_ns_from_tag(element.tag)
-        new_root = None
-
-        if name in REFERENCE_TO_GROUP:
-            reference_target = REFERENCE_TO_GROUP[name]
-            new_root = self.oval_groups[reference_target][element.text]
-        else:
-            _attr_group = _search_element_for_reference_attributes(element)
-            if _attr_group is not None:
-                ref_attribute_name, entity_id = _attr_group
-                reference_target = REFERENCE_TO_GROUP[ref_attribute_name]
-                assert entity_id in self.oval_groups[reference_target], \
-                    ('Missing definition: "%s" in "%s" "%s"' %
-                     (entity_id, reference_target, element))
-                new_root = self.oval_groups[reference_target][entity_id]
-
-        if new_root is not None:
-            self._recurse(new_root)
+        self.result = self.reference_graph.find(
+            start_element, target_element_name, sought_attrib)
 
 
 def _sort_by_id(elements):
@@ -71,34 +108,76 @@ def _sort_by_id(elements):
     return ret
 
 
-def _search_dict_for_items_that_end_with(dic, what_to_look_for):
-    for item in dic:
-        if item.endswith(what_to_look_for):
-            return dic[item]
-    return None
+# Precedence of reference attribute names, the first one found is followed.
+_REFERENCE_ATTRIBUTE_PRECEDENCE = dict(
+    (name, index) for index, name in enumerate(REFERENCE_TO_GROUP))
 
 
-def _search_element_for_reference_attributes(element):
-    for ref_attribute_name in REFERENCE_TO_GROUP:
-        occurence = _search_dict_for_items_that_end_with(
-            element.attrib, ref_attribute_name)
-        if occurence is not None:
-            return ref_attribute_name, occurence
-    return None
+def _get_referenced_group_of_tag(tag):
+    """
+    Return the container group referenced by text of elements with the tag,
+    or None if the elements are not references. Results are cached,
+    as an OVAL document uses just a few distinct tags.
+    """
+    cache = _get_referenced_group_of_tag.cache
+    if tag not in cache:
+        cache[tag] = REFERENCE_TO_GROUP.get(_strip_ns_from_tag(tag))
+    return cache[tag]
 
 
-def _find_attr(oval_groups, defn, elem, attr):
-    finder = ElementFinder(oval_groups)
+_get_referenced_group_of_tag.cache = dict()
+
+
+def _get_reference_attribute_name(attribute_name):
+    """
+    Return the reference attribute name the given attribute name ends with,
+    or None if there is no such one. Results are cached,
+    as an OVAL document uses just a few distinct attribute names.
+    """
+    cache = _get_reference_attribute_name.cache
+    if attribute_name not in cache:
+        cache[attribute_name] = None
+        for ref_attribute_name in REFERENCE_TO_GROUP:
+            if attribute_name.endswith(ref_attribute_name):
+                cache[attribute_name] = ref_attribute_name
+                break
+    return cache[attribute_name]
+
+
+_get_reference_attribute_name.cache = dict()
+
+
+def _search_element_for_reference_attributes(element):
+    found = None
+    for attribute_name, value in element.attrib.items():
+        ref_attribute_name = _get_reference_attribute_name(attribute_name)
+        if ref_attribute_name is None:
+            continue
+        if found is None or (
+                _REFERENCE_ATTRIBUTE_PRECEDENCE[ref_attribute_name] <
+                _REFERENCE_ATTRIBUTE_PRECEDENCE[found[0]]):
+            found = (ref_attribute_name, value)
+    return found
+
+
+def _find_attr(oval_groups, defn, elem, attr, reference_graph=None):
+    finder = ElementFinder(oval_groups, reference_graph)
     finder.find_element(defn, elem, attr)
     return finder.result
 
 
-def resolve_definition(oval_groups, defn):
-    return _find_attr(oval_groups, defn, "external_variable", "id")
+def resolve_definition(oval_groups, defn, reference_graph=None):
+    """
+    Return IDs of external variables the definition uses.
+    Pass the same OVALReferenceGraph of the oval_groups to resolve
+    many definitions, so they can share what has been resolved.
+    """
+    return _find_attr(oval_groups, defn, "external_variable", "id", reference_graph)
 
 
-def find_extending_defs(oval_groups, defn):
-    return _find_attr(oval_groups, defn, "extend_definition", "definition_ref")
+def find_extending_defs(oval_groups, defn, reference_graph=None):
+    return _find_attr(
+        oval_groups, defn, "extend_definition", "definition_ref", reference_graph)
 
 
 def get_container_groups(fname):
@@ -122,9 +201,11 @@ def _get_container_oval_groups_from_tree(element_tree):
 
 
 def _get_resolved_definitions(oval_groups):
+    reference_graph = OVALReferenceGraph(oval_groups)
     def_id_to_vars_ids = {}
     for def_id, def_el in oval_groups["definitions"].items():
-        def_id_to_vars_ids[def_id] = resolve_definition(oval_groups, def_el)
+        def_id_to_vars_ids[def_id] = resolve_definition(
+            oval_groups, def_el, reference_graph)
     return def_id_to_vars_ids
 
 
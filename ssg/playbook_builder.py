@@ -20,7 +20,7 @@ COMMENTS_TO_PARSE = ["strategy", "complexity", "disruption"]
 
 class PlaybookBuilder():
     def __init__(self, product_yaml_path, input_dir, output_dir, rules_dir, profiles_dir,
-                 build_config_yaml):
+                 build_config_yaml, parsed_ansible_remediations=None):
         self.input_dir = input_dir
         self.output_dir = output_dir
         self.rules_dir = rules_dir
@@ -37,6 +37,10 @@ class PlaybookBuilder():
             "additional_content_directories", [])
         self.add_content_dirs = [os.path.abspath(os.path.join(product_dir, rd))
                                  for rd in additional_content_directories]
+        # ssg.build_remediations.ParsedAnsibleRemediations written by
+        # collect_remediations.py, used instead of parsing the snippets
+        self.parsed_ansible_remediations = parsed_ansible_remediations
+        self.rule_titles = dict()
 
     def choose_variable_value(self, var_id, variables, refinements):
         """
@@ -118,9 +122,25 @@ class PlaybookBuilder():
                     yield (xccdf_value.id_, options,)
 
     def _find_rule_title(self, rule_id):
-        rule_path = os.path.join(self.rules_dir, rule_id + ".yml")
-        rule_yaml = ssg.yaml.open_raw(rule_path)
-        return rule_yaml["title"]
+        if rule_id not in self.rule_titles:
+            rule_path = os.path.join(self.rules_dir, rule_id + ".yml")
+            rule_yaml = ssg.yaml.open_raw(rule_path)
+            self.rule_titles[rule_id] = rule_yaml["title"]
+        return self.rule_titles[rule_id]
+
+    def _load_snippet(self, snippet_path, rule_id):
+        """
+        Return a RemediationObject of the Ansible snippet
+        with the parsed snippet YAML as contents.
+        """
+        if self.parsed_ansible_remediations is not None:
+            fix = self.parsed_ansible_remediations.get(rule_id, snippet_path)
+            if fix is not None:
+                return fix
+        with open(snippet_path, "r") as snippet_file:
+            snippet_str = snippet_file.read()
+        fix = ssg.build_remediations.split_remediation_content_and_metadata(snippet_str)
+        return fix._replace(contents=ssg.yaml.ordered_load(fix.contents))
 
     def create_playbook(self, snippet_path, rule_id, variables,
                         refinements, output_dir):
@@ -128,11 +148,8 @@ class PlaybookBuilder():
         Creates a Playbook from Ansible snippet for the given rule specified
         by rule ID, fills in the profile values and saves it into output_dir.
         """
-
-        with open(snippet_path, "r") as snippet_file:
-            snippet_str = snippet_file.read()
-        fix = ssg.build_remediations.split_remediation_content_and_metadata(snippet_str)
-        snippet_yaml = ssg.yaml.ordered_load(fix.contents)
+        fix = self._load_snippet(snippet_path, rule_id)
+        snippet_yaml = fix.contents
 
         play_tasks, play_vars = self.get_data_from_snippet(
             snippet_yaml, variables, refinements
@@ -145,6 +162,9 @@ class PlaybookBuilder():
                 (rule_id, snippet_path)
             )
 
+        # Parsed snippets are shared by playbooks of all profiles,
+        # so the tags are removed from copies of the tasks.
+        play_tasks = [OrderedDict(task) for task in play_tasks]
         tags = set()
         for task in play_tasks:
             tags |= set(task.pop("tags", []))
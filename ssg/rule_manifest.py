@@ -0,0 +1,136 @@
+"""
+Manifest of rules loaded by compile_all.py.
+
+Later build stages need only a few properties of rules, e.g. their IDs,
+titles or prodtypes, to process files in rule directories.
+Instead of expanding and parsing every rule.yml file again,
+they can look the properties up in the manifest.
+Entries of rules whose rule.yml file has changed since the manifest
+has been written are ignored, so the stages can always fall back
+to loading the rule.
+"""
+
+from __future__ import absolute_import
+from __future__ import print_function
+
+import json
+import os
+from copy import deepcopy
+
+from .dependencies import get_file_digest
+from .jinja import get_macros_digest
+
+
+# Bump when the format of the manifest changes.
+RULES_MANIFEST_VERSION = 1
+
+# Name of the manifest file in the directory of the resolved product content.
+RULES_MANIFEST_FILENAME = "rules_manifest.json"
+
+
+def _is_debug_build(env_yaml):
+    # Rules with incomplete documentation are loaded only by debug builds.
+    return env_yaml.get("cmake_build_type") == "Debug"
+
+
+def get_rule_entry(rule):
+    """
+    Return a manifest entry of the rule loaded from its rule.yml file,
+    i.e. before the rule is made specific to the product.
+    """
+    return dict(
+        id=rule.id_,
+        title=rule.title,
+        prodtype=rule.prodtype,
+        platforms=sorted(rule.platforms),
+        template=deepcopy(rule.template),
+        identifiers=deepcopy(rule.identifiers),
+        definition_location=rule.definition_location,
+        source=get_file_digest(rule.definition_location),
+    )
+
+
+class ManifestRule(object):
+    """
+    Rule properties recorded in the manifest.
+    The attributes are named after the corresponding ones of
+    ssg.build_yaml.Rule, so the object can stand in for the rule
+    where only these are needed.
+    """
+    def __init__(self, entry):
+        self.id_ = entry["id"]
+        self.title = entry["title"]
+        self.prodtype = entry["prodtype"]
+        self.platforms = set(entry["platforms"])
+        self.template = entry["template"]
+        self.identifiers = entry["identifiers"]
+        self.definition_location = entry["definition_location"]
+
+
+class RulesManifest(object):
+    """
+    Stores manifest entries of rules, see get_rule_entry, in a JSON file.
+    Entries are indexed by absolute paths of rule.yml files.
+
+    The manifest is specific to the product and to the build type
+    given by the environment, and to the project macros.
+    """
+    def __init__(self, env_yaml):
+        self.product = env_yaml["product"]
+        self.debug_build = _is_debug_build(env_yaml)
+        self.rules = dict()
+
+    def add_rule(self, rule):
+        path = os.path.abspath(rule.definition_location)
+        self.rules[path] = get_rule_entry(rule)
+
+    def get_rule(self, rule_yaml_path):
+        """
+        Return the ManifestRule of the given rule.yml file,
+        or None if the manifest has no up-to-date entry for it.
+        """
+        path = os.path.abspath(rule_yaml_path)
+        entry = self.rules.get(path)
+        if entry is None:
+            return None
+        try:
+            if get_file_digest(path) != entry["source"]:
+                return None
+        except (IOError, OSError):
+            return None
+        return ManifestRule(entry)
+
+    def save(self, path):
+        contents = dict(
+            version=RULES_MANIFEST_VERSION,
+            product=self.product,
+            debug_build=self.debug_build,
+            macros=get_macros_digest(),
+            rules=self.rules,
+        )
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(contents, f, indent=1, sort_keys=True)
+        os.rename(temp_path, path)
+
+    @classmethod
+    def load(cls, path, env_yaml):
+        """
+        Return the manifest stored in the file, or None if the file doesn't
+        exist, or if the manifest doesn't match the environment or the macros.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            contents = json.load(f)
+        if contents.get("version") != RULES_MANIFEST_VERSION:
+            return None
+        manifest = cls(env_yaml)
+        if contents["product"] != manifest.product:
+            return None
+        if contents["debug_build"] != manifest.debug_build:
+            return None
+        if contents["macros"] != get_macros_digest():
+            return None
+        manifest.rules = contents["rules"]
+        return manifest
@@ -2,8 +2,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import os
-import imp
 import glob
+import multiprocessing
+import timeit
 
 from collections import namedtuple
 
@@ -38,6 +39,19 @@ PREPROCESSING_FILE_NAME = "template.py"
 TEMPLATE_YAML_FILE_NAME = "template.yml"
 
 
+def _load_module_from_file(module_name, file_path):
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        # Python 2 doesn't have importlib.util
+        import imp
+        return imp.load_source(module_name, file_path)
+    spec = spec_from_file_location(module_name, file_path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
 class Template:
     def __init__(self, templates_root_directory, name):
         self.langs = []
@@ -46,6 +60,40 @@ class Template:
         self.template_path = os.path.join(self.templates_root_directory, self.name)
         self.template_yaml_path = os.path.join(self.template_path, TEMPLATE_YAML_FILE_NAME)
         self.preprocessing_file_path = os.path.join(self.template_path, PREPROCESSING_FILE_NAME)
+        self._preprocess_function = None
+        # Counters of how many times and for how long in total
+        # was the template preprocessed and rendered
+        self.preprocessing_count = 0
+        self.preprocessing_time = 0.0
+        self.rendering_count = 0
+        self.rendering_time = 0.0
+
+    def __getstate__(self):
+        # Functions of dynamically loaded modules can't be pickled,
+        # the module will be loaded again when needed.
+        state = self.__dict__.copy()
+        state["_preprocess_function"] = None
+        return state
+
+    def get_source_files(self):
+        """
+        Return paths of files that define the template,
+        except for the language implementations, which are processed by Jinja.
+        """
+        source_files = [self.template_yaml_path]
+        if self.preprocessing_file_path is not None:
+            source_files.append(self.preprocessing_file_path)
+        return source_files
+
+    def get_timing_counters(self):
+        return (self.preprocessing_count, self.preprocessing_time,
+                self.rendering_count, self.rendering_time)
+
+    def add_timing_counters(self, counters):
+        self.preprocessing_count += counters[0]
+        self.preprocessing_time += counters[1]
+        self.rendering_count += counters[2]
+        self.rendering_time += counters[3]
 
     @classmethod
     def load_template(cls, templates_root_directory, name):
@@ -75,16 +123,23 @@ class Template:
             self.langs.append(lang)
 
     def preprocess(self, parameters, lang):
+        start = timeit.default_timer()
         parameters = self._preprocess_with_template_module(parameters, lang)
         # TODO: Remove this right after the variables in templates are renamed to lowercase
         parameters = {k.upper(): v for k, v in parameters.items()}
+        self.preprocessing_count += 1
+        self.preprocessing_time += timeit.default_timer() - start
         return parameters
 
-    def _preprocess_with_template_module(self, parameters, lang):
-        if self.preprocessing_file_path is not None:
+    def _get_preprocess_function(self):
+        """
+        Load the preprocessing module of the template and return
+        its preprocess function. The module is loaded only once.
+        """
+        if self._preprocess_function is None:
             unique_dummy_module_name = "template_" + self.name
-            preprocess_mod = imp.load_source(unique_dummy_module_name,
-                                             self.preprocessing_file_path)
+            preprocess_mod = _load_module_from_file(unique_dummy_module_name,
+                                                    self.preprocessing_file_path)
             if not hasattr(preprocess_mod, "preprocess"):
                 msg = (
                     "The '{name}' template's preprocessing file {preprocessing_file} "
@@ -92,9 +147,27 @@ class Template:
                     .format(name=self.name, preprocessing_file=self.preprocessing_file_path)
                 )
                 raise ValueError(msg)
-            parameters = preprocess_mod.preprocess(parameters.copy(), lang)
+            self._preprocess_function = preprocess_mod.preprocess
+        return self._preprocess_function
+
+    def _preprocess_with_template_module(self, parameters, lang):
+        if self.preprocessing_file_path is not None:
+            preprocess_function = self._get_preprocess_function()
+            parameters = preprocess_function(parameters.copy(), lang)
         return parameters
 
+    def render(self, lang, jinja_dict):
+        """
+        Render the template implementation for the given language
+        with the given substitutions and return the result.
+        """
+        start = timeit.default_timer()
+        template_file_path = os.path.join(self.template_path, lang.name + ".template")
+        result = ssg.jinja.process_file_with_macros(template_file_path, jinja_dict)
+        self.rendering_count += 1
+        self.rendering_time += timeit.default_timer() - start
+        return result
+
     def _looks_like_template(self):
         if not os.path.isdir(self.template_path):
             return False
@@ -106,6 +179,30 @@ class Template:
         return True
 
 
+def _init_rule_building_worker(builder):
+    _build_rule_file_in_worker.builder = builder
+
+
+def _build_rule_file_in_worker(rule_file):
+    """
+    Build templated content of the rule in a worker process of the Builder.
+    Returns the dependency record of the rule and changes of the template
+    timing counters, so the main process can account for them.
+    """
+    builder = _build_rule_file_in_worker.builder
+    counters_before = builder.get_timing_counters()
+    record = builder.build_rule_file(rule_file)
+    counters_diff = dict()
+    for name, counters in builder.get_timing_counters().items():
+        before = counters_before[name]
+        if counters != before:
+            counters_diff[name] = tuple(c - b for c, b in zip(counters, before))
+    return rule_file, record, counters_diff
+
+
+_build_rule_file_in_worker.builder = None
+
+
 class Builder(object):
     """
     Class for building all templated content for a given product.
@@ -115,9 +212,14 @@ class Builder(object):
     templates, path to the output directory for checks and a path to the
     output directory for remediations into the constructor. Then, call the
     method build() to perform a build.
+
+    If a ssg.dependencies.DependencyManifest is passed, templated content
+    is rebuilt only for rules whose dependencies have changed since
+    the previous build, and the manifest is updated accordingly.
     """
     def __init__(self, env_yaml, resolved_rules_dir, templates_dir,
-                 remediations_dir, checks_dir, platforms_dir, cpe_items_dir):
+                 remediations_dir, checks_dir, platforms_dir, cpe_items_dir,
+                 dependency_manifest=None):
         self.env_yaml = env_yaml
         self.resolved_rules_dir = resolved_rules_dir
         self.templates_dir = templates_dir
@@ -125,6 +227,7 @@ class Builder(object):
         self.checks_dir = checks_dir
         self.platforms_dir = platforms_dir
         self.cpe_items_dir = cpe_items_dir
+        self.dependency_manifest = dependency_manifest
         self.output_dirs = dict()
         self.templates = dict()
         self._init_lang_output_dirs()
@@ -172,13 +275,31 @@ class Builder(object):
             raise ValueError("Language {0} is not available for template {1}."
                              .format(lang.name, template_name))
 
-        template_file_name = lang.name + ".template"
-        template_file_path = os.path.join(self.templates_dir, template_name, template_file_name)
-        template_parameters = self.templates[template_name].preprocess(template_vars, lang.name)
+        template = self.templates[template_name]
+        template_parameters = template.preprocess(template_vars, lang.name)
         env_yaml = self.env_yaml.copy()
         env_yaml.update(local_env_yaml)
         jinja_dict = ssg.utils.merge_dicts(env_yaml, template_parameters)
-        return ssg.jinja.process_file_with_macros(template_file_path, jinja_dict)
+        return template.render(lang, jinja_dict)
+
+    def get_timing_report(self):
+        """
+        Return lines describing how many times each used template
+        has been preprocessed and rendered, and how long did it take.
+        Templates that took most of the time are listed first.
+        """
+        used_templates = [t for t in self.templates.values() if t.preprocessing_count]
+        used_templates.sort(
+            key=lambda t: (-(t.preprocessing_time + t.rendering_time), t.name))
+        lines = []
+        for template in used_templates:
+            lines.append(
+                "{name}: preprocessed {pcount}x in {ptime:.3f}s, "
+                "rendered {rcount}x in {rtime:.3f}s".format(
+                    name=template.name,
+                    pcount=template.preprocessing_count, ptime=template.preprocessing_time,
+                    rcount=template.rendering_count, rtime=template.rendering_time))
+        return lines
 
     def get_lang_contents_for_templatable(self, templatable, language):
         """
@@ -196,9 +317,12 @@ class Builder(object):
             raise RuntimeError("Unable to generate {0} template language for Templatable {1}: {2}"
                                .format(language.name, templatable, e))
 
-    def write_lang_contents_for_templatable(self, filled_template, lang, templatable):
+    def get_lang_output_path(self, templatable, lang):
         output_file_name = templatable.id_ + lang.file_extension
-        output_filepath = os.path.join(self.output_dirs[lang.name], output_file_name)
+        return os.path.join(self.output_dirs[lang.name], output_file_name)
+
+    def write_lang_contents_for_templatable(self, filled_template, lang, templatable):
+        output_filepath = self.get_lang_output_path(templatable, lang)
         with open(output_filepath, "w") as f:
             f.write(filled_template)
 
@@ -243,11 +367,15 @@ class Builder(object):
         """
         Builds templated content of a given Rule for all available languages,
         writing the output to the correct build directories.
+        Returns paths of the written files.
         """
+        outputs = []
         for lang in self.get_resolved_langs_to_generate(rule):
             if lang.name != "sce-bash":
                 filled_template = self.build_lang_for_templatable(rule, lang)
                 self.write_lang_contents_for_templatable(filled_template, lang, rule)
+                outputs.append(self.get_lang_output_path(rule, lang))
+        return outputs
 
     def build_extra_ovals(self):
         declaration_path = os.path.join(self.templates_dir, "extra_ovals.yml")
@@ -271,18 +399,82 @@ class Builder(object):
                                                          self.product_cpes)
             self.build_platform(platform)
 
-    def build_all_rules(self):
-        for rule_file in sorted(os.listdir(self.resolved_rules_dir)):
-            rule_path = os.path.join(self.resolved_rules_dir, rule_file)
-            try:
-                rule = ssg.build_yaml.Rule.from_yaml(rule_path, self.env_yaml, self.product_cpes)
-            except ssg.build_yaml.DocumentationNotComplete:
-                # Happens on non-debug build when a rule is "documentation-incomplete"
-                continue
-            if rule.is_templated():
-                self.build_rule(rule)
-
-    def build(self):
+    def _build_rule_file(self, rule_file, consumed):
+        rule_path = os.path.join(self.resolved_rules_dir, rule_file)
+        consumed["sources"].add(os.path.abspath(rule_path))
+        try:
+            rule = ssg.build_yaml.Rule.from_yaml(rule_path, self.env_yaml, self.product_cpes)
+        except ssg.build_yaml.DocumentationNotComplete:
+            # Happens on non-debug build when a rule is "documentation-incomplete"
+            return []
+        if not rule.is_templated():
+            return []
+        template_name = rule.get_template_name()
+        if template_name in self.templates:
+            consumed["sources"].update(
+                os.path.abspath(path)
+                for path in self.templates[template_name].get_source_files())
+        # Entity code reads the product directly from the env_yaml
+        consumed["env_names"].add("product")
+        return self.build_rule(rule)
+
+    def build_rule_file(self, rule_file):
+        """
+        Loads the resolved rule from the given file in the resolved rules directory
+        and builds its templated content.
+
+        If the builder has a dependency manifest, nothing is done when
+        the content of the rule is up to date. Otherwise, returns
+        the dependency record of the rule, which has yet to be stored
+        in the manifest.
+        """
+        manifest = self.dependency_manifest
+        if manifest is None:
+            self._build_rule_file(rule_file, dict(sources=set(), env_names=set()))
+            return None
+        if manifest.is_up_to_date(rule_file, self.env_yaml):
+            return None
+        with manifest.recording() as consumed:
+            consumed.update(sources=set(), env_names=set())
+            outputs = self._build_rule_file(rule_file, consumed)
+        return manifest.get_record(outputs, consumed, self.env_yaml)
+
+    def get_timing_counters(self):
+        return {name: t.get_timing_counters() for name, t in self.templates.items()}
+
+    def build_all_rules(self, jobs=1):
+        """
+        Builds templated content of all resolved rules.
+        If jobs is greater than one, rules are built by a pool of worker processes.
+        Every rule is written to its own files, so the output doesn't depend
+        on the order in which the workers finish.
+        With a dependency manifest, content of rules that don't exist anymore
+        is removed.
+        """
+        rule_files = sorted(os.listdir(self.resolved_rules_dir))
+        if self.dependency_manifest is not None:
+            self.dependency_manifest.remove_other_artifacts(rule_files)
+        if jobs <= 1:
+            for rule_file in rule_files:
+                self._store_dependency_record(rule_file, self.build_rule_file(rule_file))
+            return
+
+        pool = multiprocessing.Pool(jobs, _init_rule_building_worker, (self,))
+        try:
+            results = pool.imap(_build_rule_file_in_worker, rule_files, chunksize=8)
+            for rule_file, record, counters_diff in results:
+                self._store_dependency_record(rule_file, record)
+                for name, counters in counters_diff.items():
+                    self.templates[name].add_timing_counters(counters)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _store_dependency_record(self, rule_file, record):
+        if record is not None:
+            self.dependency_manifest.add_record(rule_file, record)
+
+    def build(self, jobs=1):
         """
         Builds all templated content for all languages,
         writing the output to the correct build directories.
@@ -291,5 +483,7 @@ class Builder(object):
             mkdir_p(dir_)
 
         self.build_extra_ovals()
-        self.build_all_rules()
+        self.build_all_rules(jobs)
         self.build_all_platforms()
+        if self.dependency_manifest is not None:
+            self.dependency_manifest.save()
@@ -84,6 +84,37 @@ def map_elements_to_their_ids(tree, xpath_expr):
     return aggregated
 
 
+def iterparse_elements(filename, tags):
+    """
+    Given a filename and a collection of tags, yield complete elements
+    with these tags in document order without building the whole tree.
+
+    Every other element is discarded as soon as it is parsed, and a yielded
+    element is discarded when the caller asks for the next one,
+    so memory use doesn't grow with the size of the file.
+    Elements nested in a yielded element are not yielded on their own.
+    """
+    tags = frozenset(tags)
+    ancestors = []
+    captured = None
+    for event, element in ElementTree.iterparse(filename, events=("start", "end")):
+        if event == "start":
+            if captured is None and element.tag in tags:
+                captured = element
+            ancestors.append(element)
+            continue
+        ancestors.pop()
+        if captured is not None and element is not captured:
+            continue
+        if element is captured:
+            yield element
+            captured = None
+        # All previous siblings have been removed already,
+        # so this is cheap.
+        if ancestors:
+            ancestors[-1].remove(element)
+
+
 SSG_XHTML_TAGS = [
     'table', 'tr', 'th', 'td', 'ul', 'li', 'ol',
     'p', 'code', 'strong', 'b', 'em', 'i', 'pre', 'br', 'hr', 'small',
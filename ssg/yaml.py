@@ -2,13 +2,21 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import codecs
+import hashlib
+import json
+import os
+import pickle
 import re
+import shutil
 import sys
+import tempfile
+import time
 import yaml
 
 from collections import OrderedDict
 
-from .jinja import load_macros, process_file
+from .jinja import (load_macros, process_file, record_resolved_names,
+                    get_macros_digest, get_values_digest)
 
 try:
     from yaml import CSafeLoader as yaml_SafeLoader
@@ -109,12 +117,176 @@ def open_and_expand(yaml_file, substitutions_dict=None):
     return yaml_contents
 
 
+class ExpandedYamlCache(object):
+    """
+    On-disk cache of YAML files that have been expanded by Jinja and parsed.
+
+    Entries are content-addressed. The source key is derived from the
+    source file contents, the digest of project macros and the build type.
+    As the set of substitutions the template reads may depend on their values,
+    each rendering records names it has resolved, and the result is stored
+    under a digest of those names and their values. A cached result is used
+    if values of all names that an earlier rendering has read are the same.
+    Therefore, the cache can be shared by builds of different products.
+
+    Results are touched whenever they are used, so results that no build
+    has used for some time can be removed by prune.
+    """
+    # Bump when the format of entries or the expansion process changes.
+    VERSION = "1"
+    UNCACHEABLE_SOURCE = re.compile(r"\{\{%-?\s*(include|import|from|extends)\b")
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._macros_digest = None
+
+    def _get_macros_digest(self):
+        # Macro files don't change during a build
+        if self._macros_digest is None:
+            self._macros_digest = get_macros_digest()
+        return self._macros_digest
+
+    def _get_source_key(self, source, substitutions_dict):
+        digest = hashlib.sha256()
+        digest.update(self.VERSION.encode("utf-8"))
+        digest.update(self._get_macros_digest().encode("utf-8"))
+        digest.update(str(substitutions_dict.get("cmake_build_type")).encode("utf-8"))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _load_entry(self, entry_dir, substitutions_dict):
+        try:
+            filenames = sorted(os.listdir(entry_dir))
+        except OSError:
+            return None
+        for filename in filenames:
+            if not filename.startswith("names-"):
+                continue
+            with open(os.path.join(entry_dir, filename), "r") as f:
+                names = json.load(f)
+            values_digest = get_values_digest(names, substitutions_dict)
+            result_path = os.path.join(entry_dir, values_digest + ".pickle")
+            if os.path.exists(result_path):
+                with open(result_path, "rb") as f:
+                    yaml_contents = pickle.load(f)
+                os.utime(result_path, None)
+                return yaml_contents
+        return None
+
+    @staticmethod
+    def _write_atomically(path, contents):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(contents)
+        os.rename(temp_path, path)
+
+    def _store_entry(self, entry_dir, names, substitutions_dict, yaml_contents):
+        if not os.path.isdir(entry_dir):
+            try:
+                os.makedirs(entry_dir)
+            except OSError:
+                if not os.path.isdir(entry_dir):
+                    raise
+        names = sorted(names)
+        names_json = json.dumps(names).encode("utf-8")
+        names_digest = hashlib.sha256(names_json).hexdigest()
+        values_digest = get_values_digest(names, substitutions_dict)
+        self._write_atomically(
+            os.path.join(entry_dir, values_digest + ".pickle"),
+            pickle.dumps(yaml_contents, protocol=2))
+        self._write_atomically(
+            os.path.join(entry_dir, "names-" + names_digest + ".json"), names_json)
+
+    def prune(self, max_age):
+        """
+        Remove results that haven't been used for more than max_age seconds,
+        and entries that are left without results.
+        Returns the number of removed results.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        oldest_allowed = time.time() - max_age
+        removed = 0
+        for prefix in sorted(os.listdir(self.cache_dir)):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for source_key in sorted(os.listdir(prefix_dir)):
+                entry_dir = os.path.join(prefix_dir, source_key)
+                kept_results = 0
+                for filename in os.listdir(entry_dir):
+                    if not filename.endswith(".pickle"):
+                        continue
+                    result_path = os.path.join(entry_dir, filename)
+                    if os.path.getmtime(result_path) < oldest_allowed:
+                        os.remove(result_path)
+                        removed += 1
+                    else:
+                        kept_results += 1
+                if not kept_results:
+                    shutil.rmtree(entry_dir)
+            if not os.listdir(prefix_dir):
+                os.rmdir(prefix_dir)
+        return removed
+
+    def open_and_expand(self, yaml_file, substitutions_dict):
+        """
+        Do the same as open_and_expand, but reuse results cached before.
+        Macros are expected to be loaded in the substitutions_dict.
+        """
+        with open(yaml_file, "rb") as f:
+            source = f.read()
+        if self.UNCACHEABLE_SOURCE.search(source.decode("utf-8")):
+            return open_and_expand(yaml_file, substitutions_dict)
+
+        source_key = self._get_source_key(source, substitutions_dict)
+        entry_dir = os.path.join(self.cache_dir, source_key[:2], source_key)
+        yaml_contents = self._load_entry(entry_dir, substitutions_dict)
+        if yaml_contents is not None:
+            self.hits += 1
+            return yaml_contents
+
+        self.misses += 1
+        with record_resolved_names() as names:
+            yaml_contents = open_and_expand(yaml_file, substitutions_dict)
+        self._store_entry(entry_dir, names, substitutions_dict, yaml_contents)
+        return yaml_contents
+
+
+def get_expanded_yaml_cache(substitutions_dict):
+    """
+    Return the ExpandedYamlCache configured by the substitutions_dict,
+    or None if the cache is not enabled.
+    """
+    if substitutions_dict.get("yaml_cache_enabled") != "true":
+        return None
+    cache_dir = substitutions_dict.get("yaml_cache_dir")
+    if not cache_dir:
+        return None
+    cache = get_expanded_yaml_cache.caches.get(cache_dir)
+    if cache is None:
+        cache = ExpandedYamlCache(cache_dir)
+        get_expanded_yaml_cache.caches[cache_dir] = cache
+    return cache
+
+
+get_expanded_yaml_cache.caches = dict()
+
+
 def open_and_macro_expand(yaml_file, substitutions_dict=None):
     """
     Do the same as open_and_expand, but load definitions of macros
     so they can be expanded in the template.
+
+    If the substitutions_dict enables the expanded YAML cache,
+    results are reused from the cache, see ExpandedYamlCache.
     """
     substitutions_dict = load_macros(substitutions_dict)
+    cache = get_expanded_yaml_cache(substitutions_dict)
+    if cache is not None:
+        return cache.open_and_expand(yaml_file, substitutions_dict)
     return open_and_expand(yaml_file, substitutions_dict)
 
 
@@ -47,6 +47,13 @@ def parse_args():
         "is omitted from the hypervisor, qemu:/// protocol is assumed. "
         "Example of a hypervisor domain name tuple: system ssg-test-suite")
 
+    common_parser.add_argument(
+        "--libvirt-image-id", dest="libvirt_image_id", metavar="ID", default=None,
+        help="Identifier of the current state of the libvirt domain, e.g. a version "
+        "of its snapshot, which has to change whenever the domain changes. "
+        "Results of the libvirt test environment are cached by --result-cache "
+        "only if it is given.")
+
     common_parser.add_argument(
         "--datastream", dest="datastream", metavar="DATASTREAM",
         help="Path to the Source DataStream on this machine which is going to be tested. "
@@ -222,6 +229,27 @@ def parse_args():
                              type=int,
                              help=("Allows to run only Xth slice of Y in total, to enable "
                                    "stable parallelization of the bigger test sets."))
+    parser_rule.add_argument("--pool-size",
+                             dest="pool_size",
+                             default=1,
+                             type=int,
+                             help=("Run test scenarios concurrently in this many "
+                                   "clones of the container test environment."))
+    parser_rule.add_argument("--batch-size",
+                             dest="batch_size",
+                             default=1,
+                             type=int,
+                             help=("Scan up to this many scenarios of different rules "
+                                   "by a single oscap call. Only scenarios expected to pass "
+                                   "are batched, and scenarios whose batched scan "
+                                   "doesn't pass are checked alone."))
+    parser_rule.add_argument("--result-cache",
+                             dest="result_cache",
+                             metavar="FILE",
+                             default=None,
+                             help=("Store results of passing scenarios in this file, "
+                                   "and skip scenarios whose rule content, test scripts "
+                                   "and test environment didn't change since they passed."))
 
     parser_combined = subparsers.add_parser("combined",
                                             help=("Tests all rules in a profile evaluating them "
@@ -250,6 +278,27 @@ def parse_args():
                                  type=int,
                                  help=("Allows to run only Xth slice of Y in total, to enable "
                                        "stable parallelization of the bigger test sets."))
+    parser_combined.add_argument("--pool-size",
+                                 dest="pool_size",
+                                 default=1,
+                                 type=int,
+                                 help=("Run test scenarios concurrently in this many "
+                                       "clones of the container test environment."))
+    parser_combined.add_argument("--batch-size",
+                                 dest="batch_size",
+                                 default=1,
+                                 type=int,
+                                 help=("Scan up to this many scenarios of different rules "
+                                       "by a single oscap call. Only scenarios expected to pass "
+                                       "are batched, and scenarios whose batched scan "
+                                       "doesn't pass are checked alone."))
+    parser_combined.add_argument("--result-cache",
+                                 dest="result_cache",
+                                 metavar="FILE",
+                                 default=None,
+                                 help=("Store results of passing scenarios in this file, "
+                                       "and skip scenarios whose rule content, test scripts "
+                                       "and test environment didn't change since they passed."))
     parser_combined.add_argument("target",
                                  nargs="+",
                                  metavar="TARGET",
@@ -290,6 +339,27 @@ def parse_args():
                                  type=int,
                                  help=("Allows to run only Xth slice of Y in total, to enable "
                                        "stable parallelization of the bigger test sets."))
+    parser_template.add_argument("--pool-size",
+                                 dest="pool_size",
+                                 default=1,
+                                 type=int,
+                                 help=("Run test scenarios concurrently in this many "
+                                       "clones of the container test environment."))
+    parser_template.add_argument("--batch-size",
+                                 dest="batch_size",
+                                 default=1,
+                                 type=int,
+                                 help=("Scan up to this many scenarios of different rules "
+                                       "by a single oscap call. Only scenarios expected to pass "
+                                       "are batched, and scenarios whose batched scan "
+                                       "doesn't pass are checked alone."))
+    parser_template.add_argument("--result-cache",
+                                 dest="result_cache",
+                                 metavar="FILE",
+                                 default=None,
+                                 help=("Store results of passing scenarios in this file, "
+                                       "and skip scenarios whose rule content, test scripts "
+                                       "and test environment didn't change since they passed."))
     parser_template.add_argument("target",
                                  nargs="+",
                                  metavar="TARGET",
@@ -307,6 +377,13 @@ def parse_args():
         if options.slice_current > options.slice_total:
             raise argparse.ArgumentTypeError(
                 'Current slice cannot be greater than number of slices')
+        if options.pool_size < 1:
+            raise argparse.ArgumentTypeError('Pool size needs to be positive integer')
+        if options.batch_size < 1:
+            raise argparse.ArgumentTypeError('Batch size needs to be positive integer')
+        if options.pool_size > 1 and options.libvirt:
+            raise argparse.ArgumentTypeError(
+                'Test scenarios can run concurrently only in container test environments')
     return options
 
 
@@ -444,7 +521,8 @@ def normalize_passed_arguments(options):
         if not re.match(r"[\w\+]+:///", hypervisor):
             hypervisor = "qemu:///" + hypervisor
         options.test_env = ssg_test_suite.test_env.VMTestEnv(
-            options.scanning_mode, hypervisor, domain_name, options.keep_snapshots)
+            options.scanning_mode, hypervisor, domain_name, options.keep_snapshots,
+            options.libvirt_image_id)
         logging.info(
             "The base image option has not been specified, "
             "choosing libvirt-based test environment.")
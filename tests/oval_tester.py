@@ -2,6 +2,8 @@
 
 from __future__ import print_function
 
+import collections
+import multiprocessing
 import os
 import re
 import shutil
@@ -15,25 +17,66 @@ import ssg.jinja
 import ssg.oval
 import ssg.rules
 import ssg.utils
+import ssg.xml
 import ssg.yaml
 import ssg.build_yaml
 import ssg.rule_yaml
 import ssg.id_translate
 
 
+DEFINITION_RESULT_PATTERN = re.compile(
+    r"^Definition (oval:[A-Za-z0-9_\-\.]+:def:[1-9][0-9]*): (\w+)$")
+
+
+OVALTestCase = collections.namedtuple(
+    "OVALTestCase",
+    ["description", "oval_content", "config_file_content", "expected_result"])
+
+
+def _get_results(oscap_output):
+    """
+    Return a dict that maps IDs of evaluated OVAL definitions to their results.
+    """
+    results = dict()
+    for line in oscap_output.splitlines():
+        matched = DEFINITION_RESULT_PATTERN.match(line)
+        if matched:
+            results[matched.group(1)] = matched.group(2)
+    return results
+
+
+def _evaluate_oval_file(oval_path):
+    results_path = oval_path + ".results.xml"
+    oscap_command = [
+        "oscap", "oval", "eval", "--results", results_path, oval_path]
+    oscap_process = subprocess.Popen(
+        oscap_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    oscap_stdout, oscap_stderr = oscap_process.communicate()
+    return _get_results(oscap_stdout.decode("utf-8"))
+
+
 class OVALTester(object):
-    def __init__(self, verbose):
+    """
+    Evaluates OVAL shorthands against configuration files.
+
+    By default, every test is executed right away with its own oscap run.
+    In the batch mode, tests are only recorded and executed by finish:
+    their definitions are combined into as few OVAL documents as possible,
+    and the documents are evaluated by oscap in parallel.
+    """
+    def __init__(self, verbose, batch=False, jobs=1):
         self.mock_env_yaml = {"rule_id": "test"}
         self.result = True
         self.verbose = verbose
+        self.batch = batch
+        self.jobs = jobs
+        self.test_cases = []
 
     def _get_result(self, oscap_output):
-        pattern = re.compile(
-            r"^Definition oval:[A-Za-z0-9_\-\.]+:def:[1-9][0-9]*: (\w+)$")
         for line in oscap_output.splitlines():
-            matched = pattern.match(line)
+            matched = DEFINITION_RESULT_PATTERN.match(line)
             if matched:
-                return matched.group(1)
+                return matched.group(2)
         return None
 
     def _create_config_file(self, config_file_content, tmp_dir):
@@ -43,11 +86,16 @@ class OVALTester(object):
                 f.write(config_file_content)
         return config_file_path
 
-    def _create_oval(self, oval_content, config_file_path, tmp_dir):
+    def _create_shorthand(self, oval_content, config_file_path, tmp_dir):
         oval_content = oval_content.replace("CONFIG_FILE", config_file_path)
         shorthand_path = os.path.join(tmp_dir, "shorthand")
         with open(shorthand_path, "w") as f:
             f.write(oval_content)
+        return shorthand_path
+
+    def _create_oval(self, oval_content, config_file_path, tmp_dir):
+        shorthand_path = self._create_shorthand(
+            oval_content, config_file_path, tmp_dir)
         oval_path = os.path.join(tmp_dir, "oval.xml")
         ssg.build_ovals.expand_shorthand(
             shorthand_path, oval_path, self.mock_env_yaml)
@@ -63,6 +111,18 @@ class OVALTester(object):
         def_result = self._get_result(oscap_stdout.decode("utf-8"))
         return def_result, results_path
 
+    def _report_result(self, description, result, expected_result):
+        if result == expected_result:
+            if self.verbose:
+                print("Test: %s: PASS" % (description))
+            return
+        if self.verbose:
+            msg = ("OVAL Definition was evaluated as %s, but expected result "
+                   "is %s.") % (result, expected_result)
+            print("Test: %s: FAIL" % (description))
+            print("    " + msg)
+        self.result = False
+
     def test(self, description, oval_content, config_file_content,
              expected_result):
         """
@@ -73,30 +133,138 @@ class OVALTester(object):
         config_file_content: content of the text configuration file that the
                              OVAL will check
         expected_result: expected result of evaluation of the OVAL definition
+
+        In the batch mode, the test is executed by finish.
         """
+        if self.batch:
+            self.test_cases.append(OVALTestCase(
+                description, oval_content, config_file_content, expected_result))
+            return
+        tmp_dir = tempfile.mkdtemp()
         try:
-            tmp_dir = tempfile.mkdtemp()
             config_file_path = self._create_config_file(
                 config_file_content, tmp_dir)
             oval_path = self._create_oval(
                 oval_content, config_file_path, tmp_dir)
             result, results_path = self._evaluate_oval(oval_path)
-            msg = ("OVAL Definition was evaluated as %s, but expected result "
-                   "is %s.") % (result, expected_result)
-            assert result == expected_result, msg
-            if self.verbose:
-                print("Test: %s: PASS" % (description))
-            self.result = self.result and True
-        except AssertionError as e:
-            if self.verbose:
-                print("Test: %s: FAIL" % (description))
-                print("    " + str(e))
-            self.result = False
+            self._report_result(description, result, expected_result)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def _load_test_case(self, index, test_case, tmp_dir):
+        """
+        Create the configuration file of the test case and return a tuple
+        (definition_id, shorthand_tree) of its OVAL shorthand.
+        IDs of the shorthand are derived from the test case index,
+        so shorthands of different test cases don't clash.
+        """
+        case_dir = os.path.join(tmp_dir, "case_%d" % index)
+        os.mkdir(case_dir)
+        config_file_path = self._create_config_file(
+            test_case.config_file_content, case_dir)
+        shorthand_path = self._create_shorthand(
+            test_case.oval_content, config_file_path, case_dir)
+        rule_id = "test_%d" % index
+        env_yaml = dict(self.mock_env_yaml, rule_id=rule_id)
+        shorthand_tree = ssg.build_ovals.load_shorthand(shorthand_path, env_yaml)
+        definition_id = ssg.id_translate.IDTranslator("test").generate_id(
+            "{%s}definition" % ssg.constants.oval_namespace, rule_id)
+        return definition_id, shorthand_tree
+
+    def _create_batches(self, loaded_test_cases):
+        """
+        Split the loaded test cases into lists of test case indices,
+        so shorthands of test cases in the same list don't share any IDs.
+        There are at least as many lists as jobs, if there are enough test cases.
+        """
+        max_batch_size = max(1, -(-len(loaded_test_cases) // self.jobs))
+        batches = []
+        for index, (_, shorthand_tree) in enumerate(loaded_test_cases):
+            entity_ids = set(
+                node.get("id") for node in shorthand_tree.findall(
+                    ".//{%s}def-group/*" % ssg.constants.oval_namespace)
+                if node.get("id"))
+            for batch_ids, batch_entity_ids in batches:
+                if (len(batch_ids) < max_batch_size
+                        and not entity_ids & batch_entity_ids):
+                    batch_ids.append(index)
+                    batch_entity_ids.update(entity_ids)
+                    break
+            else:
+                batches.append(([index], entity_ids))
+        return [batch_ids for batch_ids, _ in batches]
+
+    def _evaluate_oval_files(self, oval_paths):
+        if self.jobs > 1 and len(oval_paths) > 1:
+            pool = multiprocessing.Pool(min(self.jobs, len(oval_paths)))
+            try:
+                return pool.map(_evaluate_oval_file, oval_paths)
+            finally:
+                pool.terminate()
+                pool.join()
+        return [_evaluate_oval_file(oval_path) for oval_path in oval_paths]
+
+    def _evaluate_batches(self, batches, loaded_test_cases, tmp_dir):
+        """
+        Evaluate each batch of loaded test cases as one OVAL document
+        and return a dict that maps test case indices to results
+        of their definitions.
+        """
+        oval_paths = []
+        for batch_index, batch in enumerate(batches):
+            oval_path = os.path.join(tmp_dir, "batch_%d.xml" % batch_index)
+            root = ssg.build_ovals.create_oval_document(
+                [loaded_test_cases[index][1] for index in batch])
+            ssg.xml.ElementTree.ElementTree(root).write(oval_path)
+            oval_paths.append(oval_path)
+
+        case_results = dict()
+        oval_results = self._evaluate_oval_files(oval_paths)
+        for batch, results in zip(batches, oval_results):
+            for index in batch:
+                definition_id = loaded_test_cases[index][0]
+                case_results[index] = results.get(definition_id)
+        return case_results
+
+    def _run_batched_tests(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            loaded_test_cases = [
+                self._load_test_case(index, test_case, tmp_dir)
+                for index, test_case in enumerate(self.test_cases)]
+            batches = self._create_batches(loaded_test_cases)
+            case_results = self._evaluate_batches(
+                batches, loaded_test_cases, tmp_dir)
+
+            # A broken definition can make oscap reject the whole document,
+            # so evaluate test cases without a result from shared documents
+            # again, each one in its own document.
+            unresolved = [
+                index for batch in batches if len(batch) > 1
+                for index in batch if case_results[index] is None]
+            if unresolved:
+                retry_dir = os.path.join(tmp_dir, "retry")
+                os.mkdir(retry_dir)
+                reloaded_test_cases = dict(
+                    (index, self._load_test_case(
+                        index, self.test_cases[index], retry_dir))
+                    for index in unresolved)
+                case_results.update(self._evaluate_batches(
+                    [[index] for index in unresolved],
+                    reloaded_test_cases, retry_dir))
         finally:
             shutil.rmtree(tmp_dir)
 
+        for index, test_case in enumerate(self.test_cases):
+            self._report_result(
+                test_case.description, case_results[index],
+                test_case.expected_result)
+
     def finish(self):
         """
-        Exit test with an appropriate return code.
+        Execute tests recorded in the batch mode,
+        and exit test with an appropriate return code.
         """
+        if self.test_cases:
+            self._run_batched_tests()
         sys.exit(0 if self.result else 1)
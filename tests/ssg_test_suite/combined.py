@@ -6,6 +6,7 @@ import re
 
 from ssg.constants import OSCAP_PROFILE
 from ssg_test_suite import common
+from ssg_test_suite import result_cache
 from ssg_test_suite import rule
 from ssg_test_suite import xml_operations
 from ssg_test_suite import test_env
@@ -113,6 +114,10 @@ def perform_combined_check(options):
     checker.scenarios_profile = None
     checker.slice_current = options.slice_current
     checker.slice_total = options.slice_total
+    checker.pool_size = options.pool_size
+    checker.batch_size = options.batch_size
+    if options.result_cache:
+        checker.result_cache = result_cache.ScenarioResultCache(options.result_cache)
     for profile in options.target:
         # Let's keep track of originally targeted profile
         checker.profile = profile
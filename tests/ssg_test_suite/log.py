@@ -3,6 +3,7 @@ import logging
 import os
 import os.path
 import sys
+import threading
 
 from ssg.utils import mkdir_p
 
@@ -16,7 +17,6 @@ class LogHelper(object):
     the output itself.
     """
     FORMATTER = logging.Formatter('%(levelname)s - %(message)s')
-    INTERMEDIATE_LOGS = {'pass': [], 'fail': [], 'notapplicable': []}
     LOG_DIR = None
     LOG_FILE = None
 
@@ -73,6 +73,18 @@ class LogHelper(object):
         cls.LOG_DIR = _dirname
         cls.LOG_FILE = logfile
 
+    # Scenarios can run in several threads at once,
+    # so every thread preloads its logs into its own buffers.
+    _thread_data = threading.local()
+
+    @classmethod
+    def _get_intermediate_logs(cls):
+        intermediate_logs = getattr(cls._thread_data, "intermediate_logs", None)
+        if intermediate_logs is None:
+            intermediate_logs = {'pass': [], 'fail': [], 'notapplicable': []}
+            cls._thread_data.intermediate_logs = intermediate_logs
+        return intermediate_logs
+
     @classmethod
     def preload_log(cls, log_level, log_line, log_target=None):
         """Save log for later use. Fill named buffer `log_target`with the log
@@ -83,20 +95,22 @@ class LogHelper(object):
         the same log line.
         """
 
+        intermediate_logs = cls._get_intermediate_logs()
         if log_target is None:
             # None means "All"
-            for target in cls.INTERMEDIATE_LOGS:
-                cls.INTERMEDIATE_LOGS[target] += [(log_level, log_line)]
+            for target in intermediate_logs:
+                intermediate_logs[target] += [(log_level, log_line)]
         else:
-            cls.INTERMEDIATE_LOGS[log_target] += [(log_level, log_line)]
+            intermediate_logs[log_target] += [(log_level, log_line)]
 
     @classmethod
     def log_preloaded(cls, log_target):
         """Log messages preloaded in one of the named buffers. Wipe out all
         buffers afterwards.
         """
-        for log_level, log_line in cls.INTERMEDIATE_LOGS[log_target]:
+        intermediate_logs = cls._get_intermediate_logs()
+        for log_level, log_line in intermediate_logs[log_target]:
             logging.log(log_level, log_line)
         # cleanup
-        for target in cls.INTERMEDIATE_LOGS:
-            cls.INTERMEDIATE_LOGS[target] = []
+        for target in intermediate_logs:
+            intermediate_logs[target] = []
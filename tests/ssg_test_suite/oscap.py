@@ -14,6 +14,8 @@ import time
 import subprocess
 
 from ssg.constants import OSCAP_PROFILE_ALL_ID
+from ssg.constants import PREFIX_TO_NS
+import ssg.xml
 
 from ssg_test_suite.log import LogHelper
 from ssg_test_suite import test_env
@@ -57,19 +59,57 @@ def save_analysis_to_json(analysis, output_fname):
         json.dump(analysis2, f)
 
 
-def triage_xml_results(fname):
-    tree = xml.etree.ElementTree.parse(fname)
-    all_xml_results = tree.findall(".//{%s}rule-result" % _XCCDF_NS)
+def iter_rule_results(fname):
+    """
+    Yield (rule ID, result) pairs of all rule results in the XCCDF results
+    or ARF file. The file is streamed, so even large files can be analyzed
+    without loading them whole.
+    """
+    rule_results = ssg.xml.iterparse_elements(fname, ["{%s}rule-result" % _XCCDF_NS])
+    for rule_result in rule_results:
+        yield rule_result.get("idref"), rule_result.find("{%s}result" % _XCCDF_NS).text
 
+
+def triage_xml_results(fname):
     triaged = collections.defaultdict(set)
-    for result in list(all_xml_results):
-        idref = result.get("idref")
-        status = result.find("{%s}result" % _XCCDF_NS).text
+    for idref, status in iter_rule_results(fname):
         triaged[status].add(idref)
 
     return triaged
 
 
+def split_arf_by_rules(arf_path, arf_paths_by_rule_id):
+    """
+    Write a copy of the ARF for every rule that contains only the results
+    of that rule to the path the arf_paths_by_rule_id dict maps the rule ID to.
+    """
+    for prefix, uri in PREFIX_TO_NS.items():
+        xml.etree.ElementTree.register_namespace(prefix, uri)
+    tree = xml.etree.ElementTree.parse(arf_path)
+    rule_results_by_test_result = []
+    for test_result in tree.iterfind(".//{%s}TestResult" % _XCCDF_NS):
+        children = list(test_result)
+        rule_results = [
+            child for child in children if child.tag == "{%s}rule-result" % _XCCDF_NS]
+        if not rule_results:
+            continue
+        position = children.index(rule_results[0])
+        for rule_result in rule_results:
+            test_result.remove(rule_result)
+        rule_results_by_test_result.append((test_result, position, rule_results))
+
+    for rule_id, rule_arf_path in arf_paths_by_rule_id.items():
+        for test_result, position, rule_results in rule_results_by_test_result:
+            for rule_result in rule_results:
+                if rule_result.get("idref") == rule_id:
+                    test_result.insert(position, rule_result)
+        tree.write(rule_arf_path, encoding="UTF-8", xml_declaration=True)
+        for test_result, position, rule_results in rule_results_by_test_result:
+            for rule_result in rule_results:
+                if rule_result.get("idref") == rule_id:
+                    test_result.remove(rule_result)
+
+
 def get_file_remote(test_env, verbose_path, local_dir, remote_path):
     """Download a file from VM."""
     # remote_path is an absolute path of a file on remote machine
@@ -85,25 +125,48 @@ def get_file_remote(test_env, verbose_path, local_dir, remote_path):
     return success
 
 
-def find_result_id_in_output(output):
-    match = re.search('result id.*$', output, re.IGNORECASE | re.MULTILINE)
-    if match is None:
-        return None
-    # Return the right most word of the match which is the result id.
-    return match.group(0).split()[-1]
+def find_rule_result_in_output(rule_id, output):
+    # oscap --progress options outputs rule results to stdout in
+    # following format:
+    # xccdf_org....rule_accounts_password_minlen_login_defs:pass
+    match = re.findall('{0}:(.*)$'.format(rule_id),
+                       output,
+                       re.MULTILINE)
+
+    if not match:
+        # When the rule is not selected, it won't match in output
+        return "notselected"
+
+    # When --remediation is executed, there will be two entries in
+    # progress output, one for fail, and one for fixed, e.g.
+    # xccdf_org....rule_accounts_password_minlen_login_defs:fail
+    # xccdf_org....rule_accounts_password_minlen_login_defs:fixed
+    # We are interested in the last one
+    return match[-1]
+
+
+def _find_result_id(arf_path):
+    # The ID is an attribute of the TestResult start tag,
+    # so the rest of the ARF doesn't have to be parsed.
+    test_result_tag = "{%s}TestResult" % _XCCDF_NS
+    for _, element in xml.etree.ElementTree.iterparse(arf_path, events=("start",)):
+        if element.tag == test_result_tag:
+            return element.get("id")
+    return None
 
 
 def get_result_id_from_arf(arf_path, verbose_path):
-    command = ['oscap', 'info', arf_path]
-    command_string = ' '.join(command)
-    returncode, output = common.run_cmd_local(command, verbose_path)
-    if returncode != 0:
-        raise RuntimeError('{0} returned {1} exit code'.
-                           format(command_string, returncode))
-    res_id = find_result_id_in_output(output)
+    # Reading the ID from the streamed file is much cheaper
+    # than letting "oscap info" load the whole ARF.
+    try:
+        res_id = _find_result_id(arf_path)
+    except (IOError, xml.etree.ElementTree.ParseError) as exc:
+        raise RuntimeError('Failed to read {0}: {1}'.format(arf_path, exc))
     if res_id is None:
         raise RuntimeError('Failed to find result ID in {0}'
                            .format(arf_path))
+    with open(verbose_path, "a") as log_file:
+        log_file.write("Result ID of {0}: {1}\n".format(arf_path, res_id))
     return res_id
 
 
@@ -532,23 +595,7 @@ class RuleRunner(GenericRunner):
         return success
 
     def _find_rule_result_in_output(self):
-        # oscap --progress options outputs rule results to stdout in
-        # following format:
-        # xccdf_org....rule_accounts_password_minlen_login_defs:pass
-        match = re.findall('{0}:(.*)$'.format(self.rule_id),
-                           self._oscap_output,
-                           re.MULTILINE)
-
-        if not match:
-            # When the rule is not selected, it won't match in output
-            return "notselected"
-
-        # When --remediation is executed, there will be two entries in
-        # progress output, one for fail, and one for fixed, e.g.
-        # xccdf_org....rule_accounts_password_minlen_login_defs:fail
-        # xccdf_org....rule_accounts_password_minlen_login_defs:fixed
-        # We are interested in the last one
-        return match[-1]
+        return find_rule_result_in_output(self.rule_id, self._oscap_output)
 
     def _analyze_output_of_oscap_call(self):
         local_success = 1
@@ -589,6 +636,49 @@ class RuleRunner(GenericRunner):
         return self.run_stage(stage)
 
 
+class BatchRuleRunner(RuleRunner):
+    """
+    Scans several rules by a single oscap call, so the datastream is loaded
+    only once for all of them. Results of individual rules
+    are provided by get_rule_result, remediations are not supported.
+    """
+    def __init__(
+            self, environment, profile, datastream, benchmark_id,
+            rule_ids, batch_name, dont_clean, no_reports, manual_debug):
+        super(BatchRuleRunner, self).__init__(
+            environment, profile, datastream, benchmark_id,
+            rule_ids[0], batch_name, dont_clean, no_reports, manual_debug)
+        self.rule_ids = rule_ids
+
+    def make_oscap_call(self):
+        self.prepare_online_scanning_arguments()
+        if self.create_reports:
+            self._generate_report_file()
+        for rule_id in self.rule_ids:
+            self.command_options.extend(['--rule', rule_id])
+        returncode, self._oscap_output = self.environment.scan(
+            self.command_options + self.command_operands, self.verbose_path)
+
+        if self.create_reports:
+            self.environment.arf_to_html(self.arf_path)
+
+        if returncode not in [0, 2]:
+            logging.error(('Batched scan should end with return code 0 or 2 '
+                           'not "{0}" as it did!').format(returncode))
+            return 0
+        return 1
+
+    def remediation(self):
+        raise NotImplementedError("Batched runs support only scans.")
+
+    def get_rule_result(self, rule_id):
+        return find_rule_result_in_output(rule_id, self._oscap_output)
+
+    def split_arf(self, arf_paths_by_rule_id):
+        if self.create_reports and os.path.exists(self.arf_path):
+            split_arf_by_rules(self.arf_path, arf_paths_by_rule_id)
+
+
 class OscapProfileRunner(ProfileRunner):
     def remediation(self):
         self.command_options += ['--remediate']
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+from __future__ import print_function
+
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from ssg_test_suite import common
+
+
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+# Bump when the format of cached results or of their keys changes.
+CACHE_VERSION = 1
+
+
+def get_scenario_key(*parts):
+    """
+    Return a digest of the given strings that identifies a test scenario run.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ScenarioResultCache(object):
+    """
+    Results of passing test scenario runs stored in a JSON file.
+
+    Results are looked up by keys that cover all inputs of a scenario run,
+    see get_scenario_key, so a cached result can be reused instead of
+    running the scenario again.
+
+    The cache can be shared by checkers running in several threads.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.results = dict()
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                contents = json.load(f)
+            if contents.get("version") == CACHE_VERSION:
+                self.results = contents["results"]
+            else:
+                logging.warning(
+                    "Ignoring results cached in {0} by a different version "
+                    "of the test suite.".format(path))
+
+    def get(self, key):
+        with self.lock:
+            return self.results.get(key)
+
+    def store(self, key, result):
+        """
+        Store the result dict of a scenario run if the scenario passed.
+        """
+        if common.RuleResult(result).success:
+            with self.lock:
+                self.results[key] = result
+
+    def save(self):
+        with self.lock:
+            contents = dict(version=CACHE_VERSION, results=dict(self.results))
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(contents, f, indent=1, sort_keys=True)
+        os.rename(temp_path, self.path)
@@ -2,7 +2,6 @@ from __future__ import print_function
 
 import logging
 import os
-import shutil
 import os.path
 import re
 import subprocess
@@ -11,6 +10,7 @@ import json
 import fnmatch
 import tempfile
 import contextlib
+import copy
 import itertools
 import math
 
@@ -19,6 +19,7 @@ from ssg_test_suite import oscap
 from ssg_test_suite import xml_operations
 from ssg_test_suite import test_env
 from ssg_test_suite import common
+from ssg_test_suite import result_cache
 from ssg_test_suite.log import LogHelper
 
 import ssg.templates
@@ -62,20 +63,6 @@ def get_viable_profiles(selected_profiles, datastream, benchmark, script=None):
     return valid_profiles
 
 
-def generate_xslt_change_value_template(value_short_id, new_value):
-    XSLT_TEMPLATE = """<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform" xmlns:ds="http://scap.nist.gov/schema/scap/source/1.2" xmlns:xccdf-1.2="http://checklists.nist.gov/xccdf/1.2">
-    <xsl:output omit-xml-declaration="yes" indent="yes"/>
-        <xsl:strip-space elements="*"/>
-        <xsl:template match="node()|@*">
-            <xsl:copy>
-                <xsl:apply-templates select="node()|@*"/>
-            </xsl:copy>
-        </xsl:template>
-        <xsl:template match="ds:component/xccdf-1.2:Benchmark//xccdf-1.2:Value[@id='xccdf_org.ssgproject.content_value_{value_short_id}']/xccdf-1.2:value[not(@selector)]/text()">{new_value}</xsl:template>
-</xsl:stylesheet>"""
-    return XSLT_TEMPLATE.format(value_short_id=value_short_id, new_value=new_value)
-
-
 def _apply_script(rule_dir, test_env, script):
     """Run particular test script on VM and log it's output."""
     logging.debug("Applying script {0}".format(script))
@@ -129,6 +116,13 @@ class RuleChecker(oscap.Checker):
         self.rule_spec = None
         self.template_spec = None
         self.scenarios_profile = None
+        self.pool_size = 1
+        self._queued_scenarios = []
+        self.batch_size = 1
+        self._batchable_scenarios = []
+        self.result_cache = None
+        self._environment_image_id = None
+        self._helper_content_keys = dict()
 
     def _run_test(self, profile, test_data):
         scenario = test_data["scenario"]
@@ -454,6 +448,18 @@ class RuleChecker(oscap.Checker):
 
         self._prepare_environment(test_content_by_rule_id)
 
+        if self.result_cache is not None:
+            self._environment_image_id = self.test_env.get_image_id()
+            if self._environment_image_id is None:
+                logging.warning(
+                    "Changes of the {0} test environment can't be detected, "
+                    "results of scenarios won't be cached.".format(self.test_env.name))
+                self.result_cache = None
+        if self.result_cache is not None:
+            for rule_id, test_content in test_content_by_rule_id.items():
+                self._helper_content_keys[rule_id] = result_cache.get_scenario_key(
+                    *itertools.chain.from_iterable(sorted(test_content.other_content.items())))
+
         with test_env.SavedState.create_from_environment(
                 self.test_env, "tests_uploaded") as state:
             for rule in rules_to_test:
@@ -463,6 +469,8 @@ class RuleChecker(oscap.Checker):
                 except KeyError:
                     # rule is not processed in given slice
                     pass
+            self._check_batched_scenarios(state)
+            self._check_queued_scenarios(state)
 
     def _check_rule(self, rule, scenarios, remote_dir, state, remediation_available):
         remote_rule_dir = os.path.join(remote_dir, rule.short_id)
@@ -472,56 +480,270 @@ class RuleChecker(oscap.Checker):
 
         args_list = [
             (s, remote_rule_dir, rule.id, remediation_available) for s in scenarios
+            if not self._use_cached_result(s, rule.id)
         ]
-        state.map_on_top(self._check_and_record_rule_scenario, args_list)
+        if self.batch_size > 1:
+            args_list = self._batch_scenarios(rule, args_list)
+        if self.pool_size > 1:
+            self._queued_scenarios.extend(args_list)
+        else:
+            state.map_on_top(self._check_and_record_rule_scenario, args_list)
 
-    def _check_and_record_rule_scenario(self, scenario, remote_rule_dir, rule_id, remediation_available):
-        self._current_result = common.RuleResult()
+    def _map_on_state(self, state, function_name, args_list):
+        """
+        Call the method with every args from the list in the environment reset
+        to the state, or in a pool of environments cloned from the state.
+        Results recorded by the calls are merged in the order of args_list.
+
+        Returns return values of the calls.
+        """
+        if self.pool_size > 1:
+            args_list = [(function_name,) + tuple(args) for args in args_list]
+            outcomes = state.map_on_clones(self._call_in_environment, args_list, self.pool_size)
+            return_values = []
+            for results, executed_tests, return_value in outcomes:
+                self.results.extend(results)
+                self.executed_tests += executed_tests
+                return_values.append(return_value)
+            return return_values
+
+        return_values = []
+
+        def call(*args):
+            return_values.append(getattr(self, function_name)(*args))
+        state.map_on_top(call, args_list)
+        return return_values
+
+    def _clone_for_environment(self, environment):
+        """
+        Return a shallow copy of the checker that runs in the environment.
+        Containers the checker fills while checking scenarios are replaced
+        by new ones, so threads of the pool don't share them.
+        The result cache is shared, it is safe to use from several threads.
+        """
+        checker = copy.copy(self)
+        checker.test_env = environment
+        checker.results = []
+        checker.executed_tests = 0
+        checker._current_result = None
+        checker._queued_scenarios = []
+        checker._batchable_scenarios = []
+        checker.used_templated_test_scenarios = copy.deepcopy(
+            self.used_templated_test_scenarios)
+        checker._helper_content_keys = dict(self._helper_content_keys)
+        return checker
+
+    def _call_in_environment(self, environment, function_name, *args):
+        checker = self._clone_for_environment(environment)
+        return_value = getattr(checker, function_name)(*args)
+        return checker.results, checker.executed_tests, return_value
+
+    def _check_queued_scenarios(self, state):
+        """
+        Check all queued scenarios in a pool of environments cloned
+        from the state, and merge their results in the order of the queue.
+        """
+        args_list = self._queued_scenarios
+        self._queued_scenarios = []
+        if not args_list:
+            return
+        self._map_on_state(state, "_check_and_record_rule_scenario", args_list)
+
+    def _get_batch_profile(self, scenario):
+        """
+        Return the profile to scan the scenario with if the scenario can be
+        checked together with scenarios of other rules, None otherwise.
 
-        self._current_result.conditions = common.Scenario_conditions(
+        Such scenarios are expected to pass, so they need only the initial
+        scan using a single profile, and they don't change values of variables.
+        Scripts of other scenarios in a batch can make a rule fail or not
+        applicable, so only a pass is trusted as the result of a batched check.
+        """
+        if scenario.context != "pass":
+            return None
+        if scenario.script_params["variables"] or not scenario.script_params["profiles"]:
+            return None
+        profiles = get_viable_profiles(
+            scenario.script_params["profiles"], self.datastream, self.benchmark_id)
+        if len(profiles) != 1:
+            return None
+        return profiles[0]
+
+    def _batch_scenarios(self, rule, args_list):
+        """
+        Put scenarios that can be checked in batches aside,
+        and return args of scenarios that have to be checked alone.
+        """
+        # Scenarios of rules in the same group are likely to set up
+        # the same files, so they never share a batch.
+        group_dir = os.path.dirname(os.path.dirname(rule.directory))
+        unbatched = []
+        for args in args_list:
+            profile = self._get_batch_profile(args[0])
+            if profile is None:
+                unbatched.append(args)
+            else:
+                self._batchable_scenarios.append((profile, group_dir, args))
+        return unbatched
+
+    def _make_batches(self):
+        batches = []
+        open_batches = collections.defaultdict(list)
+        for profile, group_dir, args in self._batchable_scenarios:
+            for batch in open_batches[profile]:
+                if len(batch[1]) < self.batch_size and group_dir not in batch[0]:
+                    break
+            else:
+                batch = (set(), [])
+                open_batches[profile].append(batch)
+                batches.append((profile, batch[1]))
+            batch[0].add(group_dir)
+            batch[1].append(args)
+        return batches
+
+    def _check_batched_scenarios(self, state):
+        """
+        Check scenarios put aside by _batch_scenarios in batches,
+        and check scenarios whose batched checks didn't end
+        as expected again, alone.
+        """
+        batches = self._make_batches()
+        self._batchable_scenarios = []
+        if not batches:
+            return
+        leftovers = self._map_on_state(state, "_check_scenario_batch", batches)
+        args_list = list(itertools.chain.from_iterable(leftovers))
+        if args_list:
+            logging.info(
+                "Checking {0} scenarios whose batched check didn't end as expected alone."
+                .format(len(args_list)))
+        if self.pool_size > 1:
+            self._queued_scenarios.extend(args_list)
+        else:
+            state.map_on_top(self._check_and_record_rule_scenario, args_list)
+
+    def _check_scenario_batch(self, profile, batch):
+        """
+        Apply scripts of all scenarios in the batch, scan all their rules
+        by a single oscap call, and record results of scenarios whose rules
+        passed.
+
+        Returns args of scenarios that have to be checked again alone.
+        """
+        prepared = []
+        for args in batch:
+            scenario, remote_rule_dir = args[:2]
+            if _apply_script(remote_rule_dir, self.test_env, scenario.script):
+                prepared.append(args)
+        if not prepared:
+            return batch
+
+        first_scenario, _, first_rule_id = prepared[0][:3]
+        batch_name = "{0}-batch".format(first_scenario.script)
+        runner = oscap.BatchRuleRunner(
+            self.test_env, oscap.process_profile_id(profile), self.datastream,
+            self.benchmark_id, [args[2] for args in prepared], batch_name,
+            self.dont_clean, self.no_reports, self.manual_debug)
+        LogHelper.preload_log(
+            logging.INFO, "Batch of {0} scenarios using profile {1} scanned"
+            .format(len(prepared), profile), log_target='pass')
+        with runner:
+            if not runner.run_stage("initial"):
+                return batch
+
+            leftovers = [args for args in batch if args not in prepared]
+            arf_paths_by_rule_id = dict()
+            for args in prepared:
+                scenario, _, rule_id = args[:3]
+                if runner.get_rule_result(rule_id) != "pass":
+                    leftovers.append(args)
+                    continue
+                logging.info(
+                    "Script {0} using profile {1} OK".format(scenario.script, profile))
+                result = self._new_result(scenario, rule_id)
+                result.record_stage_result("preparation", True)
+                result.record_stage_result("initial_scan", True)
+                self._record_result(result, scenario, rule_id)
+                self.executed_tests += 1
+                short_rule_id = re.sub(r'.*content_rule_', '', rule_id)
+                arf_paths_by_rule_id[rule_id] = os.path.join(
+                    LogHelper.LOG_DIR, "{0}-{1}-initial-arf.xml".format(
+                        short_rule_id, scenario.script))
+            if not runner.clean_files:
+                runner.split_arf(arf_paths_by_rule_id)
+        return leftovers
+
+    def _new_result(self, scenario, rule_id):
+        result = common.RuleResult()
+        result.conditions = common.Scenario_conditions(
             self.test_env.name, self.test_env.scanning_mode,
             self.remediate_using, self.datastream)
-        self._current_result.scenario = common.Scenario_run(rule_id, scenario.script)
-        self._current_result.when = self.test_timestamp_str
+        result.scenario = common.Scenario_run(rule_id, scenario.script)
+        result.when = self.test_timestamp_str
+        return result
+
+    def _record_result(self, result, scenario, rule_id):
+        result_dict = result.save_to_dict()
+        self.results.append(result_dict)
+        if self.result_cache is not None:
+            self.result_cache.store(self._get_scenario_cache_key(scenario, rule_id), result_dict)
+
+    def _get_scenario_cache_key(self, scenario, rule_id):
+        rule_content_key = xml_operations.get_rule_content_digest(
+            self.datastream, self.benchmark_id, rule_id, scenario.script_params["profiles"])
+        return result_cache.get_scenario_key(
+            self._environment_image_id, self.test_env.scanning_mode, self.remediate_using,
+            rule_id, rule_content_key, self._helper_content_keys.get(rule_id, ""),
+            scenario.script, scenario.contents)
+
+    def _use_cached_result(self, scenario, rule_id):
+        """
+        Record the cached result of the scenario if it passed before
+        with the same content and in the same environment.
+        """
+        if self.result_cache is None:
+            return False
+        cached_result = self.result_cache.get(self._get_scenario_cache_key(scenario, rule_id))
+        if cached_result is None:
+            return False
+        logging.info(
+            "Skipping scenario {0}, it passed with the same content at {1}."
+            .format(scenario.script, cached_result["run_timestamp"]))
+        result = dict(cached_result)
+        result["cached"] = True
+        self.results.append(result)
+        return True
 
-        with self.copy_of_datastream():
-            self._check_rule_scenario(scenario, remote_rule_dir, rule_id, remediation_available)
-        self.results.append(self._current_result.save_to_dict())
+    def _check_and_record_rule_scenario(self, scenario, remote_rule_dir, rule_id, remediation_available):
+        self._current_result = self._new_result(scenario, rule_id)
+        self._check_rule_scenario(scenario, remote_rule_dir, rule_id, remediation_available)
+        self._record_result(self._current_result, scenario, rule_id)
 
     @contextlib.contextmanager
-    def copy_of_datastream(self, new_filename=None):
+    def datastream_with_values(self, assignments):
+        """
+        Make the checker use a copy of the datastream with values changed
+        according to the "varname=value" assignments while the context
+        manager is active. All values are changed by a single rewrite
+        of the datastream, and without assignments, no copy is made.
+        """
+        if not assignments:
+            yield self.datastream
+            return
+
+        values = collections.OrderedDict(
+            assignment.split("=", 1) for assignment in assignments)
         prefixed_name = common.get_prefixed_name("ds_modified")
-        old_filename = self.datastream
-        if not new_filename:
-            descriptor, new_filename = tempfile.mkstemp(prefix=prefixed_name, dir="/tmp")
-        os.close(descriptor)
-        shutil.copy(old_filename, new_filename)
-        self.datastream = new_filename
-        yield new_filename
-        self.datastream = old_filename
-        os.unlink(new_filename)
-
-    def _change_variable_value(self, varname, value):
-        descriptor, xslt_filename = tempfile.mkstemp(prefix="xslt-change-value", dir="/tmp")
-        os.close(descriptor)
-        template = generate_xslt_change_value_template(varname, value)
-        with open(xslt_filename, "w") as fp:
-            fp.write(template)
-        descriptor, temp_datastream = tempfile.mkstemp(prefix="ds-temp", dir="/tmp")
+        descriptor, new_filename = tempfile.mkstemp(prefix=prefixed_name, dir="/tmp")
         os.close(descriptor)
-        log_file_name = os.path.join(LogHelper.LOG_DIR, "env-preparation.log")
-        with open(log_file_name, "a") as log_file:
-            result = common.run_with_stdout_logging(
-                    "xsltproc", ("--output", temp_datastream, xslt_filename, self.datastream),
-                    log_file)
-            if result.returncode:
-                msg = (
-                    "Error changing value of '{varname}': {stderr}"
-                    .format(varname=varname, stderr=result.stderr)
-                )
-                raise RuntimeError(msg)
-        os.rename(temp_datastream, self.datastream)
-        os.unlink(xslt_filename)
+        old_filename = self.datastream
+        try:
+            xml_operations.change_values_in_datastream(old_filename, new_filename, values)
+            self.datastream = new_filename
+            yield new_filename
+        finally:
+            self.datastream = old_filename
+            os.unlink(new_filename)
 
     def _verify_rule_presence(self, rule_id, script, profiles):
         for profile_id in profiles:
@@ -543,10 +765,6 @@ class RuleChecker(oscap.Checker):
             self._current_result.record_stage_result("preparation", False)
             return
 
-        if scenario.script_params["variables"]:
-            for assignment in scenario.script_params["variables"]:
-                varname, value = assignment.split("=", 1)
-                self._change_variable_value(varname, value)
         self._current_result.record_stage_result("preparation", True)
         logging.debug('Using test script {0} with context {1}'
                       .format(scenario.script, scenario.context))
@@ -565,7 +783,10 @@ class RuleChecker(oscap.Checker):
         test_data = dict(scenario=scenario,
                          rule_id=rule_id,
                          remediation_available=remediation_available)
-        self.run_test_for_all_profiles(profiles, test_data)
+        # Profiles and rules don't depend on values,
+        # so the datastream is modified only for the scans.
+        with self.datastream_with_values(scenario.script_params["variables"]):
+            self.run_test_for_all_profiles(profiles, test_data)
 
         self.executed_tests += 1
 
@@ -573,6 +794,8 @@ class RuleChecker(oscap.Checker):
         super(RuleChecker, self).finalize()
         with open(os.path.join(LogHelper.LOG_DIR, "results.json"), "w") as f:
             json.dump(self.results, f)
+        if self.result_cache is not None:
+            self.result_cache.save()
 
 
 class Scenario():
@@ -675,6 +898,10 @@ def perform_rule_check(options):
     checker.slice_current = options.slice_current
     checker.slice_total = options.slice_total
     checker.keep_snapshots = options.keep_snapshots
+    checker.pool_size = options.pool_size
+    checker.batch_size = options.batch_size
+    if options.result_cache:
+        checker.result_cache = result_cache.ScenarioResultCache(options.result_cache)
     checker.rule_spec = options.target
     checker.template_spec = None
     checker.scenarios_profile = options.scenarios_profile
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 from __future__ import print_function
 
+from ssg_test_suite import result_cache
 from ssg_test_suite import rule
 
 
@@ -40,6 +41,10 @@ def perform_template_check(options):
     checker.scenarios_regex = options.scenarios_regex
     checker.slice_current = options.slice_current
     checker.slice_total = options.slice_total
+    checker.pool_size = options.pool_size
+    checker.batch_size = options.batch_size
+    if options.result_cache:
+        checker.result_cache = result_cache.ScenarioResultCache(options.result_cache)
     checker.scenarios_profile = options.scenarios_profile
 
     checker.rule_spec = None
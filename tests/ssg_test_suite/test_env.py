@@ -1,14 +1,21 @@
 from __future__ import print_function
 
 import contextlib
+import copy
 import sys
 import os
 import re
 import time
+import threading
 import subprocess
 import json
 import logging
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 import ssg_test_suite
 from ssg_test_suite import common
 
@@ -18,6 +25,7 @@ class SavedState(object):
         self.name = common.get_prefixed_name(name)
         self.environment = environment
         self.initial_running_state = True
+        self.handle = None
 
     def map_on_top(self, function, args_list):
         if not args_list:
@@ -31,12 +39,58 @@ class SavedState(object):
         current_running_state = self.environment.reset_state_to(
             self.name, "running_last")
 
+    def map_on_clones(self, function, args_list, pool_size):
+        """
+        Call the function with every args from the list, running up to pool_size
+        calls concurrently, each in its own clone of the environment
+        started from this state. The clone is passed to the function
+        as the first argument, and it is reset to this state after every call.
+
+        Returns results of the calls in the order of args_list.
+        """
+        tasks = queue.Queue()
+        for index, args in enumerate(args_list):
+            tasks.put((index, args))
+        results = [None] * len(args_list)
+        errors = []
+
+        def run_tasks(clone):
+            try:
+                clone.start()
+                calls = 0
+                while not errors:
+                    try:
+                        index, args = tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if calls:
+                        clone.reset_to_base("running_%d" % calls)
+                    results[index] = function(clone, *args)
+                    calls += 1
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                clone.finalize()
+
+        clones = [
+            self.environment.clone(self.handle, "worker%d" % index)
+            for index in range(min(pool_size, len(args_list)))]
+        threads = [threading.Thread(target=run_tasks, args=(clone,)) for clone in clones]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
     @classmethod
     @contextlib.contextmanager
     def create_from_environment(cls, environment, state_name):
         state = cls(environment, state_name)
 
         state_handle = environment.save_state(state_name)
+        state.handle = state_handle
         exception_to_reraise = None
         try:
             yield state
@@ -163,6 +217,29 @@ class TestEnv(object):
         """
         pass
 
+    def clone(self, state_handle, name_suffix):
+        """
+        Return a new environment that runs independently of this one
+        from the given saved state, so tests can run in several environments at once.
+        """
+        msg = ("The {0} test environment doesn't support running tests in parallel."
+               .format(self.name))
+        raise NotImplementedError(msg)
+
+    def reset_to_base(self, new_running_state_name):
+        """
+        Reset the clone of an environment to the state it has been cloned from.
+        """
+        raise NotImplementedError()
+
+    def get_image_id(self):
+        """
+        Return an identifier of the system the tests start from,
+        which changes whenever the system changes,
+        or None if the environment can't tell when the system changes.
+        """
+        raise NotImplementedError()
+
     def reset_state_to(self, state_name, new_running_state_name):
         raise NotImplementedError()
 
@@ -202,7 +279,7 @@ class TestEnv(object):
 class VMTestEnv(TestEnv):
     name = "libvirt-based"
 
-    def __init__(self, mode, hypervisor, domain_name, keep_snapshots):
+    def __init__(self, mode, hypervisor, domain_name, keep_snapshots, image_id=None):
         super(VMTestEnv, self).__init__(mode)
 
         try:
@@ -217,6 +294,7 @@ class VMTestEnv(TestEnv):
         self.domain_name = domain_name
         self.snapshot_stack = None
         self.keep_snapshots = keep_snapshots
+        self.image_id = image_id
 
         self._origin = None
 
@@ -290,6 +368,13 @@ class VMTestEnv(TestEnv):
     def _delete_saved_state(self, snapshot):
         self.snapshot_stack.revert()
 
+    def get_image_id(self):
+        # Changes of the domain itself can't be detected cheaply,
+        # so only the user can tell which state of the domain is tested.
+        if self.image_id is None:
+            return None
+        return "{0}/{1}/{2}".format(self.hypervisor, self.domain_name, self.image_id)
+
     def _local_oscap_check_base_arguments(self):
         return ['oscap-vm', "domain", self.domain_name, 'xccdf', 'eval']
 
@@ -308,6 +393,7 @@ class ContainerTestEnv(TestEnv):
         self.containers = []
         self.domain_ip = None
         self.internal_ssh_port = 22222
+        self._image_name_prefix = image_name
 
     def start(self):
         self.run_container(self.base_image)
@@ -316,8 +402,25 @@ class ContainerTestEnv(TestEnv):
     def finalize(self):
         self._terminate_current_running_container_if_applicable()
 
+    def clone(self, state_handle, name_suffix):
+        # The image of a saved state of a container environment is its handle
+        clone = copy.copy(self)
+        clone.base_image = state_handle
+        clone._name_stem = "{0}_{1}".format(self._name_stem, name_suffix)
+        clone._image_name_prefix = "{0}_{1}".format(state_handle, name_suffix)
+        clone.created_images = []
+        clone.containers = []
+        return clone
+
+    def reset_to_base(self, new_running_state_name):
+        self._terminate_current_running_container_if_applicable()
+        return self.run_container(self.base_image, new_running_state_name)
+
+    def get_image_id(self):
+        return self._get_image_id(self.base_image)
+
     def image_stem2fqn(self, stem):
-        image_name = "{0}_{1}".format(self.base_image, stem)
+        image_name = "{0}_{1}".format(self._image_name_prefix, stem)
         return image_name
 
     @property
@@ -431,6 +534,9 @@ class ContainerTestEnv(TestEnv):
     def _remove_image(self, image):
         raise NotImplementedError
 
+    def _get_image_id(self, image):
+        raise NotImplementedError
+
     def _local_oscap_check_base_arguments(self):
         raise NotImplementedError
 
@@ -485,6 +591,9 @@ class DockerTestEnv(ContainerTestEnv):
     def _remove_image(self, image):
         self.client.images.remove(image)
 
+    def _get_image_id(self, image):
+        return self.client.images.get(image).id
+
     def _local_oscap_check_base_arguments(self):
         return ['oscap-docker', "container", self.current_container.id,
                 'xccdf', 'eval']
@@ -597,5 +706,15 @@ class PodmanTestEnv(ContainerTestEnv):
                 " ".join(e.cmd), e.returncode, e.output.decode("utf-8"))
             raise RuntimeError(msg)
 
+    def _get_image_id(self, image):
+        podman_cmd = ["podman", "image", "inspect", image, "--format", "{{.Id}}"]
+        try:
+            podman_output = subprocess.check_output(podman_cmd, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            msg = "Command '{0}' returned {1}:\n{2}".format(
+                " ".join(e.cmd), e.returncode, e.output.decode("utf-8"))
+            raise RuntimeError(msg)
+        return podman_output.decode("utf-8").strip()
+
     def _local_oscap_check_base_arguments(self):
         raise NotImplementedError("OpenSCAP doesn't support offline scanning of Podman Containers")
@@ -1,12 +1,17 @@
 #!/usr/bin/python3
 import xml.etree.cElementTree as ET
 
+import collections
 import logging
 import contextlib
+import hashlib
+import os
 import re
 import subprocess
+import threading
 
 from ssg.constants import OSCAP_RULE
+from ssg.constants import OSCAP_VALUE
 from ssg.constants import PREFIX_TO_NS
 from ssg.constants import bash_system as bash_rem_system
 from ssg.constants import ansible_system as ansible_rem_system
@@ -26,11 +31,203 @@ SYSTEM_ATTRIBUTE = {
 BENCHMARK_QUERY = ".//ds:component/xccdf-1.2:Benchmark"
 OVAL_DEF_QUERY = ".//ds:component/oval-def:oval_definitions/oval-def:definitions"
 
+# Attributes and elements of OVAL elements that refer to other OVAL elements
+OVAL_REFERENCE_ATTRIBUTES = (
+    "definition_ref", "test_ref", "object_ref", "state_ref", "var_ref")
+OVAL_REFERENCE_ELEMENTS = {"object_reference", "filter", "var_ref"}
+
+# How many parsed datastreams get_datastream_index keeps
+DATASTREAM_INDEX_CACHE_SIZE = 2
+
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 
+class BenchmarkIndex(object):
+    """
+    Lookup tables of profiles, rule selections, rules and platforms
+    of a parsed XCCDF benchmark.
+    """
+    def __init__(self, benchmark_node):
+        self.node = benchmark_node
+        self.profiles = benchmark_node.findall("xccdf-1.2:Profile", PREFIX_TO_NS)
+        self.profiles_by_id = dict()
+        for profile in self.profiles:
+            self.profiles_by_id.setdefault(profile.get("id"), profile)
+        self.rules = benchmark_node.findall(".//xccdf-1.2:Rule", PREFIX_TO_NS)
+        self.rules_by_id = dict()
+        for rule in self.rules:
+            self.rules_by_id.setdefault(rule.get("id"), rule)
+        self.values_by_id = dict()
+        for value in benchmark_node.iterfind(".//xccdf-1.2:Value", PREFIX_TO_NS):
+            self.values_by_id.setdefault(value.get("id"), value)
+        self.platforms = {
+            platform_el.get("idref") for platform_el
+            in benchmark_node.findall("xccdf-1.2:platform", PREFIX_TO_NS)}
+        self.cpe_platforms_by_id = dict()
+        for platform in benchmark_node.iterfind(
+                "cpe-lang:platform-specification/cpe-lang:platform", PREFIX_TO_NS):
+            self.cpe_platforms_by_id.setdefault(platform.get("id"), platform)
+        self._rule_selections = dict()
+        self._fixes = dict()
+        self._parents = None
+
+    def get_ancestors(self, element):
+        """
+        Return the parent Groups of the element, from the closest one
+        up to the Benchmark.
+        """
+        if self._parents is None:
+            self._parents = {
+                child: parent for parent in self.node.iter() for child in parent}
+        ancestors = []
+        parent = self._parents.get(element)
+        while parent is not None:
+            ancestors.append(parent)
+            parent = self._parents.get(parent)
+        return ancestors
+
+    def get_rule_selections(self, profile_id):
+        if profile_id not in self._rule_selections:
+            profile = self.profiles_by_id.get(profile_id)
+            if profile is None:
+                raise RuntimeError(
+                    "Profile '{0}' not found in benchmark '{1}'"
+                    .format(profile_id, self.node.get("id")))
+            self._rule_selections[profile_id] = profile.findall(
+                "xccdf-1.2:select[@selected='true']", PREFIX_TO_NS)
+        return self._rule_selections[profile_id]
+
+    def get_fix(self, rule_id, system_attribute):
+        key = (rule_id, system_attribute)
+        if key not in self._fixes:
+            rule = self.rules_by_id.get(rule_id)
+            fix = None
+            if rule is not None:
+                fix = rule.find(
+                    "xccdf-1.2:fix[@system='{0}']".format(system_attribute), PREFIX_TO_NS)
+            self._fixes[key] = fix
+        return self._fixes[key]
+
+
+class DatastreamIndex(object):
+    """
+    Parsed datastream with lookup tables of its benchmarks.
+    Benchmarks are indexed the first time they are queried.
+
+    Use get_datastream_index to share the index of a datastream file
+    among all queries until the file changes. Elements of a shared index
+    must not be modified.
+    """
+    def __init__(self, datastream):
+        self.root = ET.parse(datastream).getroot()
+        self.benchmarks_by_id = dict()
+        for benchmark in self.root.iterfind("*//xccdf-1.2:Benchmark", PREFIX_TO_NS):
+            self.benchmarks_by_id.setdefault(benchmark.get("id"), benchmark)
+        self._benchmark_indexes = dict()
+        self._oval_component_indexes = None
+        self._cpe_items_by_name = None
+
+    def get_benchmark_index(self, benchmark_id):
+        """
+        Return the BenchmarkIndex of the benchmark with the given ID,
+        or None if the datastream doesn't contain such benchmark.
+        """
+        if benchmark_id not in self._benchmark_indexes:
+            benchmark_node = self.benchmarks_by_id.get(benchmark_id)
+            index = None
+            if benchmark_node is not None:
+                index = BenchmarkIndex(benchmark_node)
+            self._benchmark_indexes[benchmark_id] = index
+        return self._benchmark_indexes[benchmark_id]
+
+    def get_oval_component_indexes(self):
+        """
+        Return a list with a dict for each OVAL component, e.g. the OVAL
+        checks and the CPE OVAL checks, which maps IDs of OVAL definitions,
+        tests, objects, states and variables of the component to the elements.
+        Components are indexed separately, as they can define the same IDs.
+        """
+        if self._oval_component_indexes is None:
+            self._oval_component_indexes = []
+            for oval_definitions in self.root.iterfind(
+                    "*//oval-def:oval_definitions", PREFIX_TO_NS):
+                elements_by_id = dict()
+                for section in oval_definitions:
+                    for element in section:
+                        element_id = element.get("id")
+                        if element_id is not None:
+                            elements_by_id.setdefault(element_id, element)
+                self._oval_component_indexes.append(elements_by_id)
+        return self._oval_component_indexes
+
+    def get_cpe_items_by_name(self):
+        """
+        Return a dict that maps CPE names of all CPE dictionaries to their items.
+        """
+        if self._cpe_items_by_name is None:
+            self._cpe_items_by_name = dict()
+            for cpe_item in self.root.iterfind("*//cpe-dict:cpe-item", PREFIX_TO_NS):
+                self._cpe_items_by_name.setdefault(cpe_item.get("name"), cpe_item)
+        return self._cpe_items_by_name
+
+    def get_oval_closure(self, definition_ids):
+        """
+        Return OVAL elements with the given IDs together with all OVAL elements
+        they reference, directly or indirectly. References are resolved within
+        the OVAL component of the referencing element, and if more components
+        define an ID, elements of all of them are returned.
+        Elements are sorted by their components and IDs.
+        """
+        closure = []
+        for elements_by_id in self.get_oval_component_indexes():
+            seen = set()
+            to_visit = list(definition_ids)
+            while to_visit:
+                element_id = to_visit.pop()
+                if element_id in seen or element_id not in elements_by_id:
+                    continue
+                seen.add(element_id)
+                for child in elements_by_id[element_id].iter():
+                    for attribute in OVAL_REFERENCE_ATTRIBUTES:
+                        reference = child.get(attribute)
+                        if reference is not None:
+                            to_visit.append(reference)
+                    if child.tag.rsplit("}", 1)[-1] in OVAL_REFERENCE_ELEMENTS and child.text:
+                        to_visit.append(child.text.strip())
+            closure.extend(elements_by_id[element_id] for element_id in sorted(seen))
+        return closure
+
+
+def get_datastream_index(datastream):
+    """
+    Return the DatastreamIndex of the datastream file. The index is reused
+    as long as the path, modification time and size of the file don't change.
+    Only indexes of the DATASTREAM_INDEX_CACHE_SIZE most recently used files
+    are kept.
+
+    The index and its elements are shared by all callers, so they must not
+    be modified; use datastream_root to get a tree that can be changed.
+    """
+    path = os.path.abspath(datastream)
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size)
+    cache = get_datastream_index.cache
+    with get_datastream_index.lock:
+        cached = cache.pop(path, None)
+        if cached is None or cached[0] != key:
+            cached = (key, DatastreamIndex(path))
+        cache[path] = cached
+        while len(cache) > DATASTREAM_INDEX_CACHE_SIZE:
+            cache.popitem(last=False)
+    return cached[1]
+
+
+get_datastream_index.cache = collections.OrderedDict()
+get_datastream_index.lock = threading.Lock()
+
+
 def get_all_xccdf_ids_in_datastream(datastream):
-    root = ET.parse(datastream).getroot()
+    root = get_datastream_index(datastream).root
 
     checklists_node = root.find(".//ds:checklists", PREFIX_TO_NS)
     if checklists_node is None:
@@ -44,7 +241,7 @@ def get_all_xccdf_ids_in_datastream(datastream):
 
 
 def infer_benchmark_id_from_component_ref_id(datastream, ref_id):
-    root = ET.parse(datastream).getroot()
+    root = get_datastream_index(datastream).root
     component_ref_node = root.find("*//ds:component-ref[@id='{0}']"
                                    .format(ref_id), PREFIX_TO_NS)
     if component_ref_node is None:
@@ -81,6 +278,23 @@ def datastream_root(ds_location, save_location=None):
             tree.write(save_location)
 
 
+def change_values_in_datastream(datastream, output, values):
+    """
+    Write a copy of the datastream with changed default values
+    (the ones without a selector) of XCCDF Values to the output file.
+    The values dict maps short IDs of Values to their new values.
+    """
+    values_by_id = {OSCAP_VALUE + value_id: new_value for value_id, new_value in values.items()}
+    with datastream_root(datastream, output) as root:
+        for value in find_elements(root, "xccdf-1.2:Value"):
+            new_value = values_by_id.get(value.get("id"))
+            if new_value is None:
+                continue
+            for value_el in value.findall("xccdf-1.2:value", PREFIX_TO_NS):
+                if value_el.get("selector") is None and value_el.text is not None:
+                    value_el.text = new_value
+
+
 def find_elements(root, element_spec=None):
     query = BENCHMARK_QUERY
     if element_spec is not None:
@@ -233,29 +447,124 @@ def add_product_to_fips_certified(root, product="fedora"):
         criteria.append(e)
 
 
-def _get_benchmark_node(datastream, benchmark_id, logging):
-    root = ET.parse(datastream).getroot()
-    benchmark_node = root.find(
-        "*//xccdf-1.2:Benchmark[@id='{0}']".format(benchmark_id), PREFIX_TO_NS)
-    if benchmark_node is None:
+def _get_benchmark_index(datastream, benchmark_id, logging):
+    benchmark_index = get_datastream_index(datastream).get_benchmark_index(benchmark_id)
+    if benchmark_index is None:
         if logging is not None:
             logging.error(
                 "Benchmark ID '{}' not found within DataStream"
                 .format(benchmark_id))
-    return benchmark_node
+        raise RuntimeError(
+            "Benchmark ID '{0}' not found within DataStream".format(benchmark_id))
+    return benchmark_index
+
+
+def _get_platform_elements(benchmark_index, datastream_index, rule):
+    """
+    Return elements that decide whether the rule is applicable: platforms
+    of the rule, of its Groups and of the Benchmark, CPE platforms of the
+    Benchmark platform-specification and CPE items they refer to.
+    Also return IDs of OVAL definitions of the CPE checks.
+    """
+    platform_ids = []
+    for element in [rule] + benchmark_index.get_ancestors(rule):
+        platform_ids.extend(
+            platform.get("idref") for platform
+            in element.iterfind("xccdf-1.2:platform", PREFIX_TO_NS))
+
+    elements = []
+    cpe_names = []
+    definition_ids = []
+    for platform_id in platform_ids:
+        if not platform_id.startswith("#"):
+            cpe_names.append(platform_id)
+            continue
+        platform = benchmark_index.cpe_platforms_by_id.get(platform_id[1:])
+        if platform is None:
+            continue
+        elements.append(platform)
+        cpe_names.extend(
+            fact_ref.get("name") for fact_ref
+            in platform.iterfind(".//cpe-lang:fact-ref", PREFIX_TO_NS))
+        definition_ids.extend(
+            fact_ref.get("id-ref") for fact_ref
+            in platform.iterfind(".//cpe-lang:check-fact-ref", PREFIX_TO_NS))
+
+    cpe_items_by_name = datastream_index.get_cpe_items_by_name()
+    for cpe_name in sorted(set(cpe_names)):
+        cpe_item = cpe_items_by_name.get(cpe_name)
+        if cpe_item is None:
+            continue
+        elements.append(cpe_item)
+        definition_ids.extend(
+            check.text.strip() for check
+            in cpe_item.iterfind("cpe-dict:check", PREFIX_TO_NS) if check.text)
+    return platform_ids, elements, definition_ids
+
+
+def get_rule_content_digest(datastream, benchmark_id, rule_id, profile_ids=()):
+    """
+    Return a digest of everything in the datastream that scans and remediations
+    of the rule depend on: the XCCDF rule including its fixes, XCCDF values
+    the rule uses, selections of the rule and the values in the given profiles,
+    platforms that the rule, its Groups and the Benchmark are applicable to,
+    and the OVAL definitions of the rule and of its platforms with all OVAL
+    elements they reference.
+    """
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    rule = benchmark_index.rules_by_id.get(rule_id)
+    if rule is None:
+        raise RuntimeError(
+            "Rule '{0}' not found in benchmark '{1}'".format(rule_id, benchmark_id))
+
+    digest = hashlib.sha256()
+    digest.update(ET.tostring(rule))
+
+    value_ids = {
+        export.get("value-id") for export
+        in rule.iterfind(".//xccdf-1.2:check-export", PREFIX_TO_NS)}
+    value_ids.update(
+        sub.get("idref") for sub in rule.iterfind(".//xccdf-1.2:sub", PREFIX_TO_NS))
+    for value_id in sorted(value_ids):
+        value = benchmark_index.values_by_id.get(value_id)
+        if value is not None:
+            digest.update(ET.tostring(value))
+
+    for profile_id in sorted(profile_ids):
+        digest.update(profile_id.encode("utf-8"))
+        profile = benchmark_index.profiles_by_id.get(profile_id)
+        if profile is None:
+            continue
+        for element in profile:
+            idref = element.get("idref")
+            if idref == rule_id or idref in value_ids:
+                digest.update(ET.tostring(element))
+
+    definition_ids = [
+        ref.get("name") for ref
+        in rule.iterfind(".//xccdf-1.2:check-content-ref", PREFIX_TO_NS)
+        if ref.get("name")]
+    datastream_index = get_datastream_index(datastream)
+    platform_ids, platform_elements, platform_definition_ids = _get_platform_elements(
+        benchmark_index, datastream_index, rule)
+    for platform_id in platform_ids:
+        digest.update(platform_id.encode("utf-8"))
+    for element in platform_elements:
+        digest.update(ET.tostring(element))
+    definition_ids.extend(platform_definition_ids)
+    for element in datastream_index.get_oval_closure(definition_ids):
+        digest.update(ET.tostring(element))
+    return digest.hexdigest()
 
 
 def get_all_profiles_in_benchmark(datastream, benchmark_id, logging=None):
-    benchmark_node = _get_benchmark_node(datastream, benchmark_id, logging)
-    all_profiles = benchmark_node.findall('xccdf-1.2:Profile', PREFIX_TO_NS)
-    return all_profiles
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    return list(benchmark_index.profiles)
 
 
 def get_all_rule_selections_in_profile(datastream, benchmark_id, profile_id, logging=None):
-    benchmark_node = _get_benchmark_node(datastream, benchmark_id, logging)
-    profile = benchmark_node.find("xccdf-1.2:Profile[@id='{0}']".format(profile_id), PREFIX_TO_NS)
-    rule_selections = profile.findall("xccdf-1.2:select[@selected='true']", PREFIX_TO_NS)
-    return rule_selections
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    return list(benchmark_index.get_rule_selections(profile_id))
 
 
 def get_all_rule_ids_in_profile(datastream, benchmark_id, profile_id, logging=None):
@@ -273,41 +582,30 @@ def benchmark_get_applicable_platforms(datastream, benchmark_id, logging=None):
     """
     Returns a set of CPEs the given benchmark is applicable to.
     """
-    benchmark_node = _get_benchmark_node(datastream, benchmark_id, logging)
-    platform_elements = benchmark_node.findall('xccdf-1.2:platform', PREFIX_TO_NS)
-    cpes = {platform_el.get("idref") for platform_el in platform_elements}
-    return cpes
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    return set(benchmark_index.platforms)
 
 
 def find_rule_in_benchmark(datastream, benchmark_id, rule_id, logging=None):
     """
     Returns rule node from the given benchmark.
     """
-    benchmark_node = _get_benchmark_node(datastream, benchmark_id, logging)
-    rule = benchmark_node.find(".//xccdf-1.2:Rule[@id='{0}']".format(rule_id), PREFIX_TO_NS)
-    return rule
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    return benchmark_index.rules_by_id.get(rule_id)
 
 
 def get_all_rules_in_benchmark(datastream, benchmark_id, logging=None):
     """
     Returns all rule IDs in the given benchmark.
     """
-    rules = []
-    benchmark_node = _get_benchmark_node(datastream, benchmark_id, logging)
-    for rule in benchmark_node.findall(".//xccdf-1.2:Rule", PREFIX_TO_NS):
-        rules.append(rule.get("id"))
-    return rules
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
+    return [rule.get("id") for rule in benchmark_index.rules]
 
 
 def find_fix_in_benchmark(datastream, benchmark_id, rule_id, fix_type='bash', logging=None):
     """
     Return fix from benchmark. None if not found.
     """
-    rule = find_rule_in_benchmark(datastream, benchmark_id, rule_id, logging)
-    if rule is None:
-        return None
-
+    benchmark_index = _get_benchmark_index(datastream, benchmark_id, logging)
     system_attribute = SYSTEM_ATTRIBUTE.get(fix_type, bash_rem_system)
-
-    fix = rule.find("xccdf-1.2:fix[@system='{0}']".format(system_attribute), PREFIX_TO_NS)
-    return fix
+    return benchmark_index.get_fix(rule_id, system_attribute)
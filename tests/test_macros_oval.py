@@ -4,6 +4,8 @@ import argparse
 
 import oval_tester
 
+import ssg.utils
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -11,8 +13,17 @@ def main():
     parser.add_argument(
         "--verbose", action="store_true", default=False,
         help="Show results of each test case")
+    parser.add_argument(
+        "--no-batch", dest="batch", action="store_false", default=True,
+        help="Evaluate every test case by a separate oscap run "
+        "as soon as it is defined, instead of evaluating test cases "
+        "combined into shared OVAL documents at the end.")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=ssg.utils.get_cpu_count(),
+        help="Number of oscap processes that evaluate OVAL documents "
+        "in parallel in the batch mode.")
     args = parser.parse_args()
-    tester = oval_tester.OVALTester(args.verbose)
+    tester = oval_tester.OVALTester(args.verbose, args.batch, args.jobs)
 
     #######################################################
     # Test cases for whitespace separated files
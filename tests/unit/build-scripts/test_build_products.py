@@ -0,0 +1,133 @@
+import filecmp
+import os
+import subprocess
+import sys
+
+import pytest
+
+import build_products
+
+
+PRODUCT = "firefox"
+
+BUILD_SCRIPTS_DIR = os.path.join(build_products.PROJECT_ROOT, "build-scripts")
+
+BUILD_CONFIG = """\
+cmake_build_type: "Release"
+
+ssg_version: [0, 1, 59]
+ssg_version_str: "0.1.59"
+target_oval_version: [5, 11]
+target_oval_version_str: "5.11"
+
+jinja2_cache_enabled: false
+
+sce_enabled: "{sce_enabled}"
+"""
+
+
+def write_build_config(build_root, sce_enabled):
+    build_config_yaml = str(build_root.join("build_config.yml"))
+    with open(build_config_yaml, "w") as f:
+        f.write(BUILD_CONFIG.format(sce_enabled=sce_enabled))
+    return build_config_yaml
+
+
+def run_build_script(script, *args):
+    env = dict(os.environ, PYTHONPATH=build_products.PROJECT_ROOT)
+    subprocess.check_call(
+        [sys.executable, os.path.join(BUILD_SCRIPTS_DIR, script)] + list(args), env=env)
+
+
+def build_product_by_steps(build_config_yaml, controls_dir, templates_dir, product,
+                           sce_enabled):
+    """
+    Build the product by running the build scripts in the same way
+    as the separate CMake build steps in cmake/SSGCommon.cmake do.
+    """
+    build_root = os.path.dirname(build_config_yaml)
+    product_dir = os.path.join(build_root, product)
+    sce_dir = os.path.join(product_dir, "checks", "sce")
+    sce_metadata = os.path.join(sce_dir, "metadata.json")
+    compiled_product_yaml = os.path.join(product_dir, "product.yml")
+    os.makedirs(product_dir)
+
+    run_build_script(
+        "compile_product.py",
+        "--product-yaml", build_products.get_product_yaml_path(product),
+        "--compiled-product-yaml", compiled_product_yaml)
+
+    if sce_enabled == "ON":
+        run_build_script(
+            "build_sce.py",
+            "--build-config-yaml", build_config_yaml,
+            "--product-yaml", compiled_product_yaml,
+            "--templates-dir", templates_dir,
+            "--output", sce_dir,
+            os.path.join(build_products.PROJECT_ROOT, "shared", "checks", "sce"),
+            os.path.join(build_products.PROJECT_ROOT, "products", product, "checks", "sce"))
+    else:
+        os.makedirs(sce_dir)
+        open(sce_metadata, "w").close()
+
+    os.makedirs(os.path.join(product_dir, "profiles"))
+    compile_all_args = [
+        "--resolved-base", product_dir,
+        "--controls-dir", controls_dir,
+        "--build-config-yaml", build_config_yaml,
+        "--product-yaml", compiled_product_yaml,
+        "--sce-metadata", sce_metadata,
+    ]
+    stig_references = build_products.get_stig_references(product)
+    if stig_references:
+        compile_all_args += ["--stig-references", stig_references]
+    run_build_script("compile_all.py", *compile_all_args)
+
+    run_build_script(
+        "build_templated_content.py",
+        "--resolved-rules-dir", os.path.join(product_dir, "rules"),
+        "--templates-dir", templates_dir,
+        "--platforms-dir", os.path.join(product_dir, "platforms"),
+        "--cpe-items-dir", os.path.join(product_dir, "cpe_items"),
+        "--checks-dir", os.path.join(product_dir, "checks_from_templates"),
+        "--remediations-dir", os.path.join(product_dir, "fixes_from_templates"),
+        "--build-config-yaml", build_config_yaml,
+        "--product-yaml", compiled_product_yaml)
+
+
+def assert_same_trees(left, right, ignored):
+    comparison = filecmp.dircmp(left, right, ignore=ignored)
+    assert comparison.left_only == []
+    assert comparison.right_only == []
+    assert comparison.funny_files == []
+    _, mismatch, errors = filecmp.cmpfiles(
+        left, right, comparison.common_files, shallow=False)
+    assert mismatch == []
+    assert errors == []
+    for subdir in comparison.common_dirs:
+        assert_same_trees(
+            os.path.join(left, subdir), os.path.join(right, subdir), ignored)
+
+
+@pytest.mark.parametrize("sce_enabled", ["OFF", "ON"])
+def test_build_product_equals_build_steps(tmpdir, sce_enabled):
+    controls_dir = os.path.join(build_products.PROJECT_ROOT, "controls")
+    templates_dir = os.path.join(build_products.PROJECT_ROOT, "shared", "templates")
+
+    driver_config = write_build_config(tmpdir.mkdir("driver"), sce_enabled)
+    assert build_products.build_product(
+        driver_config, controls_dir, templates_dir, PRODUCT) == PRODUCT
+
+    steps_config = write_build_config(tmpdir.mkdir("steps"), sce_enabled)
+    build_product_by_steps(
+        steps_config, controls_dir, templates_dir, PRODUCT, sce_enabled)
+
+    driver_product_dir = os.path.join(os.path.dirname(driver_config), PRODUCT)
+    steps_product_dir = os.path.join(os.path.dirname(steps_config), PRODUCT)
+    assert os.path.isfile(
+        os.path.join(driver_product_dir, "checks", "sce", "metadata.json"))
+    assert os.listdir(os.path.join(driver_product_dir, "rules"))
+    assert os.listdir(os.path.join(driver_product_dir, "profiles"))
+    # The log file is configured only by the first compile_all in the test process.
+    assert_same_trees(
+        driver_product_dir, steps_product_dir, ["control_profiles.log"])
@@ -0,0 +1,85 @@
+import filecmp
+import os
+import subprocess
+import sys
+
+import pytest
+
+import build_products
+
+
+PRODUCT = "firefox"
+
+BUILD_SCRIPTS_DIR = os.path.join(build_products.PROJECT_ROOT, "build-scripts")
+
+BUILD_CONFIG = """\
+cmake_build_type: "Release"
+
+ssg_version: [0, 1, 59]
+ssg_version_str: "0.1.59"
+target_oval_version: [5, 11]
+target_oval_version_str: "5.11"
+
+jinja2_cache_enabled: false
+
+sce_enabled: "OFF"
+"""
+
+
+@pytest.fixture(scope="module")
+def product_dir(tmpdir_factory):
+    build_root = tmpdir_factory.mktemp("build")
+    build_config_yaml = str(build_root.join("build_config.yml"))
+    with open(build_config_yaml, "w") as f:
+        f.write(BUILD_CONFIG)
+    build_products.build_product(
+        build_config_yaml,
+        os.path.join(build_products.PROJECT_ROOT, "controls"),
+        os.path.join(build_products.PROJECT_ROOT, "shared", "templates"),
+        PRODUCT)
+    return str(build_root.join(PRODUCT))
+
+
+def collect_remediations(product_dir, output_dir, jobs):
+    """
+    Run collect_remediations.py in the same way as cmake/SSGCommon.cmake does.
+    """
+    env = dict(os.environ, PYTHONPATH=build_products.PROJECT_ROOT)
+    subprocess.check_call([
+        sys.executable, os.path.join(BUILD_SCRIPTS_DIR, "collect_remediations.py"),
+        "--jobs", str(jobs),
+        "--resolved-rules-dir", os.path.join(product_dir, "rules"),
+        "--build-config-yaml", os.path.join(os.path.dirname(product_dir), "build_config.yml"),
+        "--product-yaml", os.path.join(product_dir, "product.yml"),
+        "--remediation-type", "bash",
+        "--remediation-type", "ansible",
+        "--output-dir", os.path.join(output_dir, "fixes"),
+        "--fixes-from-templates-dir", os.path.join(product_dir, "fixes_from_templates"),
+        "--platforms-dir", os.path.join(product_dir, "platforms"),
+        "--cpe-items-dir", os.path.join(product_dir, "cpe_items"),
+        "--parsed-ansible-remediations",
+        os.path.join(output_dir, "ansible_remediations.json"),
+    ], env=env)
+
+
+def assert_same_trees(left, right):
+    comparison = filecmp.dircmp(left, right)
+    assert comparison.left_only == []
+    assert comparison.right_only == []
+    assert comparison.funny_files == []
+    _, mismatch, errors = filecmp.cmpfiles(
+        left, right, comparison.common_files, shallow=False)
+    assert mismatch == []
+    assert errors == []
+    for subdir in comparison.common_dirs:
+        assert_same_trees(os.path.join(left, subdir), os.path.join(right, subdir))
+
+
+def test_collect_remediations_in_parallel(product_dir, tmpdir):
+    serial_dir = str(tmpdir.mkdir("serial"))
+    parallel_dir = str(tmpdir.mkdir("parallel"))
+    collect_remediations(product_dir, serial_dir, jobs=1)
+    collect_remediations(product_dir, parallel_dir, jobs=2)
+
+    assert os.listdir(os.path.join(serial_dir, "fixes", "bash"))
+    assert_same_trees(serial_dir, parallel_dir)
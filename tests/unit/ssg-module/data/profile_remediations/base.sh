@@ -0,0 +1,39 @@
+#!/usr/bin/env bash
+###############################################################################
+#
+# Bash Remediation Script for Base Profile
+#
+# Profile Description:
+# Selects rules that set the timeout
+# and configure the service.
+#
+# Profile ID:  xccdf_org.ssgproject.content_profile_base
+# Benchmark ID:  xccdf_org.ssgproject.content_benchmark_TEST
+# Benchmark Version:  0.1.60
+# XCCDF Version:  1.2
+#
+# This file can be generated by OpenSCAP using:
+# $ oscap xccdf generate fix --profile xccdf_org.ssgproject.content_profile_base --fix-type bash xccdf-file.xml
+#
+# This Bash Remediation Script is generated from an OpenSCAP profile without preliminary evaluation.
+# It attempts to fix every selected rule, even if the system is already compliant.
+#
+# How to apply this Bash Remediation Script:
+# $ sudo ./remediation-script.sh
+#
+###############################################################################
+
+###############################################################################
+# BEGIN fix (1 / 2) for 'xccdf_org.ssgproject.content_rule_service'
+###############################################################################
+(>&2 echo "Remediating rule 1/2: 'xccdf_org.ssgproject.content_rule_service'")
+systemctl enable service
+# END fix for 'xccdf_org.ssgproject.content_rule_service'
+
+###############################################################################
+# BEGIN fix (2 / 2) for 'xccdf_org.ssgproject.content_rule_timeout'
+###############################################################################
+(>&2 echo "Remediating rule 2/2: 'xccdf_org.ssgproject.content_rule_timeout'")
+echo "TMOUT=900" >> /etc/profile
+# END fix for 'xccdf_org.ssgproject.content_rule_timeout'
+
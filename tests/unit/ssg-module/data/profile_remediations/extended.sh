@@ -0,0 +1,39 @@
+#!/usr/bin/env bash
+###############################################################################
+#
+# Bash Remediation Script for Extended Profile
+#
+# Profile Description:
+# Extends the base profile.
+#
+# Profile ID:  xccdf_org.ssgproject.content_profile_extended
+# Benchmark ID:  xccdf_org.ssgproject.content_benchmark_TEST
+# Benchmark Version:  0.1.60
+# XCCDF Version:  1.2
+#
+# This file can be generated by OpenSCAP using:
+# $ oscap xccdf generate fix --profile xccdf_org.ssgproject.content_profile_extended --fix-type bash xccdf-file.xml
+#
+# This Bash Remediation Script is generated from an OpenSCAP profile without preliminary evaluation.
+# It attempts to fix every selected rule, even if the system is already compliant.
+#
+# How to apply this Bash Remediation Script:
+# $ sudo ./remediation-script.sh
+#
+###############################################################################
+
+###############################################################################
+# BEGIN fix (1 / 2) for 'xccdf_org.ssgproject.content_rule_timeout'
+###############################################################################
+(>&2 echo "Remediating rule 1/2: 'xccdf_org.ssgproject.content_rule_timeout'")
+echo "TMOUT=300" >> /etc/profile
+# END fix for 'xccdf_org.ssgproject.content_rule_timeout'
+
+###############################################################################
+# BEGIN fix (2 / 2) for 'xccdf_org.ssgproject.content_rule_manual'
+###############################################################################
+(>&2 echo "Remediating rule 2/2: 'xccdf_org.ssgproject.content_rule_manual'")
+(>&2 echo "FIX FOR THIS RULE 'xccdf_org.ssgproject.content_rule_manual' IS MISSING")
+
+# END fix for 'xccdf_org.ssgproject.content_rule_manual'
+
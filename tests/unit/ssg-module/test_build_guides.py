@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+import ssg.build_guides
+from ssg.constants import XCCDF12_NS, ocil_namespace, oval_namespace
+from ssg.xml import ElementTree
+
+
+DATADIR = os.path.join(os.path.dirname(__file__), "data")
+DATASTREAM_PATH = os.path.join(DATADIR, "guide_inputs_datastream.xml")
+BENCHMARK_ID = "xccdf_org.ssgproject.content_benchmark_TEST"
+STIG = "xccdf_org.ssgproject.content_profile_stig"
+OSPP = "xccdf_org.ssgproject.content_profile_ospp"
+
+
+@pytest.fixture
+def tree():
+    return ElementTree.parse(DATASTREAM_PATH)
+
+
+def get_digests(tree):
+    guide_inputs = ssg.build_guides.GuideInputs(tree)
+    return (guide_inputs.get_digest(BENCHMARK_ID, STIG),
+            guide_inputs.get_digest(BENCHMARK_ID, OSPP))
+
+
+def find_by_id(tree, tag, id_):
+    return tree.getroot().find(".//{%s}%s[@id='%s']" % (XCCDF12_NS, tag, id_))
+
+
+def test_guide_digests_are_stable(tree):
+    stig_digest, ospp_digest = get_digests(tree)
+    assert stig_digest != ospp_digest
+    assert get_digests(ElementTree.parse(DATASTREAM_PATH)) == (stig_digest, ospp_digest)
+
+
+def test_guide_digest_depends_on_selected_rules(tree):
+    stig_digest, ospp_digest = get_digests(tree)
+    rule = find_by_id(tree, "Rule", "xccdf_org.ssgproject.content_rule_partial")
+    rule.find("{%s}fix" % XCCDF12_NS).text = "false"
+    new_stig_digest, new_ospp_digest = get_digests(tree)
+    assert new_stig_digest != stig_digest
+    assert new_ospp_digest == ospp_digest
+
+
+def test_guide_digest_depends_on_used_values(tree):
+    stig_digest, ospp_digest = get_digests(tree)
+    value = find_by_id(tree, "Value", "xccdf_org.ssgproject.content_value_var_timeout")
+    value.find("{%s}value" % XCCDF12_NS).text = "900"
+    new_stig_digest, new_ospp_digest = get_digests(tree)
+    assert new_stig_digest != stig_digest
+    assert new_ospp_digest == ospp_digest
+
+
+def test_guide_digest_depends_on_profile(tree):
+    stig_digest, ospp_digest = get_digests(tree)
+    profile = find_by_id(tree, "Profile", OSPP)
+    select = profile.find("{%s}select" % XCCDF12_NS)
+    select.set("idref", "xccdf_org.ssgproject.content_rule_complete")
+    new_stig_digest, new_ospp_digest = get_digests(tree)
+    assert new_stig_digest == stig_digest
+    assert new_ospp_digest != ospp_digest
+
+
+@pytest.mark.parametrize("tag", [
+    "{%s}definition" % oval_namespace, "{%s}question_text" % ocil_namespace])
+def test_guide_digest_depends_on_check_components(tree, tag):
+    stig_digest, ospp_digest = get_digests(tree)
+    element = next(tree.getroot().iter(tag))
+    element.set("comment", "changed")
+    new_stig_digest, new_ospp_digest = get_digests(tree)
+    assert new_stig_digest != stig_digest
+    assert new_ospp_digest != ospp_digest
+
+
+def test_guide_manifest(tmpdir):
+    manifest_path = str(tmpdir.join("guides.json"))
+    guide_path = str(tmpdir.join("guide.html"))
+    manifest = ssg.build_guides.GuideManifest(manifest_path)
+    manifest.record(guide_path, "digest")
+    manifest.save()
+
+    manifest = ssg.build_guides.GuideManifest(manifest_path)
+    assert not manifest.is_up_to_date(guide_path, "digest")
+    tmpdir.join("guide.html").write("<html/>")
+    assert manifest.is_up_to_date(guide_path, "digest")
+    assert not manifest.is_up_to_date(guide_path, "other")
+
+
+def test_guide_of_unknown_benchmark_is_always_generated(tmpdir):
+    tree = ElementTree.ElementTree(ElementTree.fromstring(
+        '<Benchmark xmlns="http://checklists.nist.gov/xccdf/1.1" id="TEST">'
+        '<Profile id="stig"/></Benchmark>'))
+    digest = ssg.build_guides.GuideInputs(tree).get_digest("TEST", "stig")
+    assert digest is None
+
+    manifest_path = str(tmpdir.join("guides.json"))
+    guide_path = str(tmpdir.join("guide.html"))
+    tmpdir.join("guide.html").write("<html/>")
+    manifest = ssg.build_guides.GuideManifest(manifest_path)
+    manifest.record(guide_path, "digest")
+    manifest.record(guide_path, digest)
+    assert guide_path not in manifest.guides
+    assert not manifest.is_up_to_date(guide_path, digest)
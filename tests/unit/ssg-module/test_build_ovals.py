@@ -4,6 +4,10 @@ import tempfile
 import xml.etree.ElementTree as ET
 
 import ssg.build_ovals
+import ssg.build_yaml
+import ssg.constants
+import ssg.rule_manifest
+import ssg.xml
 
 PROJECT_ROOT = os.path.join(os.path.dirname(__file__), "..", "..", "..", )
 DATADIR = os.path.abspath(
@@ -41,3 +45,116 @@ def test_build_ovals_include_benchmark():
     shorthand = obuilder.build_shorthand(include_benchmark=True)
     assert shared_oval_1_def_tag in shorthand
     assert benchmark_oval_1_def_tag in shorthand
+
+
+def test_build_oval_trees():
+    env_yaml = {
+        "benchmark_root": "./guide",
+        "product": "rhel9",
+        "target_oval_version_str": "5.11",
+    }
+    obuilder = ssg.build_ovals.OVALBuilder(
+        env_yaml, PRODUCT_YAML, [SHARED_OVALS], BUILD_OVALS_DIR)
+    trees = obuilder.build_oval_trees(include_benchmark=True)
+    definition_ids = [
+        definition.get("id") for tree in trees
+        for definition in tree.findall("./{%s}def-group/{%s}definition" % (
+            ssg.constants.oval_namespace, ssg.constants.oval_namespace))]
+    assert "tmux_conf_readable_by_others" in definition_ids
+    assert "selinux_state" in definition_ids
+    assert len(definition_ids) == len(set(definition_ids))
+
+
+def test_build_ovals_in_parallel():
+    env_yaml = {
+        "benchmark_root": "./guide",
+        "product": "rhel9",
+        "target_oval_version_str": "5.11",
+    }
+    serial_builder = ssg.build_ovals.OVALBuilder(
+        env_yaml, PRODUCT_YAML, [SHARED_OVALS], BUILD_OVALS_DIR)
+    parallel_builder = ssg.build_ovals.OVALBuilder(
+        env_yaml, PRODUCT_YAML, [SHARED_OVALS], BUILD_OVALS_DIR, jobs=2)
+    assert (parallel_builder.build_shorthand(include_benchmark=True) ==
+            serial_builder.build_shorthand(include_benchmark=True))
+    assert parallel_builder.already_loaded == serial_builder.already_loaded
+
+
+def test_build_ovals_in_parallel_reports_only_accepted_errors(tmpdir, capfd):
+    env_yaml = {
+        "product": "rhel9",
+        "target_oval_version_str": "5.11",
+    }
+    tmpdir.join("tmux_conf_readable_by_others.xml").write(
+        "<def-group><platform>multi_platform_all</platform>")
+    broken_ovals = str(tmpdir)
+
+    # Earlier shared directories have higher priority,
+    # so the broken check is shadowed.
+    shorthands = [
+        ssg.build_ovals.OVALBuilder(
+            env_yaml, PRODUCT_YAML, [broken_ovals, SHARED_OVALS], BUILD_OVALS_DIR,
+            jobs=jobs).build_shorthand(include_benchmark=False)
+        for jobs in (1, 2)]
+    assert shorthands[0] == shorthands[1]
+    assert shared_oval_1_def_tag in shorthands[1]
+    assert "Error when parsing OVAL file" not in capfd.readouterr().err
+
+    for jobs in (1, 2):
+        obuilder = ssg.build_ovals.OVALBuilder(
+            env_yaml, PRODUCT_YAML, [SHARED_OVALS, broken_ovals], BUILD_OVALS_DIR,
+            jobs=jobs)
+        with pytest.raises(SystemExit):
+            obuilder.build_shorthand(include_benchmark=False)
+        assert "Error when parsing OVAL file" in capfd.readouterr().err
+
+
+def test_build_ovals_with_rules_manifest(monkeypatch):
+    env_yaml = {
+        "benchmark_root": "./guide",
+        "product": "rhel9",
+        "target_oval_version_str": "5.11",
+    }
+    rules_manifest = ssg.rule_manifest.RulesManifest(env_yaml)
+    rules_manifest.add_rule(ssg.build_yaml.Rule.from_yaml(
+        os.path.join(DATADIR, "guide", "selinux_state", "rule.yml"), env_yaml))
+    expected = ssg.build_ovals.OVALBuilder(
+        env_yaml, PRODUCT_YAML, [SHARED_OVALS], BUILD_OVALS_DIR
+    ).build_shorthand(include_benchmark=True)
+
+    def from_yaml(*args, **kwargs):
+        raise AssertionError("The rule should have been read from the manifest.")
+
+    monkeypatch.setattr(ssg.build_ovals.Rule, "from_yaml", from_yaml)
+    obuilder = ssg.build_ovals.OVALBuilder(
+        env_yaml, PRODUCT_YAML, [SHARED_OVALS], BUILD_OVALS_DIR,
+        rules_manifest=rules_manifest)
+    assert obuilder.build_shorthand(include_benchmark=True) == expected
+
+
+def test_oval_entities_are_identical():
+    first = ssg.xml.ElementTree.fromstring(
+        '<variable xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5" '
+        'id="var_a" comment="first" version="1"><value>1</value></variable>')
+    second = ssg.xml.ElementTree.fromstring(
+        '<ns:variable xmlns:ns="http://oval.mitre.org/XMLSchema/oval-definitions-5" '
+        'id="var_a" comment="second" version="2"><ns:value>1</ns:value></ns:variable>')
+    third = ssg.xml.ElementTree.fromstring(
+        '<variable xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5" '
+        'id="var_a"><value>2</value></variable>')
+    assert ssg.build_ovals.oval_entities_are_identical(first, second)
+    assert not ssg.build_ovals.oval_entities_are_identical(first, third)
+
+
+def test_append_merges_external_variables():
+    extvar = (
+        '<external_variable xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5" '
+        'id="var_a" datatype="int" comment="%s" version="1"/>')
+    variables = ssg.xml.ElementTree.Element(
+        "{%s}variables" % ssg.constants.oval_namespace)
+    ssg.build_ovals.merged_duplicates.clear()
+    ssg.build_ovals.append(variables, ssg.xml.ElementTree.fromstring(extvar % "first"))
+    ssg.build_ovals.append(variables, ssg.xml.ElementTree.fromstring(extvar % "second"))
+    assert len(variables) == 1
+    assert variables[0].get("comment") == "first"
+    assert ssg.build_ovals.get_merged_duplicates_report() == ["variables: 1"]
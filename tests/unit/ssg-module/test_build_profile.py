@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import ssg.build_profile
+
+
+DATADIR = os.path.join(os.path.dirname(__file__), "data")
+BENCHMARK_PATH = os.path.join(DATADIR, "profile_stats_benchmark.xml")
+
+RULE_PREFIX = "xccdf_org.ssgproject.content_rule_"
+COMPLETE = RULE_PREFIX + "complete"
+PARTIAL = RULE_PREFIX + "partial"
+BARE = RULE_PREFIX + "bare"
+
+
+@pytest.fixture
+def benchmark():
+    return ssg.build_profile.XCCDFBenchmark(BENCHMARK_PATH)
+
+
+def test_rule_features(benchmark):
+    features = benchmark.rule_features
+    assert set(features.keys()) == set(ssg.build_profile.RULE_FEATURES)
+    assert features["oval"] == {COMPLETE}
+    assert features["sce"] == {PARTIAL}
+    assert features["check"] == {COMPLETE, PARTIAL}
+    assert features["bash_fix"] == {COMPLETE, PARTIAL}
+    assert features["ansible_fix"] == {COMPLETE}
+    assert features["fix"] == {COMPLETE, PARTIAL}
+    assert features["puppet_fix"] == set()
+    assert features["cce"] == {COMPLETE}
+    assert features["stig_id"] == {COMPLETE}
+    assert features["ospp_ref"] == {BARE}
+
+
+def test_profile_stats(benchmark):
+    stats = benchmark.get_profile_stats("xccdf_org.ssgproject.content_profile_stig")
+    assert stats["profile_id"] == "stig"
+    assert stats["ssg_version"] == "SCAP Security Guide 0.1.60"
+    assert stats["rules"] == [COMPLETE, PARTIAL]
+    assert stats["rules_count"] == 2
+    assert stats["implemented_ovals"] == [COMPLETE]
+    assert stats["implemented_ovals_pct"] == 50
+    assert stats["missing_ovals"] == [PARTIAL]
+    assert stats["implemented_checks"] == [COMPLETE, PARTIAL]
+    assert stats["missing_checks"] == []
+    assert stats["implemented_fixes_pct"] == 100
+    assert stats["missing_ansible_fixes"] == [PARTIAL]
+    assert stats["missing_cces"] == [PARTIAL]
+    assert stats["missing_stig_ids"] == [PARTIAL]
+    assert stats["missing_ospp_refs"] == []
+    assert stats["ansible_parity"] == [PARTIAL]
+    assert stats["ansible_parity_pct"] == 50
+
+
+def test_profile_stats_references(benchmark):
+    stats = benchmark.get_profile_stats("xccdf_org.ssgproject.content_profile_ospp")
+    assert stats["rules"] == [BARE]
+    assert stats["missing_ospp_refs"] == []
+    assert stats["missing_stig_ids"] == []
+    assert stats["missing_fixes"] == [BARE]
+    assert stats["ansible_parity_pct"] == 0
+
+
+def test_all_profile_stats(benchmark):
+    stats = benchmark.get_profile_stats("all")
+    assert stats["profile_id"] == "all"
+    assert stats["rules"] == [BARE, COMPLETE, PARTIAL]
+    assert stats["implemented_sces"] == [PARTIAL]
+
+
+def test_unknown_profile(benchmark):
+    with pytest.raises(SystemExit):
+        benchmark.get_profile_stats("xccdf_org.ssgproject.content_profile_missing")
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+
+import ssg.build_profile_remediations
+from ssg.constants import ansible_system, bash_system
+from ssg.shims import subprocess_check_output
+from ssg.xml import ElementTree
+
+
+DATADIR = os.path.join(os.path.dirname(__file__), "data")
+BENCHMARK_PATH = os.path.join(DATADIR, "profile_remediations_benchmark.xml")
+# Expected remediations of profiles of the benchmark. They haven't been
+# generated by oscap yet; replace them by the output of
+#   oscap xccdf generate fix --profile <profile ID> --template <fix system> \
+#       profile_remediations_benchmark.xml
+# test_golden_remediations_match_oscap compares them where oscap is available.
+GOLDEN_DIR = os.path.join(DATADIR, "profile_remediations")
+BENCHMARK_ID = "xccdf_org.ssgproject.content_benchmark_TEST"
+PROFILE_PREFIX = "xccdf_org.ssgproject.content_profile_"
+RULE_PREFIX = "xccdf_org.ssgproject.content_rule_"
+
+
+def oscap_available():
+    try:
+        subprocess_check_output(["oscap", "--version"])
+    except Exception:
+        return False
+    return True
+
+
+@pytest.fixture
+def remediations():
+    tree = ElementTree.parse(BENCHMARK_PATH)
+    return ssg.build_profile_remediations.BenchmarkRemediations(tree.getroot())
+
+
+def get_body(remediation):
+    """
+    Strip the header comment block of the remediation.
+    """
+    return remediation.split("#" * 79 + "\n\n", 1)[1]
+
+
+def test_selected_rules(remediations):
+    selections, values = remediations._resolve_profile(PROFILE_PREFIX + "base")
+    assert remediations._get_selected_rules(selections) == [
+        RULE_PREFIX + "service", RULE_PREFIX + "timeout"]
+    assert values == {"xccdf_org.ssgproject.content_value_var_timeout": "900"}
+
+    selections, values = remediations._resolve_profile(PROFILE_PREFIX + "extended")
+    # the disabled rule is selected, but its group is not
+    assert remediations._get_selected_rules(selections) == [
+        RULE_PREFIX + "timeout", RULE_PREFIX + "manual"]
+    assert values == {"xccdf_org.ssgproject.content_value_var_timeout": "300"}
+
+
+def test_unknown_profile(remediations):
+    with pytest.raises(ValueError):
+        remediations.generate(PROFILE_PREFIX + "missing", bash_system)
+
+
+def test_bash_remediation(remediations):
+    remediation = remediations.generate(PROFILE_PREFIX + "extended", bash_system)
+    assert remediation.startswith("#!/usr/bin/env bash\n")
+    assert "# Bash Remediation Script for Extended Profile\n" in remediation
+    assert "# Profile Description:\n# Extends the base profile.\n" in remediation
+    assert get_body(remediation) == (
+        "#" * 79 + "\n"
+        "# BEGIN fix (1 / 2) for 'xccdf_org.ssgproject.content_rule_timeout'\n"
+        + "#" * 79 + "\n"
+        "(>&2 echo \"Remediating rule 1/2: 'xccdf_org.ssgproject.content_rule_timeout'\")\n"
+        "echo \"TMOUT=300\" >> /etc/profile\n"
+        "# END fix for 'xccdf_org.ssgproject.content_rule_timeout'\n"
+        "\n"
+        + "#" * 79 + "\n"
+        "# BEGIN fix (2 / 2) for 'xccdf_org.ssgproject.content_rule_manual'\n"
+        + "#" * 79 + "\n"
+        "(>&2 echo \"Remediating rule 2/2: 'xccdf_org.ssgproject.content_rule_manual'\")\n"
+        "(>&2 echo \"FIX FOR THIS RULE 'xccdf_org.ssgproject.content_rule_manual' IS MISSING\")\n"
+        "\n"
+        "# END fix for 'xccdf_org.ssgproject.content_rule_manual'\n"
+        "\n")
+
+
+def test_ansible_remediation(remediations):
+    remediation = remediations.generate(PROFILE_PREFIX + "base", ansible_system)
+    assert remediation.startswith("---\n")
+    assert "# Ansible Playbook for Base Profile\n" in remediation
+    assert get_body(remediation) == (
+        "\n"
+        "- name: Ansible Playbook for xccdf_org.ssgproject.content_profile_base\n"
+        "  hosts: all\n"
+        "  vars:\n"
+        "    var_timeout: !!str 900\n"
+        "  tasks:\n"
+        "    - name: Enable service\n"
+        "      service:\n"
+        "        name: service\n"
+        "        enabled: true\n"
+        "\n"
+        "\n"
+        "    - name: Set the timeout\n"
+        "      lineinfile:\n"
+        "        path: /etc/profile\n"
+        "        line: \"TMOUT={{ var_timeout }}\"\n"
+        "\n")
+
+
+def test_value_without_default():
+    benchmark = ElementTree.fromstring(
+        '<Benchmark xmlns="http://checklists.nist.gov/xccdf/1.2" id="%s">'
+        '<Value id="var_mode" type="string">'
+        '<value selector="strict">0600</value>'
+        '<value selector="loose">0644</value>'
+        '</Value>'
+        '</Benchmark>' % BENCHMARK_ID)
+    remediations = ssg.build_profile_remediations.BenchmarkRemediations(benchmark)
+    # without a default value, the first one in the document is used
+    assert remediations._get_value("var_mode", {}) == "0600"
+    assert remediations._get_value("var_mode", {"var_mode": "0700"}) == "0700"
+    with pytest.raises(ValueError):
+        remediations._get_value("var_missing", {})
+
+
+def read_golden(profile, template):
+    extension = "yml" if template == ansible_system else "sh"
+    path = os.path.join(GOLDEN_DIR, "%s.%s" % (profile, extension))
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+@pytest.mark.parametrize("profile", ["base", "extended"])
+@pytest.mark.parametrize("template", [bash_system, ansible_system])
+def test_golden_remediations(remediations, profile, template):
+    generated = remediations.generate(PROFILE_PREFIX + profile, template)
+    assert generated == read_golden(profile, template)
+
+
+@pytest.mark.skipif(not oscap_available(), reason="oscap is not available")
+@pytest.mark.parametrize("profile", ["base", "extended"])
+@pytest.mark.parametrize("template", [bash_system, ansible_system])
+def test_golden_remediations_match_oscap(profile, template):
+    generated = ssg.build_profile_remediations.generate_for_input_content(
+        BENCHMARK_PATH, BENCHMARK_ID, PROFILE_PREFIX + profile, template)
+    assert generated == read_golden(profile, template)
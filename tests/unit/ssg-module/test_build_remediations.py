@@ -130,3 +130,31 @@ def test_parse_remediation_if_platform_has_version_comparison(cpe_platforms_with
     remediation_obj = remediation_cls(rhel_bash)
     conditionals = remediation_obj.get_stripped_conditionals("bash", ["package_ntp_eq_1_0"], cpe_platforms_with_version_comparison)
     assert conditionals == ["rpm --quiet -q ntp && { real=$(rpm -q --queryformat '%{VERSION}-%{RELEASE}' ntp); ver=1.0;[[ \"$real\" == \"$ver\" ]]; }"]
+
+
+def test_parsed_ansible_remediations(tmpdir):
+    fix_path = str(tmpdir.join("rule.yml"))
+    tmpdir.join("rule.yml").write("# reboot = false\n- name: Task\n  command: 'true'\n")
+    fix = sbr.parse_from_file_without_jinja(fix_path)
+    tasks = ordered_load(fix.contents)
+
+    parsed = sbr.ParsedAnsibleRemediations()
+    parsed.add("rule", fix_path, fix.config, tasks)
+    parsed.add("int_keys", fix_path, fix.config, [{1: "one"}])
+    parsed.add("date", fix_path, fix.config, ordered_load("- date: 2021-01-01"))
+    parsed_path = str(tmpdir.join("parsed.json"))
+    parsed.save(parsed_path)
+
+    loaded = sbr.ParsedAnsibleRemediations.load(parsed_path)
+    loaded_fix = loaded.get("rule", fix_path)
+    assert loaded_fix.contents == tasks
+    assert list(loaded_fix.contents[0].keys()) == ["name", "command"]
+    assert loaded_fix.config["reboot"] == "false"
+    assert loaded_fix.config["strategy"] is None
+    assert loaded.get("int_keys", fix_path) is None
+    assert loaded.get("date", fix_path) is None
+    assert loaded.get("other_rule", fix_path) is None
+
+    tmpdir.join("rule.yml").write("- name: Changed task\n  command: 'true'\n")
+    assert loaded.get("rule", fix_path) is None
+    assert sbr.ParsedAnsibleRemediations.load(str(tmpdir.join("missing.json"))) is None
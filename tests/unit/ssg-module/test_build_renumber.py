@@ -3,6 +3,7 @@ import pytest
 import xml.etree.ElementTree as ET
 
 import ssg.build_renumber
+import ssg.parse_oval
 from ssg.constants import XCCDF12_NS, cce_uri, oval_namespace
 from ssg.utils import SSGError
 
@@ -400,3 +401,46 @@ def test_verify_correct_form_of_referenced_cce_identifiers_no_cce(
             xccdf_with_no_cce)
     except SSGError as e:
         assert False, "Raised SSGError: " + str(e)
+
+
+def test_xccdf_linking_index(benchmark_with_many_rules_but_not_all_have_cces):
+    bench = benchmark_with_many_rules_but_not_all_have_cces
+    group = ET.SubElement(bench, "{%s}Group" % XCCDF12_NS)
+    value = ET.SubElement(group, "{%s}Value" % XCCDF12_NS)
+    value.set("id", "var_password_age")
+    rule = ET.SubElement(group, "{%s}Rule" % XCCDF12_NS)
+    rule.set("id", "xccdf_org.ssgproject.content_rule_grouped")
+    check = ET.SubElement(rule, "{%s}check" % XCCDF12_NS)
+
+    index = ssg.build_renumber.XCCDFLinkingIndex(bench)
+    assert [xccdfid for xccdfid, _ in index.rules] == [
+        xccdfid for xccdfid, _ in ssg.build_renumber.rules_with_ids_generator(bench)]
+    assert index.rules[-1] == ("grouped", rule)
+    assert index.rule_checks["grouped"] == [check]
+    assert index.rule_checks["xccdf_org.ssgproject_content_rule_selinux_state"] == []
+    assert list(index.rule_cces) == ["xccdf_org.ssgproject_content_rule_accounts_tmout"]
+    assert index.values == {"var_password_age": value}
+    assert ssg.build_renumber.create_xccdf_id_to_cce_id_mapping(bench, index) == \
+        ssg.build_renumber.create_xccdf_id_to_cce_id_mapping(bench)
+
+
+def test_oval_linking_index(oval_with_broken_extend_definition):
+    tree = oval_with_broken_extend_definition
+    index = ssg.build_renumber.OVALLinkingIndex(tree)
+    groups = ssg.parse_oval.get_container_groups(
+        os.path.join(DATADIR, "oval_with_broken_extend_definition.xml"))
+    assert {name: sorted(group) for name, group in index.oval_groups.items()} == \
+        {name: sorted(group) for name, group in groups.items()}
+    assert index.definitions == ssg.xml.map_elements_to_their_ids(
+        tree, ".//{%s}definition" % oval_namespace)
+    for def_id, definition in index.definitions.items():
+        assert index.extended_definitions[def_id] == [
+            ext.get("definition_ref")
+            for ext in definition.iter("{%s}extend_definition" % oval_namespace)]
+    assert index.external_variables == tree.findall(
+        ".//{%s}external_variable" % oval_namespace)
+
+    miss = ssg.build_renumber.get_oval_checks_extending_non_existing_checks(
+        tree, index.definitions, index)
+    assert miss == ssg.build_renumber.get_oval_checks_extending_non_existing_checks(
+        tree, index.definitions)
@@ -9,6 +9,7 @@ import xml.etree.ElementTree as ET
 
 from ssg.build_cpe import ProductCPEs
 import ssg.build_yaml
+import ssg.environment
 import ssg.entities.common
 from ssg.constants import XCCDF12_NS, cpe_language_namespace, xhtml_namespace
 from ssg.yaml import open_raw
@@ -533,3 +534,35 @@ def test_rule_to_ocil(rule_accounts_tmout):
             expected_file_path = os.path.join(DATADIR, expected_filename)
             diff = xmldiff_main.diff_files(real_file_path, expected_file_path)
             assert diff == []
+
+
+def test_build_loader_parallel_loading_is_equivalent():
+    ssg_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(DATADIR))))
+    env_yaml = ssg.environment.open_environment(
+        os.path.join(ssg_root, "build", "build_config.yml"),
+        os.path.join(ssg_root, "products", "rhel8", "product.yml"))
+    guide_dir = os.path.join(ssg_root, "linux_os", "guide", "services", "ssh")
+
+    def load(jobs):
+        product_cpes = ProductCPEs()
+        product_cpes.load_product_cpes(env_yaml)
+        product_cpes.load_content_cpes(env_yaml)
+        loader = ssg.build_yaml.BuildLoader(None, env_yaml, product_cpes, jobs=jobs)
+        loader.process_directory_trees([guide_dir])
+        return loader
+
+    serial = load(1)
+    parallel = load(2)
+    assert parallel.preloaded_entities is None
+    assert sorted(serial.all_rules) == sorted(parallel.all_rules)
+    assert sorted(serial.all_values) == sorted(parallel.all_values)
+    assert sorted(serial.all_groups) == sorted(parallel.all_groups)
+    for group_id, group in serial.all_groups.items():
+        parallel_group = parallel.all_groups[group_id]
+        assert list(group.rules) == list(parallel_group.rules)
+        assert list(group.groups) == list(parallel_group.groups)
+    for rule_id, rule in serial.all_rules.items():
+        parallel_rule = parallel.all_rules[rule_id]
+        assert rule.represent_as_dict() == parallel_rule.represent_as_dict()
+    assert len(serial.rules_manifest.rules) >= len(serial.all_rules)
+    assert serial.rules_manifest.rules == parallel.rules_manifest.rules
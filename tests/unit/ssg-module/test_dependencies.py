@@ -0,0 +1,52 @@
+import ssg.dependencies
+import ssg.jinja
+
+
+def test_dependency_manifest(tmpdir):
+    source = tmpdir.join("source.jinja")
+    source.write("{{{ product }}}")
+    output = tmpdir.join("output.txt")
+    output.write("rhel8")
+    manifest_path = str(tmpdir.join("dependencies.json"))
+    env = {"product": "rhel8", "unused": "value"}
+
+    manifest = ssg.dependencies.DependencyManifest(manifest_path)
+    assert not manifest.is_up_to_date("artifact", env)
+    with manifest.recording() as consumed:
+        ssg.jinja.process_file(str(source), env)
+    assert consumed["sources"] == {str(source)}
+    assert consumed["env_names"] == {"product"}
+    manifest.record("artifact", [str(output)], consumed, env)
+    manifest.save()
+
+    manifest = ssg.dependencies.DependencyManifest(manifest_path)
+    assert manifest.is_up_to_date("artifact", env)
+    assert manifest.is_up_to_date("artifact", dict(env, unused="other"))
+    assert not manifest.is_up_to_date("artifact", dict(env, product="rhel9"))
+
+    source.write("{{{ product }}}\n")
+    manifest = ssg.dependencies.DependencyManifest(manifest_path)
+    assert not manifest.is_up_to_date("artifact", env)
+
+    manifest = ssg.dependencies.DependencyManifest(manifest_path)
+    output.remove()
+    assert not manifest.is_up_to_date("artifact", env)
+
+
+def test_dependency_manifest_removes_stale_outputs(tmpdir):
+    outputs = [tmpdir.join(name) for name in ["a.xml", "b.xml", "c.xml"]]
+    for output in outputs:
+        output.write("")
+    manifest = ssg.dependencies.DependencyManifest(str(tmpdir.join("dependencies.json")))
+    consumed = dict(sources=set(), env_names=set())
+    manifest.record("first", [str(outputs[0]), str(outputs[1])], consumed, {})
+    manifest.record("second", [str(outputs[2])], consumed, {})
+
+    # outputs that the artifact doesn't produce anymore are removed
+    manifest.record("first", [str(outputs[0])], consumed, {})
+    assert not outputs[1].check()
+
+    manifest.remove_other_artifacts(["second"])
+    assert sorted(manifest.artifacts) == ["second"]
+    assert not outputs[0].check()
+    assert outputs[2].check()
@@ -26,3 +26,47 @@ def test_macro_expansion():
 
     complete_defs = get_definitions_with_substitution(dict(global_var="value"))
     assert complete_defs["expand_to_global_var"]() == "value"
+
+
+def test_load_macros_reuses_compiled_macros():
+    ssg.jinja.clear_macros_cache()
+    first = ssg.jinja.load_macros(dict(product="rhel8"))
+    second = ssg.jinja.load_macros(dict(product="rhel8"))
+    assert first["bash_package_install"] is second["bash_package_install"]
+
+
+def test_load_macros_recompiles_on_relevant_change():
+    ssg.jinja.clear_macros_cache()
+    rhel = ssg.jinja.load_macros(dict(product="rhel8", rule_title="first"))
+    other_title = ssg.jinja.load_macros(dict(product="rhel8", rule_title="second"))
+    # 10-fixtext.jinja doesn't read rule_title
+    assert rhel["fixtext_package_installed"] is other_title["fixtext_package_installed"]
+    # 10-ansible.jinja does read rule_title
+    assert rhel["ansible_sshd_set"] is not other_title["ansible_sshd_set"]
+
+    ubuntu = ssg.jinja.load_macros(dict(product="ubuntu2204", rule_title="first"))
+    assert rhel["fixtext_package_installed"] is not ubuntu["fixtext_package_installed"]
+
+
+def test_load_macros_keeps_recently_used_macros(monkeypatch):
+    ssg.jinja.clear_macros_cache()
+    monkeypatch.setattr(ssg.jinja, "MACRO_CACHE_SIZE", 24)
+    first = ssg.jinja.load_macros(dict(product="rhel8", rule_title="title 0"))
+    for number in range(1, 20):
+        last = ssg.jinja.load_macros(dict(product="rhel8", rule_title="title %d" % number))
+        assert len(ssg.jinja._load_macro_file_cached.cache) <= 24
+    # Macros that don't depend on the rule are compiled only once.
+    assert first["fixtext_package_installed"] is last["fixtext_package_installed"]
+
+
+def test_freeze():
+    frozen = ssg.jinja.freeze(dict(b=[1, dict(c=2)], a=set(["x"])))
+    assert frozen == (("a", ("x",)), ("b", (1, (("c", 2),))))
+    hash(frozen)
+
+
+def test_precompile_templates():
+    definitions = os.path.join(os.path.dirname(__file__), "data", "definitions.jinja")
+    ssg.jinja.precompile_templates([definitions])
+    environment = ssg.jinja._get_jinja_environment(dict())
+    assert any(key[1] == definitions for key in environment.cache.keys())
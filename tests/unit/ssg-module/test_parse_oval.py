@@ -0,0 +1,92 @@
+import pytest
+
+import ssg.parse_oval
+from ssg.xml import ElementTree as ET
+
+OVAL_WITH_SHARED_REFERENCES = """
+<oval_definitions xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5"
+    xmlns:ind="http://oval.mitre.org/XMLSchema/oval-definitions-5#independent">
+  <definitions>
+    <definition id="first">
+      <criteria>
+        <extend_definition definition_ref="second"/>
+        <criterion test_ref="shared_test"/>
+      </criteria>
+    </definition>
+    <definition id="second">
+      <criteria>
+        <criterion test_ref="shared_test"/>
+        <criterion test_ref="other_test"/>
+      </criteria>
+    </definition>
+  </definitions>
+  <tests>
+    <ind:textfilecontent54_test id="shared_test">
+      <ind:object object_ref="shared_object"/>
+    </ind:textfilecontent54_test>
+    <ind:textfilecontent54_test id="other_test">
+      <ind:object object_ref="shared_object"/>
+      <ind:state state_ref="other_state"/>
+    </ind:textfilecontent54_test>
+  </tests>
+  <objects>
+    <ind:textfilecontent54_object id="shared_object">
+      <ind:filepath var_ref="local_var"/>
+    </ind:textfilecontent54_object>
+  </objects>
+  <states>
+    <ind:textfilecontent54_state id="other_state">
+      <ind:text var_ref="state_var"/>
+    </ind:textfilecontent54_state>
+  </states>
+  <variables>
+    <local_variable id="local_var">
+      <concat>
+        <variable_component var_ref="path_var"/>
+        <literal_component>/file</literal_component>
+      </concat>
+    </local_variable>
+    <external_variable id="path_var"/>
+    <external_variable id="state_var"/>
+  </variables>
+</oval_definitions>
+"""
+
+
+@pytest.fixture
+def oval_groups():
+    tree = ET.ElementTree(ET.fromstring(OVAL_WITH_SHARED_REFERENCES))
+    return ssg.parse_oval._get_container_oval_groups_from_tree(tree)
+
+
+def test_resolve_definition(oval_groups):
+    definitions = oval_groups["definitions"]
+    assert ssg.parse_oval.resolve_definition(oval_groups, definitions["first"]) == {
+        "path_var"}
+    assert ssg.parse_oval.resolve_definition(oval_groups, definitions["second"]) == {
+        "path_var", "state_var"}
+    assert ssg.parse_oval.find_extending_defs(oval_groups, definitions["first"]) == {
+        "second"}
+    assert ssg.parse_oval.find_extending_defs(oval_groups, definitions["second"]) == set()
+
+
+def test_reference_graph_shares_resolved_references(oval_groups):
+    graph = ssg.parse_oval.OVALReferenceGraph(oval_groups)
+    assert ssg.parse_oval._get_resolved_definitions(oval_groups) == {
+        def_id: ssg.parse_oval.resolve_definition(oval_groups, definition, graph)
+        for def_id, definition in oval_groups["definitions"].items()}
+
+    shared_object_key = (("objects", "shared_object"), "external_variable", "id")
+    assert graph._found_through_references[shared_object_key] == {"path_var"}
+    del oval_groups["objects"]["shared_object"]
+    assert ssg.parse_oval.resolve_definition(
+        oval_groups, oval_groups["definitions"]["second"], graph) == {
+            "path_var", "state_var"}
+
+
+def test_missing_reference(oval_groups):
+    del oval_groups["states"]["other_state"]
+    with pytest.raises(AssertionError) as e:
+        ssg.parse_oval.resolve_definition(
+            oval_groups, oval_groups["definitions"]["second"])
+    assert "Missing definition" in str(e.value)
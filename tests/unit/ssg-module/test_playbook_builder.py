@@ -1,7 +1,9 @@
 import pytest
 
 import os
+import ssg.build_remediations
 import ssg.playbook_builder
+import ssg.yaml
 import yaml
 import shutil
 
@@ -64,3 +66,30 @@ def test_build_rule_playbook():
     shutil.rmtree(output_dir)
 
 
+def test_build_rule_playbook_from_parsed_remediations():
+    snippet_path = os.path.join(input_dir, rule + ".yml")
+    fix = ssg.build_remediations.parse_from_file_without_jinja(snippet_path)
+    parsed = ssg.build_remediations.ParsedAnsibleRemediations()
+    parsed.add(rule, snippet_path, fix.config, ssg.yaml.ordered_load(fix.contents))
+
+    playbook_builder = ssg.playbook_builder.PlaybookBuilder(
+        product_yaml, input_dir, output_dir, resolved_rules_dir,
+        resolved_profiles_dir, build_config_yaml
+    )
+    playbook_builder.build(profile, rule)
+    with open(real_output_filepath, "r") as real_output:
+        playbook_from_snippet = real_output.read()
+    shutil.rmtree(output_dir)
+
+    playbook_builder = ssg.playbook_builder.PlaybookBuilder(
+        product_yaml, input_dir, output_dir, resolved_rules_dir,
+        resolved_profiles_dir, build_config_yaml, parsed
+    )
+    playbook_builder.build(profile, rule)
+    with open(real_output_filepath, "r") as real_output:
+        playbook_from_parsed = real_output.read()
+    shutil.rmtree(output_dir)
+
+    assert playbook_from_parsed == playbook_from_snippet
+    # the parsed tasks keep their tags for playbooks of other profiles
+    assert "tags" in parsed.get(rule, snippet_path).contents[1]
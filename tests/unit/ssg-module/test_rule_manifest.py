@@ -0,0 +1,39 @@
+import os
+
+import ssg.build_yaml
+import ssg.rule_manifest
+
+DATADIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "data"))
+
+
+def test_rules_manifest(tmpdir):
+    rule_file = tmpdir.join("rule.yml")
+    with open(os.path.join(DATADIR, "accounts_tmout.yml")) as f:
+        rule_file.write(f.read())
+    manifest_path = str(tmpdir.join("rules_manifest.json"))
+    env_yaml = {"product": "rhel8"}
+
+    rule = ssg.build_yaml.Rule.from_yaml(str(rule_file), env_yaml)
+    manifest = ssg.rule_manifest.RulesManifest(env_yaml)
+    manifest.add_rule(rule)
+    manifest.save(manifest_path)
+
+    manifest = ssg.rule_manifest.RulesManifest.load(manifest_path, env_yaml)
+    manifest_rule = manifest.get_rule(str(rule_file))
+    assert manifest_rule.id_ == rule.id_
+    assert manifest_rule.title == rule.title
+    assert manifest_rule.prodtype == rule.prodtype
+    assert manifest_rule.platforms == rule.platforms
+    assert manifest_rule.template == rule.template
+    assert manifest_rule.identifiers == rule.identifiers
+    assert manifest.get_rule(str(tmpdir.join("other.yml"))) is None
+
+    assert ssg.rule_manifest.RulesManifest.load(
+        manifest_path, {"product": "rhel9"}) is None
+    assert ssg.rule_manifest.RulesManifest.load(
+        manifest_path, dict(env_yaml, cmake_build_type="Debug")) is None
+    assert ssg.rule_manifest.RulesManifest.load(
+        str(tmpdir.join("missing.json")), env_yaml) is None
+
+    rule_file.write("\n", mode="a")
+    assert manifest.get_rule(str(rule_file)) is None
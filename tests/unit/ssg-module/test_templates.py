@@ -4,6 +4,7 @@ import ssg.utils
 import ssg.products
 import ssg.build_yaml
 import ssg.build_cpe
+import ssg.dependencies
 import ssg.templates as tpl
 
 from ssg.environment import open_environment
@@ -63,3 +64,108 @@ def test_platform_templates():
 
         assert "<title>Package %s is installed</title>" % (cpe.template['vars']['pkgname'],) \
                in oval_content
+
+
+def test_template_preprocess_module_loaded_once(tmpdir):
+    template_dir = tmpdir.mkdir("uppercase_value")
+    template_dir.join("template.yml").write("supported_languages:\n  - oval\n")
+    template_dir.join("oval.template").write("{{{ VALUE }}}\n")
+    template_dir.join("template.py").write(
+        "def preprocess(data, lang):\n"
+        "    data['value'] = data['value'].upper()\n"
+        "    return data\n")
+
+    template = tpl.Template.load_template(str(tmpdir), "uppercase_value")
+    preprocess_function = template._get_preprocess_function()
+    assert template.preprocess(dict(value="a"), "oval") == dict(VALUE="A")
+    assert template.preprocess(dict(value="b"), "oval") == dict(VALUE="B")
+    assert template._get_preprocess_function() is preprocess_function
+    assert template.preprocessing_count == 2
+
+    rendered = template.render(tpl.LANGUAGES["oval"], dict(VALUE="A"))
+    assert rendered.strip() == "A"
+    assert template.rendering_count == 1
+
+
+def test_timing_report():
+    builder = ssg.templates.Builder(
+        env_yaml, '', templates_dir,
+        '', '', '', cpe_items_dir)
+    assert builder.get_timing_report() == []
+
+    builder.build_lang_for_templatable(
+        ssg.build_yaml.Rule.get_instance_from_full_dict({
+            "id_": "package_ntp_installed",
+            "title": "package_ntp_installed",
+            "template": {"name": "package_installed", "vars": {"pkgname": "ntp"}},
+        }),
+        ssg.templates.LANGUAGES["oval"])
+    report = builder.get_timing_report()
+    assert len(report) == 1
+    assert report[0].startswith("package_installed: preprocessed 1x in ")
+
+
+def write_package_installed_rule(rules_dir, pkgname):
+    rule = ssg.build_yaml.Rule.get_instance_from_full_dict({
+        "id_": "package_%s_installed" % pkgname,
+        "title": "package_%s_installed" % pkgname,
+        "template": {"name": "package_installed", "vars": {"pkgname": pkgname}},
+    })
+    for key, default in rule.KEYS.items():
+        if not hasattr(rule, key):
+            setattr(rule, key, default())
+    rule.dump_yaml(str(rules_dir.join(rule.id_ + ".yml")))
+
+
+def test_build_all_rules_in_parallel(tmpdir):
+    rules_dir = tmpdir.mkdir("rules")
+    for pkgname in ["ntp", "chrony", "sudo"]:
+        write_package_installed_rule(rules_dir, pkgname)
+
+    def build(jobs):
+        checks_dir = tmpdir.mkdir("checks_%d" % jobs)
+        checks_dir.mkdir("oval")
+        builder = ssg.templates.Builder(
+            env_yaml, str(rules_dir), templates_dir,
+            str(tmpdir.join("fixes_%d" % jobs)), str(checks_dir), '', cpe_items_dir)
+        builder.build_all_rules(jobs)
+        assert builder.templates["package_installed"].rendering_count == 3
+        return {f.basename: f.read() for f in checks_dir.join("oval").listdir()}
+
+    serial = build(1)
+    assert sorted(serial) == [
+        "package_chrony_installed.xml", "package_ntp_installed.xml", "package_sudo_installed.xml"]
+    assert build(2) == serial
+
+
+def test_build_all_rules_incrementally(tmpdir):
+    rules_dir = tmpdir.mkdir("rules")
+    for pkgname in ["ntp", "chrony"]:
+        write_package_installed_rule(rules_dir, pkgname)
+    checks_dir = tmpdir.mkdir("checks")
+    checks_dir.mkdir("oval")
+    manifest_path = str(tmpdir.join("dependencies.json"))
+
+    def build():
+        builder = ssg.templates.Builder(
+            env_yaml, str(rules_dir), templates_dir,
+            str(tmpdir.join("fixes")), str(checks_dir), '', cpe_items_dir,
+            ssg.dependencies.DependencyManifest(manifest_path))
+        builder.build_all_rules()
+        builder.dependency_manifest.save()
+        return builder.templates["package_installed"].rendering_count
+
+    assert build() == 2
+    assert build() == 0
+
+    write_package_installed_rule(rules_dir, "sudo")
+    assert build() == 1
+
+    checks_dir.join("oval", "package_ntp_installed.xml").remove()
+    assert build() == 1
+    assert checks_dir.join("oval", "package_ntp_installed.xml").check()
+
+    rules_dir.join("package_sudo_installed.yml").remove()
+    assert build() == 0
+    assert not checks_dir.join("oval", "package_sudo_installed.xml").check()
+    assert checks_dir.join("oval", "package_chrony_installed.xml").check()
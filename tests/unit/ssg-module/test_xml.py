@@ -1,3 +1,4 @@
+import ssg.constants
 import ssg.xml
 
 import os
@@ -29,3 +30,25 @@ def test_xml_content():
     assert "cpe.oval.xml" in xml_content.components["OVAL"]
     xml_component = xml_content.components["OVAL"]["test_single_rule.oval.xml"]
     assert type(xml_component) is ssg.xml.XMLComponent
+
+
+def test_iterparse_elements():
+    rule_tag = "{%s}Rule" % ssg.constants.XCCDF12_NS
+    definition_tag = "{%s}definition" % ssg.constants.oval_namespace
+    expected = [
+        (element.tag, element.get("id"), len(list(element.iter())))
+        for element in ET.parse(data_stream_path).getroot().iter()
+        if element.tag in (rule_tag, definition_tag)]
+    streamed = [
+        (element.tag, element.get("id"), len(list(element.iter())))
+        for element in ssg.xml.iterparse_elements(
+            data_stream_path, [rule_tag, definition_tag])]
+    assert expected
+    assert streamed == expected
+
+
+def test_iterparse_elements_skips_nested_elements(tmpdir):
+    document = tmpdir.join("nested.xml")
+    document.write("<a><b id='1'><b id='2'/></b><c><b id='3'/></c></a>")
+    assert [b.get("id") for b in ssg.xml.iterparse_elements(str(document), ["b"])] == [
+        "1", "3"]
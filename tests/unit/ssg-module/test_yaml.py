@@ -1,3 +1,5 @@
+import os
+
 import ssg.yaml
 
 
@@ -46,3 +48,66 @@ def test_list_or_string_update():
         ["something", "entirely"],
         ["entirely", "else"],
     ) == ["something", "entirely", "entirely", "else"]
+
+
+def test_expanded_yaml_cache(tmpdir):
+    source = tmpdir.join("entity.yml")
+    source.write(
+        "title: {{{ title }}}\n"
+        "{{% if product == 'rhel8' %}}\n"
+        "description: {{{ description }}}\n"
+        "{{% endif %}}\n")
+    cache = ssg.yaml.ExpandedYamlCache(str(tmpdir.join("cache")))
+
+    rhel = dict(product="rhel8", title="Title", description="desc", other="x")
+    assert cache.open_and_expand(str(source), rhel) == dict(title="Title", description="desc")
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # Values that the template didn't read don't matter
+    rhel["other"] = "y"
+    assert cache.open_and_expand(str(source), rhel) == dict(title="Title", description="desc")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    rhel["description"] = "new desc"
+    assert cache.open_and_expand(str(source), rhel) == dict(title="Title", description="new desc")
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    fedora = dict(product="fedora", title="Title", description="new desc")
+    assert cache.open_and_expand(str(source), fedora) == dict(title="Title")
+    assert cache.open_and_expand(str(source), rhel) == dict(title="Title", description="new desc")
+    assert (cache.hits, cache.misses) == (2, 3)
+
+    source.write("title: {{{ title }}} changed\n")
+    assert cache.open_and_expand(str(source), fedora) == dict(title="Title changed")
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_expanded_yaml_cache_prune(tmpdir):
+    cache = ssg.yaml.ExpandedYamlCache(str(tmpdir.join("cache")))
+    sources = []
+    for name in ["used.yml", "unused.yml"]:
+        source = tmpdir.join(name)
+        source.write("title: {{{ title }}} %s\n" % name)
+        cache.open_and_expand(str(source), dict(title="Title"))
+        sources.append(source)
+    for result in tmpdir.join("cache").visit("*.pickle"):
+        os.utime(str(result), (0, 0))
+
+    # using a result makes it recent
+    cache.open_and_expand(str(sources[0]), dict(title="Title"))
+    assert cache.prune(60) == 1
+    assert cache.prune(60) == 0
+    assert len(tmpdir.join("cache").listdir()) == 1
+
+    cache.open_and_expand(str(sources[1]), dict(title="Title"))
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.prune(-1) == 2
+    assert tmpdir.join("cache").listdir() == []
+
+
+def test_get_expanded_yaml_cache(tmpdir):
+    assert ssg.yaml.get_expanded_yaml_cache(dict()) is None
+    env = dict(yaml_cache_enabled="true", yaml_cache_dir=str(tmpdir))
+    cache = ssg.yaml.get_expanded_yaml_cache(env)
+    assert cache.cache_dir == str(tmpdir)
+    assert ssg.yaml.get_expanded_yaml_cache(env) is cache
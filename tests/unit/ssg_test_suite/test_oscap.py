@@ -0,0 +1,60 @@
+import xml.etree.ElementTree as ET
+
+from ssg_test_suite import oscap
+
+
+ARF = """<?xml version="1.0" encoding="UTF-8"?>
+<arf:asset-report-collection xmlns:arf="http://scap.nist.gov/schema/asset-reporting-format/1.1">
+  <arf:reports>
+    <arf:report id="xccdf1">
+      <arf:content>
+        <TestResult xmlns="http://checklists.nist.gov/xccdf/1.2" id="result">
+          <target>localhost</target>
+          <rule-result idref="rule_a"><result>pass</result></rule-result>
+          <rule-result idref="rule_b"><result>fail</result></rule-result>
+          <score>50</score>
+        </TestResult>
+      </arf:content>
+    </arf:report>
+  </arf:reports>
+</arf:asset-report-collection>
+"""
+
+
+def test_find_rule_result_in_output():
+    output = "rule_a:fail\nrule_b:pass\nrule_a:fixed\n"
+    assert oscap.find_rule_result_in_output("rule_a", output) == "fixed"
+    assert oscap.find_rule_result_in_output("rule_b", output) == "pass"
+    assert oscap.find_rule_result_in_output("rule_c", output) == "notselected"
+
+
+def test_split_arf_by_rules(tmpdir):
+    arf = tmpdir.join("batch-arf.xml")
+    arf.write(ARF)
+    paths = {
+        "rule_a": str(tmpdir.join("rule_a-arf.xml")),
+        "rule_b": str(tmpdir.join("rule_b-arf.xml")),
+    }
+    oscap.split_arf_by_rules(str(arf), paths)
+
+    for rule_id, path in paths.items():
+        assert oscap.triage_xml_results(path) == {
+            "pass" if rule_id == "rule_a" else "fail": {rule_id}}
+        test_result = ET.parse(path).find(".//{%s}TestResult" % oscap._XCCDF_NS)
+        assert [child.tag.split("}")[1] for child in test_result] == [
+            "target", "rule-result", "score"]
+
+
+def test_iter_rule_results(tmpdir):
+    arf = tmpdir.join("arf.xml")
+    arf.write(ARF)
+    assert list(oscap.iter_rule_results(str(arf))) == [("rule_a", "pass"), ("rule_b", "fail")]
+    assert oscap.get_result_id_from_arf(str(arf), str(tmpdir.join("verbose.log"))) == "result"
+
+
+def test_get_result_id_from_arf_reads_only_start_of_test_result(tmpdir):
+    arf = tmpdir.join("arf.xml")
+    # The file ends with the start tag, the rest of it doesn't need to be parsed.
+    start_tag_end = ARF.index(">", ARF.index("<TestResult")) + 1
+    arf.write(ARF[:start_tag_end])
+    assert oscap.get_result_id_from_arf(str(arf), str(tmpdir.join("verbose.log"))) == "result"
@@ -0,0 +1,91 @@
+import oval_tester
+from ssg.constants import oval_namespace
+
+
+SHORTHAND = """
+<def-group>
+  <definition class="compliance" id="{{{ rule_id }}}" version="1">
+    <criteria>
+      <criterion test_ref="%(test_id)s" />
+    </criteria>
+  </definition>
+  <ind:textfilecontent54_test check="all" id="%(test_id)s" version="1">
+    <ind:object object_ref="%(test_id)s_object" />
+  </ind:textfilecontent54_test>
+  <ind:textfilecontent54_object id="%(test_id)s_object" version="1">
+    <ind:filepath>CONFIG_FILE</ind:filepath>
+    <ind:pattern operation="pattern match">^speed$</ind:pattern>
+    <ind:instance datatype="int">1</ind:instance>
+  </ind:textfilecontent54_object>
+</def-group>
+"""
+
+# The first two test cases share the IDs of their test and object.
+TEST_IDS = ["test_shared", "test_shared", "test_other", "test_third", "test_fourth"]
+
+
+def load_test_cases(tester, tmpdir):
+    for test_id in TEST_IDS:
+        tester.test(test_id, SHORTHAND % dict(test_id=test_id), "speed", "true")
+    return [
+        tester._load_test_case(index, test_case, str(tmpdir))
+        for index, test_case in enumerate(tester.test_cases)]
+
+
+def get_entity_ids(shorthand_tree):
+    return set(
+        node.get("id") for node in shorthand_tree.findall(
+            ".//{%s}def-group/*" % oval_namespace))
+
+
+def test_create_batches(tmpdir):
+    tester = oval_tester.OVALTester(verbose=False, batch=True, jobs=2)
+    loaded_test_cases = load_test_cases(tester, tmpdir)
+    batches = tester._create_batches(loaded_test_cases)
+
+    assert sorted(index for batch in batches for index in batch) == list(range(len(TEST_IDS)))
+    assert len(batches) >= 2
+    assert not any(0 in batch and 1 in batch for batch in batches)
+    for batch in batches:
+        batch_entity_ids = set()
+        for index in batch:
+            entity_ids = get_entity_ids(loaded_test_cases[index][1])
+            assert not entity_ids & batch_entity_ids
+            batch_entity_ids |= entity_ids
+
+
+def test_get_results():
+    oscap_output = "\n".join([
+        "Definition oval:ssg-test_1:def:1: false",
+        "Evaluation done.",
+        "Definition oval:ssg-test_0:def:1: true",
+    ])
+    assert oval_tester._get_results(oscap_output) == {
+        "oval:ssg-test_0:def:1": "true",
+        "oval:ssg-test_1:def:1": "false",
+    }
+
+
+def test_evaluate_batches_maps_results_to_test_cases(tmpdir, monkeypatch):
+    tester = oval_tester.OVALTester(verbose=False, batch=True, jobs=1)
+    loaded_test_cases = load_test_cases(tester, tmpdir.mkdir("cases"))
+    batches = tester._create_batches(loaded_test_cases)
+
+    def evaluate_oval_file(oval_path):
+        # Every definition evaluates to the index of its test case,
+        # and only definitions of the evaluated document get a result.
+        batch_index = int(oval_path.rsplit("_", 1)[1].split(".")[0])
+        with open(oval_path) as f:
+            document = f.read()
+        results = dict()
+        for index in batches[batch_index]:
+            definition_id = loaded_test_cases[index][0]
+            assert 'id="%s"' % definition_id in document
+            results[definition_id] = str(index)
+        return results
+
+    monkeypatch.setattr(oval_tester, "_evaluate_oval_file", evaluate_oval_file)
+    case_results = tester._evaluate_batches(
+        batches, loaded_test_cases, str(tmpdir.mkdir("batches")))
+    assert case_results == dict(
+        (index, str(index)) for index in range(len(TEST_IDS)))
@@ -0,0 +1,53 @@
+import threading
+
+from ssg_test_suite import result_cache
+
+
+PASSED = {
+    "rule_id": "xccdf_org.ssgproject.content_rule_audit_enabled",
+    "scenario_script": "correct.pass.sh",
+    "backend": "podman-based",
+    "scanning_mode": "online",
+    "remediated_by": "oscap",
+    "datastream": "ssg-rhel9-ds.xml",
+    "run_timestamp": "2022-01-01 10:00",
+    "preparation": True,
+    "initial_scan": True,
+}
+FAILED = dict(PASSED, scenario_script="wrong.fail.sh", initial_scan=False)
+
+
+def test_get_scenario_key():
+    key = result_cache.get_scenario_key("image", "rule", "script")
+    assert key == result_cache.get_scenario_key("image", "rule", "script")
+    assert key != result_cache.get_scenario_key("image", "rule", "other script")
+    assert key != result_cache.get_scenario_key("imager", "ule", "script")
+
+
+def test_result_cache(tmpdir):
+    path = str(tmpdir.join("cache.json"))
+    cache = result_cache.ScenarioResultCache(path)
+    assert cache.get("passed") is None
+    cache.store("passed", PASSED)
+    cache.store("failed", FAILED)
+    cache.save()
+
+    cache = result_cache.ScenarioResultCache(path)
+    assert cache.get("passed") == PASSED
+    assert cache.get("failed") is None
+
+
+def test_result_cache_is_shared_by_threads(tmpdir):
+    path = str(tmpdir.join("cache.json"))
+    cache = result_cache.ScenarioResultCache(path)
+    threads = [
+        threading.Thread(target=cache.store, args=("passed %d" % n, PASSED))
+        for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.save()
+
+    cache = result_cache.ScenarioResultCache(path)
+    assert all(cache.get("passed %d" % n) == PASSED for n in range(20))
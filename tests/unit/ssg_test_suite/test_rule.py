@@ -60,3 +60,47 @@ def test_scenario_defaults():
     s.override_profile("xccdf_org.ssgproject.content_profile_cis")
     assert "xccdf_org.ssgproject.content_profile_cis" in \
         s.script_params["profiles"]
+
+
+def test_make_batches():
+    checker = rule.RuleChecker(None)
+    checker.batch_size = 2
+    checker._batchable_scenarios = [
+        ("ospp", "/group_a", ("a1",)),
+        ("ospp", "/group_a", ("a2",)),
+        ("ospp", "/group_b", ("b1",)),
+        ("cis", "/group_b", ("b2",)),
+        ("ospp", "/group_c", ("c1",)),
+        ("ospp", "/group_d", ("d1",)),
+    ]
+    assert checker._make_batches() == [
+        ("ospp", [("a1",), ("b1",)]),
+        ("ospp", [("a2",), ("c1",)]),
+        ("cis", [("b2",)]),
+        ("ospp", [("d1",)]),
+    ]
+
+
+@pytest.mark.parametrize("file_name", [
+    "correct_defaults.fail.sh", "correct_defaults.notapplicable.sh",
+    "correct_defaults.error.sh"])
+def test_get_batch_profile_only_passing_scenarios(file_name):
+    file_contents = open(os.path.join(DATADIR, "correct_defaults.pass.sh")).read()
+    checker = rule.RuleChecker(None)
+    assert checker._get_batch_profile(Scenario(file_name, file_contents)) is None
+
+
+def test_checker_clones_dont_share_containers():
+    checker = rule.RuleChecker("parent environment")
+    checker._helper_content_keys["rule"] = "key"
+    clone = checker._clone_for_environment("clone environment")
+    assert clone.test_env == "clone environment"
+    assert checker.test_env == "parent environment"
+    for name in ("results", "_queued_scenarios", "_batchable_scenarios",
+                 "used_templated_test_scenarios", "_helper_content_keys"):
+        assert getattr(clone, name) is not getattr(checker, name)
+    assert clone._helper_content_keys == checker._helper_content_keys
+    clone.results.append("result")
+    clone._queued_scenarios.append("scenario")
+    assert checker.results == []
+    assert checker._queued_scenarios == []
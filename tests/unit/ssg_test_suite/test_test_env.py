@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from ssg_test_suite import test_env
+
+
+class FakeEnv(test_env.TestEnv):
+    def __init__(self, name="base"):
+        super(FakeEnv, self).__init__("online")
+        self.name = name
+        self.events = []
+        self.clones = []
+
+    def clone(self, state_handle, name_suffix):
+        clone = FakeEnv("{0}_{1}".format(state_handle, name_suffix))
+        self.clones.append(clone)
+        return clone
+
+    def start(self):
+        self.events.append("start")
+
+    def reset_to_base(self, new_running_state_name):
+        self.events.append("reset")
+
+    def finalize(self):
+        self.events.append("finalize")
+
+
+def test_map_on_clones():
+    environment = FakeEnv()
+    state = test_env.SavedState(environment, "tests_uploaded")
+    state.handle = "uploaded"
+    threads = set()
+
+    def square(clone, number):
+        threads.add(threading.current_thread().name)
+        return clone.name, number * number
+
+    results = state.map_on_clones(square, [(n,) for n in range(10)], 3)
+
+    assert [number for _, number in results] == [n * n for n in range(10)]
+    assert len(environment.clones) == 3
+    assert {name for name, _ in results} <= {clone.name for clone in environment.clones}
+    for clone in environment.clones:
+        assert clone.events[0] == "start"
+        assert clone.events[-1] == "finalize"
+    assert environment.events == []
+
+
+def test_map_on_clones_reraises_errors():
+    environment = FakeEnv()
+    state = test_env.SavedState(environment, "tests_uploaded")
+    state.handle = "uploaded"
+
+    def fail(clone, number):
+        raise RuntimeError("failed {0}".format(number))
+
+    with pytest.raises(RuntimeError):
+        state.map_on_clones(fail, [(1,), (2,)], 2)
+    for clone in environment.clones:
+        assert clone.events[-1] == "finalize"
+
+
+def test_clone_unsupported():
+    environment = test_env.TestEnv("online")
+    environment.name = "vm"
+    with pytest.raises(NotImplementedError):
+        environment.clone("uploaded", "worker0")
+
+
+def test_vm_image_id_is_given_by_user():
+    # VMTestEnv needs libvirt to be created, only its attributes matter here
+    environment = test_env.VMTestEnv.__new__(test_env.VMTestEnv)
+    environment.hypervisor = "qemu:///system"
+    environment.domain_name = "ssg-test-suite"
+    environment.image_id = None
+    assert environment.get_image_id() is None
+    environment.image_id = "snapshot-2"
+    assert environment.get_image_id() == "qemu:///system/ssg-test-suite/snapshot-2"
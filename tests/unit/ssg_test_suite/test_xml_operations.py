@@ -0,0 +1,294 @@
+import os
+
+from ssg_test_suite import xml_operations
+
+
+DATASTREAM = """<?xml version="1.0" encoding="UTF-8"?>
+<ds:data-stream-collection xmlns:ds="http://scap.nist.gov/schema/scap/source/1.2"
+    xmlns:xlink="http://www.w3.org/1999/xlink"
+    xmlns:xccdf-1.2="http://checklists.nist.gov/xccdf/1.2">
+  <ds:data-stream id="scap_org.open-scap_datastream_from_xccdf_ssg-rhel9-xccdf.xml">
+    <ds:checklists>
+      <ds:component-ref id="scap_org.open-scap_cref_ssg-rhel9-xccdf.xml"
+          xlink:href="#scap_org.open-scap_comp_ssg-rhel9-xccdf.xml"/>
+    </ds:checklists>
+  </ds:data-stream>
+  <ds:component id="scap_org.open-scap_comp_ssg-rhel9-xccdf.xml">
+    <xccdf-1.2:Benchmark id="xccdf_org.ssgproject.content_benchmark_RHEL-9">
+      <xccdf-1.2:platform idref="cpe:/o:redhat:enterprise_linux:9"/>
+      <xccdf-1.2:Profile id="xccdf_org.ssgproject.content_profile_ospp">
+        <xccdf-1.2:select idref="xccdf_org.ssgproject.content_rule_audit_enabled"
+            selected="true"/>
+        <xccdf-1.2:select idref="xccdf_org.ssgproject.content_rule_ntp_enabled"
+            selected="false"/>
+      </xccdf-1.2:Profile>
+      <xccdf-1.2:Group id="xccdf_org.ssgproject.content_group_system">
+        <xccdf-1.2:Rule id="xccdf_org.ssgproject.content_rule_audit_enabled">
+          <xccdf-1.2:fix system="urn:xccdf:fix:script:sh">true</xccdf-1.2:fix>
+        </xccdf-1.2:Rule>
+        <xccdf-1.2:Rule id="xccdf_org.ssgproject.content_rule_ntp_enabled"/>
+      </xccdf-1.2:Group>
+    </xccdf-1.2:Benchmark>
+  </ds:component>
+</ds:data-stream-collection>
+"""
+BENCHMARK_ID = "xccdf_org.ssgproject.content_benchmark_RHEL-9"
+AUDIT_RULE_ID = "xccdf_org.ssgproject.content_rule_audit_enabled"
+
+
+def test_datastream_queries(tmpdir):
+    datastream = tmpdir.join("ds.xml")
+    datastream.write(DATASTREAM)
+    datastream = str(datastream)
+
+    assert xml_operations.get_all_xccdf_ids_in_datastream(datastream) == [
+        "scap_org.open-scap_cref_ssg-rhel9-xccdf.xml"]
+    assert xml_operations.infer_benchmark_id_from_component_ref_id(
+        datastream, "scap_org.open-scap_cref_ssg-rhel9-xccdf.xml") == BENCHMARK_ID
+    assert xml_operations.benchmark_get_applicable_platforms(datastream, BENCHMARK_ID) == {
+        "cpe:/o:redhat:enterprise_linux:9"}
+    profiles = xml_operations.get_all_profiles_in_benchmark(datastream, BENCHMARK_ID)
+    assert [p.get("id") for p in profiles] == ["xccdf_org.ssgproject.content_profile_ospp"]
+    assert xml_operations.get_all_rule_ids_in_profile(
+        datastream, BENCHMARK_ID, "xccdf_org.ssgproject.content_profile_ospp") == [
+        "audit_enabled"]
+    assert xml_operations.get_all_rules_in_benchmark(datastream, BENCHMARK_ID) == [
+        AUDIT_RULE_ID, "xccdf_org.ssgproject.content_rule_ntp_enabled"]
+    assert xml_operations.find_rule_in_benchmark(
+        datastream, BENCHMARK_ID, AUDIT_RULE_ID).get("id") == AUDIT_RULE_ID
+    assert xml_operations.find_fix_in_benchmark(
+        datastream, BENCHMARK_ID, AUDIT_RULE_ID).text == "true"
+    assert xml_operations.find_fix_in_benchmark(
+        datastream, BENCHMARK_ID, AUDIT_RULE_ID, "ansible") is None
+    assert xml_operations.find_fix_in_benchmark(
+        datastream, BENCHMARK_ID, "xccdf_org.ssgproject.content_rule_missing") is None
+
+
+def test_datastream_index_is_reused_until_the_file_changes(tmpdir):
+    datastream = tmpdir.join("ds.xml")
+    datastream.write(DATASTREAM)
+    index = xml_operations.get_datastream_index(str(datastream))
+    assert xml_operations.get_datastream_index(str(datastream)) is index
+
+    datastream.write(DATASTREAM.replace("audit_enabled", "audit_disabled"))
+    os.utime(str(datastream), (0, 0))
+    new_index = xml_operations.get_datastream_index(str(datastream))
+    assert new_index is not index
+    assert xml_operations.get_all_rule_ids_in_profile(
+        str(datastream), BENCHMARK_ID, "xccdf_org.ssgproject.content_profile_ospp") == [
+        "audit_disabled"]
+
+
+def test_datastream_index_cache_keeps_recent_files(tmpdir):
+    paths = []
+    for name in ["a.xml", "b.xml", "c.xml"]:
+        datastream = tmpdir.join(name)
+        datastream.write(DATASTREAM)
+        paths.append(str(datastream))
+        xml_operations.get_datastream_index(str(datastream))
+    cache = xml_operations.get_datastream_index.cache
+    assert len(cache) == xml_operations.DATASTREAM_INDEX_CACHE_SIZE
+    assert paths[0] not in cache
+    assert paths[2] in cache
+
+    tmpdir.join("c.xml").write(DATASTREAM.replace("audit_enabled", "audit_disabled"))
+    os.utime(paths[2], (0, 0))
+    xml_operations.get_datastream_index(paths[2])
+    assert len(cache) == xml_operations.DATASTREAM_INDEX_CACHE_SIZE
+
+
+def test_change_values_in_datastream(tmpdir):
+    datastream = tmpdir.join("ds.xml")
+    datastream.write(DATASTREAM.replace(
+        '<xccdf-1.2:Group id="xccdf_org.ssgproject.content_group_system">',
+        '<xccdf-1.2:Value id="xccdf_org.ssgproject.content_value_var_timeout" type="number">'
+        '<xccdf-1.2:value>600</xccdf-1.2:value>'
+        '<xccdf-1.2:value selector="10_minutes">600</xccdf-1.2:value>'
+        '</xccdf-1.2:Value>'
+        '<xccdf-1.2:Group id="xccdf_org.ssgproject.content_group_system">'))
+    output = tmpdir.join("modified.xml")
+    xml_operations.change_values_in_datastream(
+        str(datastream), str(output), {"var_timeout": "900", "var_missing": "1"})
+
+    index = xml_operations.get_datastream_index(str(output))
+    benchmark = index.get_benchmark_index(BENCHMARK_ID).node
+    values = benchmark.findall(
+        "xccdf-1.2:Value/xccdf-1.2:value", xml_operations.PREFIX_TO_NS)
+    assert [(v.get("selector"), v.text) for v in values] == [
+        (None, "900"), ("10_minutes", "600")]
+
+
+OVAL_COMPONENT = """
+  <ds:component id="scap_org.open-scap_comp_ssg-rhel9-oval.xml">
+    <oval_definitions xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5"
+        xmlns:ind="http://oval.mitre.org/XMLSchema/oval-definitions-5#independent">
+      <definitions>
+        <definition id="oval:audit_enabled:def:1">
+          <criteria><criterion test_ref="oval:audit_enabled:tst:1"/></criteria>
+        </definition>
+        <definition id="oval:ntp_enabled:def:1"/>
+      </definitions>
+      <tests>
+        <ind:textfilecontent54_test id="oval:audit_enabled:tst:1">
+          <ind:object object_ref="oval:audit_enabled:obj:1"/>
+        </ind:textfilecontent54_test>
+      </tests>
+      <objects>
+        <ind:textfilecontent54_object id="oval:audit_enabled:obj:1">
+          <ind:pattern var_ref="oval:audit_enabled:var:1"/>
+        </ind:textfilecontent54_object>
+      </objects>
+      <variables>
+        <external_variable id="oval:audit_enabled:var:1" datatype="string"/>
+      </variables>
+    </oval_definitions>
+  </ds:component>
+"""
+CHECKED_DATASTREAM = DATASTREAM.replace(
+    '<xccdf-1.2:fix system="urn:xccdf:fix:script:sh">true</xccdf-1.2:fix>',
+    '<xccdf-1.2:fix system="urn:xccdf:fix:script:sh">true</xccdf-1.2:fix>'
+    '<xccdf-1.2:check system="http://oval.mitre.org/XMLSchema/oval-definitions-5">'
+    '<xccdf-1.2:check-content-ref href="#oval0" name="oval:audit_enabled:def:1"/>'
+    '</xccdf-1.2:check>').replace(
+    "</ds:data-stream-collection>", OVAL_COMPONENT + "</ds:data-stream-collection>")
+
+
+def test_get_oval_closure(tmpdir):
+    datastream = tmpdir.join("ds.xml")
+    datastream.write(CHECKED_DATASTREAM)
+    index = xml_operations.get_datastream_index(str(datastream))
+    closure = index.get_oval_closure(["oval:audit_enabled:def:1", "oval:missing:def:1"])
+    assert [element.get("id") for element in closure] == [
+        "oval:audit_enabled:def:1", "oval:audit_enabled:obj:1",
+        "oval:audit_enabled:tst:1", "oval:audit_enabled:var:1"]
+
+
+def test_get_rule_content_digest(tmpdir):
+    def get_digest(contents):
+        datastream = tmpdir.join("ds.xml")
+        datastream.write(contents)
+        os.utime(str(datastream), (0, len(contents)))
+        return xml_operations.get_rule_content_digest(
+            str(datastream), BENCHMARK_ID, AUDIT_RULE_ID,
+            ["xccdf_org.ssgproject.content_profile_ospp"])
+
+    digest = get_digest(CHECKED_DATASTREAM)
+    # Changes of other rules and their checks don't matter
+    assert get_digest(CHECKED_DATASTREAM.replace(
+        '<definition id="oval:ntp_enabled:def:1"/>',
+        '<definition id="oval:ntp_enabled:def:1" version="2"/>')) == digest
+    assert get_digest(CHECKED_DATASTREAM.replace(
+        'content_rule_ntp_enabled"\n            selected="false"',
+        'content_rule_ntp_enabled"\n            selected="true"')) == digest
+    # Changes of the fix, of the referenced OVAL elements and of the selection do
+    assert get_digest(CHECKED_DATASTREAM.replace(">true<", ">false<")) != digest
+    assert get_digest(CHECKED_DATASTREAM.replace(
+        'datatype="string"', 'datatype="int"')) != digest
+    assert get_digest(CHECKED_DATASTREAM.replace(
+        'content_rule_audit_enabled"\n            selected="true"',
+        'content_rule_audit_enabled"\n            selected="false"')) != digest
+
+
+CPE_COMPONENTS = """
+  <ds:component id="scap_org.open-scap_comp_ssg-rhel9-cpe-dictionary.xml">
+    <cpe-list xmlns="http://cpe.mitre.org/dictionary/2.0">
+      <cpe-item name="cpe:/a:machine">
+        <check system="http://oval.mitre.org/XMLSchema/oval-definitions-5"
+            href="ssg-rhel9-cpe-oval.xml">oval:installed_env_is_a_machine:def:1</check>
+      </cpe-item>
+    </cpe-list>
+  </ds:component>
+  <ds:component id="scap_org.open-scap_comp_ssg-rhel9-cpe-oval.xml">
+    <oval_definitions xmlns="http://oval.mitre.org/XMLSchema/oval-definitions-5">
+      <definitions>
+        <definition id="oval:installed_env_is_a_machine:def:1" version="1"/>
+        <definition id="oval:installed_chrony:def:1" version="1"/>
+      </definitions>
+    </oval_definitions>
+  </ds:component>
+"""
+PLATFORM_SPECIFICATION = """
+      <cpe-lang:platform-specification xmlns:cpe-lang="http://cpe.mitre.org/language/2.0">
+        <cpe-lang:platform id="machine">
+          <cpe-lang:logical-test operator="AND" negate="false">
+            <cpe-lang:fact-ref name="cpe:/a:machine"/>
+          </cpe-lang:logical-test>
+        </cpe-lang:platform>
+        <cpe-lang:platform id="package_chrony">
+          <cpe-lang:logical-test operator="AND" negate="false">
+            <cpe-lang:check-fact-ref system="http://oval.mitre.org/XMLSchema/oval-definitions-5"
+                href="ssg-rhel9-cpe-oval.xml" id-ref="oval:installed_chrony:def:1"/>
+          </cpe-lang:logical-test>
+        </cpe-lang:platform>
+      </cpe-lang:platform-specification>
+"""
+PLATFORM_DATASTREAM = CHECKED_DATASTREAM.replace(
+    '<xccdf-1.2:platform idref="cpe:/o:redhat:enterprise_linux:9"/>',
+    '<xccdf-1.2:platform idref="cpe:/o:redhat:enterprise_linux:9"/>'
+    + PLATFORM_SPECIFICATION).replace(
+    '<xccdf-1.2:Group id="xccdf_org.ssgproject.content_group_system">',
+    '<xccdf-1.2:Group id="xccdf_org.ssgproject.content_group_system">'
+    '<xccdf-1.2:platform idref="#machine"/>').replace(
+    '<xccdf-1.2:Rule id="xccdf_org.ssgproject.content_rule_ntp_enabled"/>',
+    '<xccdf-1.2:Rule id="xccdf_org.ssgproject.content_rule_ntp_enabled">'
+    '<xccdf-1.2:platform idref="#package_chrony"/></xccdf-1.2:Rule>').replace(
+    "</ds:data-stream-collection>", CPE_COMPONENTS + "</ds:data-stream-collection>")
+
+
+def test_get_rule_content_digest_of_platforms(tmpdir):
+    def get_digest(contents):
+        datastream = tmpdir.join("ds.xml")
+        datastream.write(contents)
+        os.utime(str(datastream), (0, len(contents)))
+        return xml_operations.get_rule_content_digest(
+            str(datastream), BENCHMARK_ID, AUDIT_RULE_ID)
+
+    digest = get_digest(PLATFORM_DATASTREAM)
+    # Platforms of other rules and their checks don't matter
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        '<definition id="oval:installed_chrony:def:1" version="1"/>',
+        '<definition id="oval:installed_chrony:def:1" version="2"/>')) == digest
+    # Platforms of the Benchmark and of Groups of the rule,
+    # their CPE items and checks do
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        "enterprise_linux:9", "enterprise_linux:10")) != digest
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        '<xccdf-1.2:platform idref="#machine"/>', '')) != digest
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        'operator="AND" negate="false">\n            <cpe-lang:fact-ref',
+        'operator="AND" negate="true">\n            <cpe-lang:fact-ref')) != digest
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        'href="ssg-rhel9-cpe-oval.xml">oval', 'href="ssg-cpe-oval.xml">oval')) != digest
+    assert get_digest(PLATFORM_DATASTREAM.replace(
+        '<definition id="oval:installed_env_is_a_machine:def:1" version="1"/>',
+        '<definition id="oval:installed_env_is_a_machine:def:1" version="2"/>')) != digest
+
+
+def test_get_rule_content_digest_of_colliding_oval_ids(tmpdir):
+    def get_digest(contents):
+        datastream = tmpdir.join("ds.xml")
+        datastream.write(contents)
+        os.utime(str(datastream), (0, len(contents)))
+        return xml_operations.get_rule_content_digest(
+            str(datastream), BENCHMARK_ID, AUDIT_RULE_ID)
+
+    # The CPE OVAL component defines the same ID as the OVAL component
+    colliding = PLATFORM_DATASTREAM.replace(
+        '<definition id="oval:installed_chrony:def:1" version="1"/>',
+        '<definition id="oval:audit_enabled:def:1" version="1"/>')
+    index_path = tmpdir.join("index.xml")
+    index_path.write(colliding)
+    index = xml_operations.get_datastream_index(str(index_path))
+    assert [len(elements) for elements in index.get_oval_component_indexes()] == [5, 2]
+    closure = index.get_oval_closure(["oval:audit_enabled:def:1"])
+    assert [element.get("id") for element in closure] == [
+        "oval:audit_enabled:def:1", "oval:audit_enabled:obj:1",
+        "oval:audit_enabled:tst:1", "oval:audit_enabled:var:1",
+        "oval:audit_enabled:def:1"]
+
+    digest = get_digest(colliding)
+    assert get_digest(colliding.replace(
+        '<definition id="oval:audit_enabled:def:1" version="1"/>',
+        '<definition id="oval:audit_enabled:def:1" version="10"/>')) != digest
+    assert get_digest(colliding.replace(
+        'datatype="string"', 'datatype="int"')) != digest
@@ -0,0 +1,48 @@
+import os
+
+import ssg.build_yaml
+import ssg.products
+import ssg.rule_manifest
+
+import rule_dir_json
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+RULE_DIR = os.path.join(
+    PROJECT_ROOT, "linux_os", "guide", "system", "accounts", "accounts-session",
+    "accounts_tmout")
+
+
+def get_product_yamls(products):
+    return dict(
+        (product, ssg.products.load_product_yaml(
+            os.path.join(PROJECT_ROOT, "products", product, "product.yml")))
+        for product in products)
+
+
+def fail_to_load(*args, **kwargs):
+    raise AssertionError("The rule shouldn't have been loaded this way.")
+
+
+def test_handle_rule_yaml_uses_manifest_of_chosen_product(monkeypatch):
+    products = ["rhel8", "rhel9"]
+    product_yamls = get_product_yamls(products)
+    rule_file = os.path.join(RULE_DIR, "rule.yml")
+    expected = rule_dir_json.handle_rule_yaml(
+        products, product_yamls, "accounts_tmout", RULE_DIR, "guide")
+
+    rhel9_manifest = ssg.rule_manifest.RulesManifest(product_yamls["rhel9"])
+    rhel9_manifest.add_rule(
+        ssg.build_yaml.Rule.from_yaml(rule_file, dict(product_yamls["rhel9"])))
+    # The rule is rendered for the first product, the manifest of another one doesn't apply.
+    monkeypatch.setattr(rhel9_manifest, "get_rule", fail_to_load)
+    assert rule_dir_json.handle_rule_yaml(
+        products, product_yamls, "accounts_tmout", RULE_DIR, "guide",
+        {"rhel9": rhel9_manifest}) == expected
+
+    rhel8_manifest = ssg.rule_manifest.RulesManifest(product_yamls["rhel8"])
+    rhel8_manifest.add_rule(
+        ssg.build_yaml.Rule.from_yaml(rule_file, dict(product_yamls["rhel8"])))
+    monkeypatch.setattr(ssg.build_yaml.Rule, "from_yaml", fail_to_load)
+    assert rule_dir_json.handle_rule_yaml(
+        products, product_yamls, "accounts_tmout", RULE_DIR, "guide",
+        {"rhel8": rhel8_manifest, "rhel9": rhel9_manifest}) == expected
@@ -81,11 +81,64 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def get_creator(xml: ElementTree.ElementTree) -> str:
-    creator_element = xml.find(f'.//{XCCDF12}:metadata/dc:creator', PREFIX_TO_NS)
-    if creator_element is None:
-        return ""
-    return creator_element.text
+class ResultsFile:
+    """
+    Everything the comparison needs from a results file.
+
+    The file is read in a single streaming pass that keeps only
+    the benchmark metadata, rules and rule results, so even large
+    ARF files can be compared without loading them whole.
+    """
+
+    def __init__(self, path: str):
+        self.creator = ""
+        # Rule ID -> (version, STIG ID reference)
+        self.rules = dict()
+        # Rule ID -> result
+        self.results = dict()
+        # Rule ID -> {"ident": ..., "check": ...}
+        self.rule_results = dict()
+        self.__load(path)
+
+    def __load(self, path: str) -> None:
+        tags = {
+            f'{{{XCCDF12_NS}}}metadata': self.__add_metadata,
+            f'{{{XCCDF12_NS}}}Rule': self.__add_rule,
+            f'{{{XCCDF12_NS}}}rule-result': self.__add_rule_result,
+        }
+        for element in ssg.xml.iterparse_elements(path, tags):
+            tags[element.tag](element)
+
+    def __add_metadata(self, metadata: ElementTree.Element) -> None:
+        if self.creator:
+            return
+        creator_element = metadata.find('dc:creator', PREFIX_TO_NS)
+        if creator_element is not None:
+            self.creator = creator_element.text
+
+    def __add_rule(self, rule: ElementTree.Element) -> None:
+        version = rule.find(f'{XCCDF12}:version', PREFIX_TO_NS)
+        stig_reference = rule.find(
+            f"{XCCDF12}:reference[@href='{SSG_REF_URIS['stigid']}']", PREFIX_TO_NS)
+        self.rules[rule.attrib['id']] = (
+            version.text if version is not None else None,
+            stig_reference.text if stig_reference is not None else None)
+
+    def __add_rule_result(self, result: ElementTree.Element) -> None:
+        idref = result.attrib['idref']
+        idref = idref.replace("xccdf_mil.disa.stig_rule_", "")
+        try:
+            self.results[idref] = result.find('xccdf-1.2:result', PREFIX_TO_NS).text
+        except AttributeError:
+            self.results[idref] = "MISSING_RESULT"
+        self.rule_results[idref] = {
+            'ident': get_identifiers(result),
+            'check': get_check_ids(result),
+        }
+
+
+def get_creator(results_file: ResultsFile) -> str:
+    return results_file.creator
 
 
 def check_file(path: str) -> bool:
@@ -95,53 +148,34 @@ def check_file(path: str) -> bool:
     return True
 
 
-def get_rule_to_stig_dict(xml: ElementTree.ElementTree, benchmark_creator: str) -> dict:
+def get_rule_to_stig_dict(results_file: ResultsFile, benchmark_creator: str) -> dict:
     rules = dict()
-    for group in xml.findall(f'{XCCDF12}:Group', PREFIX_TO_NS):
-        for sub_groups in group.findall(f'{XCCDF12}:Group', PREFIX_TO_NS):
-            rules.update(get_rule_to_stig_dict(ElementTree.ElementTree(sub_groups),
-                                               benchmark_creator))
-        for rule in group.findall(f'{XCCDF12}:Rule', PREFIX_TO_NS):
-            rule_id = rule.attrib['id']
-            if benchmark_creator == "DISA":
-                stig_id = rule.find(f'{XCCDF12}:version', PREFIX_TO_NS).text
-            else:
-                elm = rule.find(f"{XCCDF12}:reference[@href='{SSG_REF_URIS['stigid']}']",
-                                PREFIX_TO_NS)
-                if elm is not None:
-                    stig_id = elm.text
-                else:
-                    continue
-            if stig_id in rules:
-                rules[stig_id].append(rule_id)
-            else:
-                rules[stig_id] = [rule_id]
+    for rule_id, (version, stig_reference) in results_file.rules.items():
+        if benchmark_creator == "DISA":
+            stig_id = version
+        elif stig_reference is not None:
+            stig_id = stig_reference
+        else:
+            continue
+        if stig_id in rules:
+            rules[stig_id].append(rule_id)
+        else:
+            rules[stig_id] = [rule_id]
     return rules
 
 
-def get_results(xml: ElementTree.ElementTree) -> dict:
-    rules = dict()
-
-    results_xml = xml.findall('.//xccdf-1.2:rule-result', PREFIX_TO_NS)
-    for result in results_xml:
-        idref = result.attrib['idref']
-        idref = idref.replace("xccdf_mil.disa.stig_rule_", "")
-        try:
-            rules[idref] = result.find('xccdf-1.2:result', PREFIX_TO_NS).text
-        except AttributeError:
-            rules[idref] = "MISSING_RESULT"
-
-    return rules
+def get_results(results_file: ResultsFile) -> dict:
+    return results_file.results
 
 
-def get_identifiers(rule: ElementTree.ElementTree) -> str:
+def get_identifiers(rule: ElementTree.Element) -> str:
     try:
         return rule.find('xccdf-1.2:ident', PREFIX_TO_NS).text
     except AttributeError:
         return "MISSING_IDREF"
 
 
-def get_check_ids(rule: ElementTree.ElementTree) -> str:
+def get_check_ids(rule: ElementTree.Element) -> str:
     try:
         check_content_ref = rule.find('xccdf-1.2:check/xccdf-1.2:check-content-ref', PREFIX_TO_NS)
         check_name = check_content_ref.get('name', "")
@@ -150,24 +184,11 @@ def get_check_ids(rule: ElementTree.ElementTree) -> str:
         return ""
 
 
-def loop_rule_results(xml: ElementTree.ElementTree) -> dict:
-    rules = dict()
-
-    results_xml = xml.findall('.//xccdf-1.2:rule-result', PREFIX_TO_NS)
-    for result in results_xml:
-        rule = dict()
-        idref = result.attrib['idref']
-        idref = idref.replace("xccdf_mil.disa.stig_rule_", "")
-        rules[idref] = rule
-
-        rule['ident'] = get_identifiers(result)
-        rule['check'] = get_check_ids(result)
-    return rules
+def loop_rule_results(results_file: ResultsFile) -> dict:
+    return results_file.rule_results
 
 
-def file_a_different_type(base_tree: ElementTree.ElementTree,
-                          target_tree: ElementTree.ElementTree) \
-        -> bool:
+def file_a_different_type(base_tree: ResultsFile, target_tree: ResultsFile) -> bool:
     """
     Check if both files are the same type.
 
@@ -222,8 +243,8 @@ def print_summary(comparison: Comparison, base: dict, target: dict) -> None:
 
 
 def process_stig_results(base_results: dict, target_results: dict,
-                         base_tree: ElementTree.ElementTree,
-                         target_tree: ElementTree.ElementTree) -> (dict, dict):
+                         base_tree: ResultsFile,
+                         target_tree: ResultsFile) -> (dict, dict):
     base_stigs = get_rule_to_stig_dict(base_tree, get_creator(base_tree))
     target_stigs = get_rule_to_stig_dict(target_tree, get_creator(target_tree))
     base_stig_results = get_results_by_stig(base_results, base_stigs)
@@ -233,7 +254,7 @@ def process_stig_results(base_results: dict, target_results: dict,
     return base_stig_flat_results, target_stig_flat_results
 
 
-def match_results(base_tree: ElementTree.ElementTree, target_tree: ElementTree.ElementTree):
+def match_results(base_tree: ResultsFile, target_tree: ResultsFile):
     diff_type = file_a_different_type(base_tree, target_tree)
     base_results = get_results(base_tree)
     target_results = get_results(target_tree)
@@ -254,8 +275,8 @@ def main():
     args = parse_args()
     check_file(args.base)
     check_file(args.target)
-    base_tree = ssg.xml.open_xml(args.base)
-    target_tree = ssg.xml.open_xml(args.target)
+    base_tree = ResultsFile(args.base)
+    target_tree = ResultsFile(args.target)
     comparison = match_results(base_tree, target_tree)
     base_rules = loop_rule_results(base_tree)
     target_rules = loop_rule_results(target_tree)
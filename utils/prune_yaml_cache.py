@@ -0,0 +1,33 @@
+#!/usr/bin/python3
+"""
+    Remove results from the cache of expanded YAML sources
+    (the SSG_YAML_CACHE_DIR CMake option) that no build has used recently.
+"""
+from __future__ import print_function
+
+import argparse
+import os
+
+import ssg.yaml
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--cache-dir", required=True,
+        help="Directory of the cache, e.g.: ~/scap-security-guide/build/yaml_cache")
+    parser.add_argument(
+        "--max-age-days", type=float, default=7,
+        help="Remove results that haven't been used for more than this many days.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache = ssg.yaml.ExpandedYamlCache(os.path.abspath(args.cache_dir))
+    removed = cache.prune(args.max_age_days * 24 * 60 * 60)
+    print("Removed {0} cached results from {1}".format(removed, cache.cache_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ import ssg.build_yaml
 import ssg.oval
 import ssg.build_remediations
 import ssg.products
+import ssg.rule_manifest
 import ssg.rules
 import ssg.yaml
 
@@ -29,6 +30,10 @@ def parse_args():
                    help="File to write json output to (defaults to build/rule_dirs.json)")
     parser.add_argument("-q", "--quiet", action="store_true",
                         help="Hides output from the script, just creates the file.")
+    parser.add_argument("-b", "--build-dir", type=str, action="store",
+                        help="Path to the build directory. If the product a rule is processed "
+                        "for has been built there, the rule is read from its manifest "
+                        "instead of loading the rule.yml file.")
 
     return parser.parse_args()
 
@@ -88,7 +93,19 @@ def collect_rule_ids_and_dirs(rules_dir):
         yield ssg.rules.get_rule_dir_id(rule_dir), rule_dir
 
 
-def handle_rule_yaml(product_list, product_yamls, rule_id, rule_dir, guide_dir):
+def load_rules_manifests(build_dir, product_yamls):
+    rules_manifests = dict()
+    for product, product_yaml in product_yamls.items():
+        manifest_path = os.path.join(
+            build_dir, product, ssg.rule_manifest.RULES_MANIFEST_FILENAME)
+        manifest = ssg.rule_manifest.RulesManifest.load(manifest_path, product_yaml)
+        if manifest is not None:
+            rules_manifests[product] = manifest
+    return rules_manifests
+
+
+def handle_rule_yaml(product_list, product_yamls, rule_id, rule_dir, guide_dir,
+                     rules_manifests=None):
     rule_obj = {'id': rule_id, 'dir': rule_dir, 'guide': guide_dir}
     rule_file = ssg.rules.get_rule_dir_yaml(rule_dir)
 
@@ -96,7 +113,12 @@ def handle_rule_yaml(product_list, product_yamls, rule_id, rule_dir, guide_dir):
     env_yaml = dict()
     env_yaml.update(product_yamls[prod_type])
 
-    rule_yaml = ssg.build_yaml.Rule.from_yaml(rule_file, env_yaml)
+    rule_yaml = None
+    # The manifest applies only if it has been built for the product chosen above.
+    if rules_manifests and prod_type in rules_manifests:
+        rule_yaml = rules_manifests[prod_type].get_rule(rule_file)
+    if rule_yaml is None:
+        rule_yaml = ssg.build_yaml.Rule.from_yaml(rule_file, env_yaml)
     rule_products = set()
     for product in product_list:
         if ssg.utils.is_applicable(rule_yaml.prodtype, product):
@@ -191,11 +213,15 @@ def main():
 
     all_rule_dirs, product_yamls = walk_products(args.root, all_products)
 
+    rules_manifests = None
+    if args.build_dir:
+        rules_manifests = load_rules_manifests(args.build_dir, product_yamls)
+
     known_rules = {}
     for rule_id, rule_dir, guide_dir, given_products in all_rule_dirs:
         try:
             rule_obj = handle_rule_yaml(given_products, product_yamls, rule_id,
-                                        rule_dir, guide_dir)
+                                        rule_dir, guide_dir, rules_manifests)
         except ssg.yaml.DocumentationNotComplete:
             # Happens on non-debug build when a rule is "documentation-incomplete"
             continue